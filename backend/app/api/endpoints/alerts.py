@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Optional
+from ...core.config import get_settings
+from ...core.database import get_db
+from ...models.alert_rule import AlertRule
+from ...services.alert_engine import STRENGTHS, AlertEngine, Rule
+
+router = APIRouter()
+settings = get_settings()
+alert_engine = AlertEngine(interval=settings.ALERT_EVAL_INTERVAL)
+
+class AlertRuleCreate(BaseModel):
+    user_id: str = Field(min_length=1)
+    symbol: str = Field(min_length=1)
+    setup_type: Optional[str] = Field(None, pattern="^(MOMENTUM|MEAN_REVERSION)$")
+    min_strength: Optional[str] = Field(None, pattern=f"^({'|'.join(STRENGTHS[1:])})$")
+    r_multiple_above: Optional[float] = Field(None, gt=0)
+
+def rule_row(rule: AlertRule) -> Dict[str, Any]:
+    return {
+        "id": rule.id,
+        "user_id": rule.user_id,
+        "symbol": rule.symbol,
+        "setup_type": rule.setup_type,
+        "min_strength": rule.min_strength,
+        "r_multiple_above": rule.r_multiple_above,
+        "created_at": rule.created_at.isoformat()
+    }
+
+@router.post("/alerts/rules", status_code=201)
+async def create_alert_rule(body: AlertRuleCreate, db: AsyncSession = Depends(get_db)):
+    """Store an alert rule; without thresholds it alerts on every signal bucket change"""
+    rule = AlertRule(**body.model_dump())
+    db.add(rule)
+    await db.commit()
+    await db.refresh(rule)
+    alert_engine.add_rule(Rule.from_model(rule))
+    return rule_row(rule)
+
+@router.get("/alerts/rules")
+async def list_alert_rules(user_id: str, symbol: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    """A user's active alert rules, optionally for one symbol"""
+    stmt = select(AlertRule).where(AlertRule.user_id == user_id, AlertRule.active.is_(True))
+    if symbol is not None:
+        stmt = stmt.where(AlertRule.symbol == symbol)
+    result = await db.execute(stmt.order_by(AlertRule.id))
+    return {"user_id": user_id, "rules": [rule_row(rule) for rule in result.scalars()]}
+
+@router.delete("/alerts/rules/{rule_id}", status_code=204)
+async def delete_alert_rule(rule_id: int, user_id: str, db: AsyncSession = Depends(get_db)):
+    """Deactivate one of a user's alert rules"""
+    rule = await db.get(AlertRule, rule_id)
+    if rule is None or rule.user_id != user_id or not rule.active:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    rule.active = False
+    await db.commit()
+    alert_engine.remove_rule(rule_id)
@@ -1,82 +1,164 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Any, Callable, List, Optional
+from ...core.config import get_settings
 from ...core.database import get_db
+from ...core.executor import ExecutorOverloaded, analysis_executor
+from ...services.backtest import run_backtest
+from ...services.bars import TIMEFRAMES, timeframe_seconds
+from ...services.history_store import history_store
 from ...services.market_processor import MarketProcessor
-from ...models.market_data import MarketData
-from ...models.trade_setup import TradeSetup
-from sqlalchemy import select
+from ...services.market_data_repository import fetch_price_matrix, load_series
+from ...services.setup_writer import TradeSetupWriter
+from ...services.setup_history import decode_cursor, fetch_history_page, stream_history
+from ...services.wire_format import encode_message
 from datetime import datetime, timedelta
+import asyncio
 
 router = APIRouter()
+settings = get_settings()
 market_processor = MarketProcessor()
+trade_setup_writer = TradeSetupWriter()
+
+async def run_analysis(fn: Callable, *args: Any):
+    """Run CPU-bound analysis on the executor, mapping overload and timeouts to HTTP errors"""
+    try:
+        return await analysis_executor.run(fn, *args)
+    except ExecutorOverloaded:
+        raise HTTPException(status_code=503, detail="Analysis capacity exceeded, retry shortly")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Analysis timed out")
+
+# Ticks when omitted, otherwise OHLCV bars of that length
+TimeframeQuery = Query(None, pattern=f"^({'|'.join(TIMEFRAMES)})$")
+
+def analysis_since(timeframe: Optional[str]) -> datetime:
+    """Start of the analysis window: 24h of ticks, or the last ANALYSIS_BARS bars"""
+    if timeframe is None:
+        return datetime.utcnow() - timedelta(hours=24)
+    return datetime.utcnow() - timedelta(seconds=timeframe_seconds(timeframe) * settings.ANALYSIS_BARS)
 
 @router.get("/analysis/current")
-async def get_current_analysis(symbol: str, db: AsyncSession = Depends(get_db)):
+async def get_current_analysis(
+    symbol: str,
+    timeframe: Optional[str] = TimeframeQuery,
+    db: AsyncSession = Depends(get_db)
+):
     """Get current market analysis for a symbol"""
-    # Get recent market data
-    stmt = select(MarketData).where(
-        MarketData.symbol == symbol,
-        MarketData.timestamp >= datetime.utcnow() - timedelta(hours=24)
-    ).order_by(MarketData.timestamp.desc())
+    # Get recent market data as price/volume arrays
+    market_data = await load_series(db, symbol, analysis_since(timeframe), history_store, timeframe)
     
-    result = await db.execute(stmt)
-    market_data = result.scalars().all()
-    
-    if not market_data:
+    if market_data is None:
         raise HTTPException(status_code=404, detail="No recent market data found")
     
-    # Process market data
-    setup = market_processor.identify_setup(market_data)
-    zones = market_processor.calculate_invalidation_zones(market_data)
-    
-    # Create trade setup record
-    trade_setup = TradeSetup(
-        symbol=symbol,
-        setup_type=setup['setup_type'],
-        signal_strength=setup['signal_strength'],
-        r_multiple=setup['r_multiple'],
-        entry_price=setup['entry_price'],
-        stop_loss=setup['stop_loss'],
-        target_price=setup['target_price'],
-        timestamp=datetime.utcnow()
-    )
+    # Process market data off the event loop, sharing indicators between setup and zones
+    setup, zones = await run_analysis(market_processor.analyze, market_data)
     
-    db.add(trade_setup)
-    await db.commit()
+    # Record the trade setup in the background; the response does not wait on the write
+    trade_setup_writer.submit(symbol, setup)
     
     return {
         "setup": setup,
         "invalidation_zones": zones,
+        "timeframe": timeframe,
         "analysis_timestamp": datetime.utcnow().isoformat()
     }
 
+@router.get("/analysis/batch")
+async def get_batch_analysis(
+    symbols: str,
+    timeframe: Optional[str] = TimeframeQuery,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get current market analysis for a comma-separated list of symbols"""
+    requested = list(dict.fromkeys(s.strip() for s in symbols.split(",") if s.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols requested")
+    
+    # Load every requested symbol in one query, grouped and time-ordered
+    matrix = await fetch_price_matrix(db, requested, analysis_since(timeframe), timeframe)
+    
+    # Process all symbols in one vectorized pass
+    analyses = await run_analysis(market_processor.identify_setups, matrix)
+    
+    analysis_time = datetime.utcnow()
+    for symbol, analysis in analyses.items():
+        trade_setup_writer.submit(symbol, analysis['setup'], analysis_time)
+    
+    return {
+        "results": analyses,
+        "missing": [symbol for symbol in requested if symbol not in analyses],
+        "timeframe": timeframe,
+        "analysis_timestamp": analysis_time.isoformat()
+    }
+
+@router.get("/backtest")
+async def get_backtest(
+    symbols: str,
+    days: int = Query(30, ge=1, le=3650),
+    min_score: Optional[float] = Query(None, ge=0.0, le=1.0),
+    max_bars: Optional[int] = Query(None, ge=1),
+    timeframe: Optional[str] = TimeframeQuery,
+    db: AsyncSession = Depends(get_db)
+):
+    """Backtest setups over a comma-separated list of symbols' stored history"""
+    requested = list(dict.fromkeys(s.strip() for s in symbols.split(",") if s.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols requested")
+    
+    since = datetime.utcnow() - timedelta(days=days)
+    series = {}
+    for symbol in requested:
+        data = await load_series(db, symbol, since, history_store, timeframe)
+        if data is not None:
+            series[symbol] = data
+    
+    # One worker: the analysis executor already bounds how many run at once
+    report = await run_analysis(run_backtest, series, min_score, max_bars, 1)
+    return {
+        **report.summary(),
+        "missing": [symbol for symbol in requested if symbol not in series],
+        "timeframe": timeframe,
+        "since": since.isoformat()
+    }
+
 @router.get("/setups/history")
 async def get_setup_history(
     symbol: str,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get historical trade setups"""
-    stmt = select(TradeSetup).where(
-        TradeSetup.symbol == symbol
-    ).order_by(TradeSetup.timestamp.desc()).limit(limit)
-    
-    result = await db.execute(stmt)
-    setups = result.scalars().all()
+    """Get historical trade setups, newest first; pass `next_cursor` back for the next page"""
+    try:
+        setups, next_cursor = await fetch_history_page(db, symbol, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
     return {
         "symbol": symbol,
-        "setups": [
-            {
-                "setup_type": setup.setup_type,
-                "signal_strength": setup.signal_strength,
-                "r_multiple": setup.r_multiple,
-                "entry_price": setup.entry_price,
-                "stop_loss": setup.stop_loss,
-                "target_price": setup.target_price,
-                "timestamp": setup.timestamp.isoformat()
-            }
-            for setup in setups
-        ]
+        "setups": setups,
+        "next_cursor": next_cursor
     }
+
+@router.get("/setups/history/export")
+async def export_setup_history(
+    symbol: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream a symbol's full setup history as NDJSON, newest first, in constant memory"""
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    async def lines():
+        async for setup in stream_history(db, symbol, cursor, since, until):
+            yield encode_message(setup) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
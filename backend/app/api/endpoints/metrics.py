@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from ...core.executor import analysis_executor, loop_lag_monitor
+from ...core.pool_metrics import pool_status
+from ...models.base import engine
+from .alerts import alert_engine
+from .market_analysis import trade_setup_writer
+from .websocket import analysis_cache, websocket_manager
+
+router = APIRouter()
+
+@router.get("/metrics/database")
+async def get_database_metrics():
+    """Connection pool occupancy and checkout wait times"""
+    return pool_status(engine)
+
+@router.get("/metrics/websocket")
+async def get_websocket_metrics():
+    """Tick coalescing counters and per-client send queue depth, drops and conflations"""
+    return {
+        "connections": len(websocket_manager.active_connections),
+        "feed": websocket_manager.feed_stats(),
+        "bus": websocket_manager.bus.stats(),
+        "analysis_cache": analysis_cache.stats(),
+        "clients": websocket_manager.client_stats()
+    }
+
+@router.get("/metrics/runtime")
+async def get_runtime_metrics():
+    """Event loop lag and analysis executor load"""
+    return {
+        "loop_lag": loop_lag_monitor.stats(),
+        "analysis_executor": analysis_executor.stats(),
+        "trade_setup_writer": trade_setup_writer.stats(),
+        "alert_engine": alert_engine.stats()
+    }
@@ -1,22 +1,51 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from typing import Dict
+from typing import Dict, Optional
+from datetime import datetime, timedelta
+import asyncio
 import json
 from ...services.websocket_manager import WebSocketManager
-from ...services.market_processor import MarketProcessor
+from ...services.wire_format import SymbolTableFull
+from ...services.pubsub import create_bus
+from ...services.analysis_cache import AnalysisCache
+from ...services.history_store import history_store
+from ...services.market_data_repository import load_series
+from ...services.market_processor import MarketProcessor, MarketSeries
+from ...models.base import async_session
+from ...core.config import get_settings
+from ...core.executor import ExecutorOverloaded, analysis_executor
 from ...core.database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
-websocket_manager = WebSocketManager()
+settings = get_settings()
+websocket_manager = WebSocketManager(
+    send_timeout=settings.WS_SEND_TIMEOUT,
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    overflow_policy=settings.WS_OVERFLOW_POLICY,
+    coalesce_interval=settings.WS_COALESCE_INTERVAL,
+    bus=create_bus(settings.WS_PUBSUB_BACKEND, settings.WS_PUBSUB_SOCKET_PATH)
+)
 market_processor = MarketProcessor()
 
+async def compute_analysis(symbol: str) -> Optional[Dict]:
+    """Setup for a symbol from its recent market data, or None if there is none"""
+    async with async_session() as db:
+        market_data = await get_market_data(db, symbol)
+    if market_data is None:
+        return None
+    return await analysis_executor.run(market_processor.identify_setup, market_data)
+
+analysis_cache = AnalysisCache(compute_analysis, ttl=settings.ANALYSIS_CACHE_TTL)
+analysis_cache.attach(websocket_manager.bus)
+
 @router.websocket("/ws/{client_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
     client_id: str,
     db: AsyncSession = Depends(get_db)
 ):
-    await websocket_manager.connect(websocket)
+    # Alerts for the alert rules of user `client_id` go to this connection
+    await websocket_manager.connect(websocket, user_id=client_id)
     try:
         while True:
             # Wait for messages from the client
@@ -26,29 +55,46 @@ async def websocket_endpoint(
             # Handle different message types
             if message["type"] == "subscribe":
                 symbol = message["symbol"]
-                await websocket_manager.subscribe_to_symbol(websocket, symbol)
-                await websocket.send_json({
+                # Optional cap on updates per second for this symbol
+                max_rate = message.get("max_rate")
+                if max_rate is not None and not valid_max_rate(max_rate):
+                    await websocket_manager.broadcast_error(
+                        websocket, "max_rate must be a positive number of updates per second"
+                    )
+                    continue
+                try:
+                    # Binary tick frames carry this id instead of the symbol string
+                    symbol_id = websocket_manager.symbol_ids.id_for(symbol)
+                except SymbolTableFull:
+                    await websocket_manager.broadcast_error(websocket, "no more symbols can be subscribed to")
+                    continue
+                await websocket_manager.subscribe_to_symbol(websocket, symbol, max_rate=max_rate)
+                await websocket_manager.send_personal_message(websocket, {
                     "type": "subscription_success",
-                    "symbol": symbol
+                    "symbol": symbol,
+                    "symbol_id": symbol_id
                 })
             
             elif message["type"] == "unsubscribe":
                 symbol = message["symbol"]
                 await websocket_manager.unsubscribe_from_symbol(websocket, symbol)
-                await websocket.send_json({
+                await websocket_manager.send_personal_message(websocket, {
                     "type": "unsubscription_success",
                     "symbol": symbol
                 })
             
             elif message["type"] == "get_analysis":
                 symbol = message["symbol"]
-                # Get market data from database and process
-                # This would be implemented based on your market data storage
-                market_data = await get_market_data(db, symbol)
-                if market_data:
-                    setup = market_processor.identify_setup(market_data)
-                    await websocket.send_json({
+                # Shared per-symbol result: one computation however many clients ask
+                try:
+                    setup = await analysis_cache.get(symbol)
+                except (ExecutorOverloaded, asyncio.TimeoutError):
+                    await websocket_manager.broadcast_error(websocket, f"Analysis for {symbol} is busy, retry shortly")
+                    continue
+                if setup is not None:
+                    await websocket_manager.send_personal_message(websocket, {
                         "type": "analysis_update",
+                        "symbol": symbol,
                         "data": setup
                     })
     
@@ -58,8 +104,11 @@ async def websocket_endpoint(
         await websocket_manager.broadcast_error(websocket, str(e))
         await websocket_manager.disconnect(websocket)
 
-async def get_market_data(db: AsyncSession, symbol: str):
+def valid_max_rate(value) -> bool:
+    """A positive number; bools and NaN are rejected"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+async def get_market_data(db: AsyncSession, symbol: str) -> Optional[MarketSeries]:
     """Helper function to get market data from database"""
-    # Implementation would go here
-    # This should fetch recent market data for the symbol
-    pass
+    # Same 24h window as the REST analysis endpoint
+    return await load_series(db, symbol, datetime.utcnow() - timedelta(hours=24), history_store)
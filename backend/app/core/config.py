@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Modular Traffic Light Dashboard"
@@ -8,6 +9,67 @@ class Settings(BaseSettings):
     
     TRADINGVIEW_API_KEY: str
     DATABASE_URL: str
+    
+    # Database engine and connection pool
+    DATABASE_ECHO: bool = False
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_QUERY_CACHE_SIZE: int = 1200  # compiled SQL cache entries
+    DATABASE_STATEMENT_CACHE_SIZE: int = 256  # asyncpg prepared statements per connection
+    
+    # market_data storage
+    MARKET_DATA_PARTITIONING: bool = False  # daily declarative partitions (PostgreSQL only)
+    MARKET_DATA_RETENTION_DAYS: Optional[int] = None  # keep everything when unset
+    MARKET_DATA_PARTITIONS_AHEAD: int = 2
+    
+    # Local columnar tick history (read instead of market_data when it covers the window)
+    HISTORY_STORE_PATH: Optional[str] = None  # disabled when unset
+    HISTORY_COMPACT_INTERVAL: float = 60.0  # seconds
+    HISTORY_COMPACT_MIN_ROWS: int = 10000  # appended ticks before a symbol is rewritten
+    
+    # OHLCV bars rolled up from ingested ticks
+    BAR_TIMEFRAMES: str = "1s,1m,5m,1h"  # comma-separated; empty disables bar aggregation
+    ANALYSIS_BARS: int = 300  # bars analyzed when a request names a timeframe
+    
+    # Setup alerts for stored per-user rules
+    ALERT_EVAL_INTERVAL: float = 0.1  # seconds; symbols ticking within it are evaluated once
+    ALERT_RULE_RELOAD_INTERVAL: float = 30.0  # seconds; picks up rules changed in other workers
+    
+    # WebSocket fan-out
+    WS_SEND_QUEUE_SIZE: int = 256  # pending messages per client
+    WS_OVERFLOW_POLICY: str = "conflate"  # "conflate" or "drop_oldest"
+    WS_SEND_TIMEOUT: float = 1.0  # seconds before a stuck client is disconnected
+    WS_COALESCE_INTERVAL: float = 0.1  # merge ticks per symbol over this window; 0 sends every tick
+    WS_PUBSUB_BACKEND: str = "local"  # "unix" to share broadcasts between uvicorn workers
+    WS_PUBSUB_SOCKET_PATH: str = "/tmp/traffic-light-bus.sock"
+    ANALYSIS_CACHE_TTL: float = 5.0  # seconds; results are also dropped on new market data
+    
+    # CPU-bound analysis executor
+    ANALYSIS_EXECUTOR: str = "thread"  # "thread" (NumPy releases the GIL), "process" or "inline"
+    ANALYSIS_MAX_WORKERS: Optional[int] = None  # defaults to min(4, CPU count)
+    ANALYSIS_MAX_PENDING: int = 64  # calls beyond this are rejected with 503
+    ANALYSIS_TIMEOUT: float = 10.0  # seconds
+    LOOP_LAG_INTERVAL: float = 0.1  # event loop lag probe period
+    
+    # TradingView REST client
+    TRADINGVIEW_BASE_URL: str = "https://api.tradingview.com/v1"
+    TRADINGVIEW_MAX_CONNECTIONS: int = 20  # pooled keep-alive connections
+    TRADINGVIEW_RATE_LIMIT: Optional[float] = 10.0  # requests per second; unset disables
+    TRADINGVIEW_RATE_BURST: Optional[float] = None  # defaults to one second's worth
+    TRADINGVIEW_TIMEOUT: float = 10.0  # seconds per attempt
+    TRADINGVIEW_MAX_RETRIES: int = 3
+    TRADINGVIEW_BACKOFF_BASE: float = 0.2  # seconds; doubled per retry, fully jittered
+    TRADINGVIEW_BACKOFF_MAX: float = 5.0
+    TRADINGVIEW_DNS_CACHE_TTL: int = 300  # seconds
+    TRADINGVIEW_WINDOW_SIZE: int = 500  # recent ticks kept per symbol for live signals
+    
+    # Streaming market data feed (replaces polling when set)
+    TRADINGVIEW_FEED_URL: Optional[str] = None  # run the feed in one worker only
+    TRADINGVIEW_FEED_SYMBOLS: str = ""  # comma-separated
+    TRADINGVIEW_FEED_GAP_TIMEOUT: float = 2.0  # seconds to wait for a replay before giving up on it
 
     class Config:
         env_file = ".env"
@@ -1,10 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..models.base import Base, engine
+from ..models.base import Base, engine, async_session
 
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 async def get_db() -> AsyncSession:
-    async with AsyncSession(engine) as session:
+    async with async_session() as session:
         yield session
@@ -0,0 +1,162 @@
+import asyncio
+import functools
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+from .config import get_settings
+
+T = TypeVar("T")
+
+class ExecutorOverloaded(RuntimeError):
+    """Raised instead of queueing when too many calls are already pending"""
+
+class AnalysisExecutor:
+    """Runs CPU-bound analysis off the event loop.
+
+    `thread` suits NumPy/pandas work, which releases the GIL; `process` suits
+    pure-Python paths; `inline` runs on the loop (tests, debugging). Calls
+    beyond `max_pending` are rejected rather than queued, and callers stop
+    waiting after `timeout` seconds. A timed-out call still occupies its
+    worker until it returns, and still counts as pending until then.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: Optional[int] = None,
+        max_pending: int = 64,
+        timeout: Optional[float] = 10.0
+    ):
+        if kind not in ("thread", "process", "inline"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+
+        self.pending = 0
+        self.max_seen_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.busy_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="analysis"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `fn(*args, **kwargs)` on the pool and await its result"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorOverloaded(f"{self.pending} analysis calls already pending")
+
+        call = functools.partial(fn, *args, **kwargs)
+        if self.kind == "inline":
+            return self._timed(call)
+
+        self.pending += 1
+        self.max_seen_pending = max(self.max_seen_pending, self.pending)
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+        future.add_done_callback(functools.partial(self._finished, started))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def _timed(self, call: Callable[[], T]) -> T:
+        started = time.perf_counter()
+        try:
+            return call()
+        finally:
+            self.completed += 1
+            self.busy_seconds += time.perf_counter() - started
+
+    def _finished(self, started: float, future: asyncio.Future):
+        self.pending -= 1
+        self.completed += 1
+        self.busy_seconds += time.perf_counter() - started
+        if not future.cancelled():
+            future.exception()  # mark retrieved so timed-out failures don't warn
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "pending": self.pending,
+            "max_pending_seen": self.max_seen_pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_call_ms": self.busy_seconds / self.completed * 1000 if self.completed else 0.0,
+        }
+
+class LoopLagMonitor:
+    """Measures event loop responsiveness by how late a periodic timer fires"""
+
+    def __init__(self, interval: float = 0.1, window: int = 600):
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def stats(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"samples": 0, "last_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "samples": len(ordered),
+            "last_ms": self.samples[-1] * 1000,
+            "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+            "max_ms": self.max_lag * 1000,
+        }
+
+settings = get_settings()
+
+# Shared by every endpoint in this worker
+analysis_executor = AnalysisExecutor(
+    kind=settings.ANALYSIS_EXECUTOR,
+    max_workers=settings.ANALYSIS_MAX_WORKERS,
+    max_pending=settings.ANALYSIS_MAX_PENDING,
+    timeout=settings.ANALYSIS_TIMEOUT
+)
+loop_lag_monitor = LoopLagMonitor(interval=settings.LOOP_LAG_INTERVAL)
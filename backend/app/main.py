@@ -1,10 +1,37 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import get_settings
 from .core.database import init_db
-from .api.endpoints import market_analysis, websocket
+from .core.executor import analysis_executor, loop_lag_monitor
+from .models.base import async_session, engine
+from .services.bars import BarAggregator
+from .services.history_store import history_store
+from .services.ingestion import MarketDataIngestor
+from .services.market_feed import MarketFeedClient, supervise_feed
+from .services.retention import MarketDataRetention
+from .services.tradingview_service import TradingViewService
+from .api.endpoints import alerts, market_analysis, metrics, websocket
 
 settings = get_settings()
+market_data_retention = MarketDataRetention(
+    engine,
+    retention_days=settings.MARKET_DATA_RETENTION_DAYS,
+    partitions_ahead=settings.MARKET_DATA_PARTITIONS_AHEAD,
+)
+tradingview_service = TradingViewService(settings)
+market_feed = MarketFeedClient(
+    settings.TRADINGVIEW_FEED_URL,
+    [symbol.strip() for symbol in settings.TRADINGVIEW_FEED_SYMBOLS.split(",") if symbol.strip()],
+    snapshots=tradingview_service,
+    gap_timeout=settings.TRADINGVIEW_FEED_GAP_TIMEOUT,
+) if settings.TRADINGVIEW_FEED_URL else None
+bar_timeframes = [name.strip() for name in settings.BAR_TIMEFRAMES.split(",") if name.strip()]
+market_data_ingestor = MarketDataIngestor(
+    history_store=history_store,
+    bar_aggregator=BarAggregator(bar_timeframes) if bar_timeframes else None,
+    alert_engine=alerts.alert_engine,
+)
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
@@ -21,12 +48,58 @@ app.add_middleware(
 
 # Include routers
 app.include_router(market_analysis.router, prefix="/api/v1")
+app.include_router(alerts.router, prefix="/api/v1")
+app.include_router(metrics.router, prefix="/api/v1")
 app.include_router(websocket.router, prefix="/ws")
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize application services"""
     await init_db()
+    await market_data_retention.ensure_partitions()
+    app.state.retention_task = asyncio.create_task(market_data_retention.run_forever())
+    await websocket.websocket_manager.bus.start()
+    loop_lag_monitor.start()
+    await market_analysis.trade_setup_writer.start()
+    if market_feed is not None:
+        if history_store is not None:
+            # Only the worker ingesting the feed appends to and compacts the store; the rest read it
+            history_store.acquire_writer()
+            app.state.compaction_task = asyncio.create_task(history_store.run_forever(
+                settings.HISTORY_COMPACT_INTERVAL, settings.HISTORY_COMPACT_MIN_ROWS
+            ))
+        await market_data_ingestor.start()
+        async with async_session() as session:
+            await alerts.alert_engine.load(session)
+        app.state.alert_task = asyncio.create_task(alerts.alert_engine.run_forever(
+            market_data_ingestor.states,
+            websocket.websocket_manager.broadcast_rule_alert,
+            async_session,
+            settings.ALERT_RULE_RELOAD_INTERVAL,
+        ))
+        app.state.feed_task = asyncio.create_task(
+            supervise_feed(market_feed, market_data_ingestor, websocket.websocket_manager)
+        )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background services"""
+    app.state.retention_task.cancel()
+    if market_feed is not None:
+        app.state.feed_task.cancel()
+        app.state.alert_task.cancel()
+        await market_data_ingestor.stop()
+        if history_store is not None:
+            app.state.compaction_task.cancel()
+    if history_store is not None:
+        history_store.close()
+    await tradingview_service.close()
+    # Flush setups still queued before the process exits
+    await market_analysis.trade_setup_writer.stop()
+    await websocket.websocket_manager.close()
+    await websocket.websocket_manager.bus.stop()
+    await loop_lag_monitor.stop()
+    analysis_executor.shutdown()
 
 @app.get("/")
 async def root():
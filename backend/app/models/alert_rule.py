@@ -0,0 +1,18 @@
+from sqlalchemy import Boolean, Column, Integer, String, Float, DateTime, Index
+from .base import Base
+from datetime import datetime
+
+class AlertRule(Base):
+    __tablename__ = "alert_rules"
+    __table_args__ = (
+        Index("ix_alert_rules_symbol_active", "symbol", "active"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(String, nullable=False, index=True)
+    symbol = Column(String, nullable=False)
+    setup_type = Column(String, nullable=True)  # MOMENTUM or MEAN_REVERSION; any when unset
+    min_strength = Column(String, nullable=True)  # alert on bucket changes into WEAK/MODERATE/STRONG or above
+    r_multiple_above = Column(Float, nullable=True)  # alert when the R-multiple rises through this
+    active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,20 +1,43 @@
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine
-from ..core.config import get_settings
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from ..core.config import Settings, get_settings
+from ..core.pool_metrics import MeteredAsyncQueuePool
 
 settings = get_settings()
 
+def engine_options(settings: Settings) -> dict:
+    """Engine keyword arguments for the configured database"""
+    url = make_url(settings.DATABASE_URL)
+    options = {
+        "echo": settings.DATABASE_ECHO,
+        "future": True,
+        "query_cache_size": settings.DATABASE_QUERY_CACHE_SIZE,
+    }
+
+    # In-memory SQLite lives in a single connection, so it keeps its static pool
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=MeteredAsyncQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+    )
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE
+        }
+    return options
+
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    future=True
-)
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings))
 
-# Create async session factory
-async_session = sessionmaker(
+# Create async session factory, shared by every request and background writer
+async_session = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
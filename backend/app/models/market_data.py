@@ -1,15 +1,25 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from .base import Base
+from ..core.config import get_settings
 from datetime import datetime
 
+settings = get_settings()
+
+# PostgreSQL declarative partitions need the partition key in the primary key
+PARTITIONED = settings.MARKET_DATA_PARTITIONING and settings.DATABASE_URL.startswith("postgresql")
+
 class MarketData(Base):
     __tablename__ = "market_data"
+    __table_args__ = (
+        Index("ix_market_data_symbol_timestamp", "symbol", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"} if PARTITIONED else {},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    symbol = Column(String)
     price = Column(Float)
     volume = Column(Float)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, primary_key=PARTITIONED)
     
     # Additional market indicators
     sma_20 = Column(Float, nullable=True)
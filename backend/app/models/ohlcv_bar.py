@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from .base import Base
+
+class OHLCVBar(Base):
+    __tablename__ = "ohlcv_bars"
+    __table_args__ = (
+        Index("ix_ohlcv_bars_symbol_timeframe_timestamp", "symbol", "timeframe", "timestamp", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    symbol = Column(String, nullable=False)
+    timeframe = Column(String, nullable=False)  # 1s, 1m, 5m or 1h
+    timestamp = Column(DateTime, nullable=False)  # start of the bar, UTC
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(Float)
+    tick_count = Column(Integer)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, Index
 from .base import Base
 from datetime import datetime
 import enum
@@ -14,9 +14,12 @@ class SignalStrength(enum.Enum):
 
 class TradeSetup(Base):
     __tablename__ = "trade_setups"
+    __table_args__ = (
+        Index("ix_trade_setups_symbol_timestamp", "symbol", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String, index=True)
+    symbol = Column(String)
     setup_type = Column(String, index=True)  # MOMENTUM or MEAN_REVERSION
     signal_strength = Column(String)  # STRONG, MODERATE, WEAK
     r_multiple = Column(Float)
@@ -0,0 +1,232 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.alert_rule import AlertRule
+from .indicator_state import IndicatorState, IndicatorStateRegistry
+from .market_processor import MarketProcessor
+
+STRENGTHS = ("NEUTRAL", "WEAK", "MODERATE", "STRONG")
+_RANK = {name: rank for rank, name in enumerate(STRENGTHS)}
+
+@dataclass(frozen=True)
+class Rule:
+    id: int
+    user_id: str
+    symbol: str
+    setup_type: Optional[str] = None
+    min_strength: Optional[str] = None
+    r_multiple_above: Optional[float] = None
+
+    def __post_init__(self):
+        if self.min_strength is not None and self.min_strength not in STRENGTHS[1:]:
+            raise ValueError(f"Unknown signal strength: {self.min_strength}")
+
+    @property
+    def watches_strength(self) -> bool:
+        """Rules without a threshold alert on every bucket change"""
+        return self.min_strength is not None or self.r_multiple_above is None
+
+    @classmethod
+    def from_model(cls, row: AlertRule) -> "Rule":
+        return cls(row.id, row.user_id, row.symbol, row.setup_type, row.min_strength, row.r_multiple_above)
+
+class SymbolRules:
+    """The rules of one symbol, arranged so a change is matched without scanning them all.
+
+    Bucket rules are grouped by their minimum strength, so a change into a
+    bucket takes the groups at or below it. R-multiple thresholds are kept
+    sorted, so the ones crossed by a move are a single slice.
+    """
+
+    def __init__(self):
+        self.rules: Dict[int, Rule] = {}
+        self._by_strength: Optional[List[List[Rule]]] = None
+        self._thresholds = np.empty(0)
+        self._threshold_rules: List[Rule] = []
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def add(self, rule: Rule):
+        self.rules[rule.id] = rule
+        self._by_strength = None
+
+    def remove(self, rule_id: int):
+        self.rules.pop(rule_id, None)
+        self._by_strength = None
+
+    def _build(self):
+        self._by_strength = [[] for _ in STRENGTHS]
+        for rule in self.rules.values():
+            if rule.watches_strength:
+                self._by_strength[_RANK.get(rule.min_strength, 0)].append(rule)
+        with_threshold = sorted(
+            (rule for rule in self.rules.values() if rule.r_multiple_above is not None),
+            key=lambda rule: rule.r_multiple_above
+        )
+        self._thresholds = np.array([rule.r_multiple_above for rule in with_threshold], dtype=np.float64)
+        self._threshold_rules = with_threshold
+
+    def on_strength(self, strength: str) -> List[Rule]:
+        """Rules to alert when the bucket changes to `strength`"""
+        if self._by_strength is None:
+            self._build()
+        rank = _RANK[strength]
+        return [rule for group in self._by_strength[:rank + 1] for rule in group]
+
+    def on_r_multiple(self, previous: float, current: float) -> List[Rule]:
+        """Rules whose threshold the R-multiple rose through, from below it to at or above it"""
+        if self._by_strength is None:
+            self._build()
+        if not current > previous:
+            return []
+        low = int(self._thresholds.searchsorted(previous, side="right"))
+        high = int(self._thresholds.searchsorted(current, side="right"))
+        return self._threshold_rules[low:high]
+
+class AlertEngine:
+    """Turns indicator state changes into setup alerts for stored per-user rules.
+
+    The ingestion path calls `mark` for every tick; symbols nobody has a rule
+    for are ignored there. Marked symbols are re-evaluated from their
+    incremental state every `interval` seconds, so a burst of ticks costs one
+    evaluation. Alerts are edge-triggered: a symbol's first evaluation only
+    records its bucket and R-multiple, and later evaluations alert when the
+    bucket changes or the R-multiple rises through a rule's threshold.
+    """
+
+    def __init__(self, processor: Optional[MarketProcessor] = None, interval: float = 0.1):
+        self.processor = processor or MarketProcessor()
+        self.interval = interval
+        self.rules: Dict[str, SymbolRules] = {}
+        self.last: Dict[str, Tuple[str, float]] = {}  # bucket and R-multiple per symbol
+        self._rule_symbols: Dict[int, str] = {}
+        self._dirty: Set[str] = set()
+
+        self.evaluations = 0
+        self.alerts = 0
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._rule_symbols)
+
+    def add_rule(self, rule: Rule):
+        self.remove_rule(rule.id)
+        self.rules.setdefault(rule.symbol, SymbolRules()).add(rule)
+        self._rule_symbols[rule.id] = rule.symbol
+
+    def remove_rule(self, rule_id: int):
+        symbol = self._rule_symbols.pop(rule_id, None)
+        if symbol is None:
+            return
+        rules = self.rules[symbol]
+        rules.remove(rule_id)
+        if not rules:
+            del self.rules[symbol]
+            self.last.pop(symbol, None)
+
+    def replace_rules(self, rules: Iterable[Rule]):
+        """Swap in a full rule set, keeping the recorded state of symbols that still have rules"""
+        self.rules.clear()
+        self._rule_symbols.clear()
+        for rule in rules:
+            self.add_rule(rule)
+        for symbol in [symbol for symbol in self.last if symbol not in self.rules]:
+            del self.last[symbol]
+
+    async def load(self, session: AsyncSession) -> int:
+        """Replace the rule set with the active rules in the database; returns how many"""
+        result = await session.execute(select(AlertRule).where(AlertRule.active.is_(True)))
+        rules = [Rule.from_model(row) for row in result.scalars()]
+        self.replace_rules(rules)
+        return len(rules)
+
+    def mark(self, symbol: str):
+        """Note that a symbol's state changed; O(1) and free for symbols without rules"""
+        if symbol in self.rules:
+            self._dirty.add(symbol)
+
+    def evaluate(self, state: IndicatorState) -> Optional[Dict[str, Any]]:
+        """The alert for a symbol's current state, if any of its rules fire"""
+        rules = self.rules.get(state.symbol)
+        if rules is None or state.current_price is None:
+            return None
+        self.evaluations += 1
+        setup = self.processor.identify_setup_from_state(state)
+        strength, r_multiple = setup["signal_strength"], float(setup["r_multiple"])
+        previous = self.last.get(state.symbol)
+        self.last[state.symbol] = (strength, r_multiple)
+        if previous is None:
+            return None
+
+        matches: Dict[int, Dict[str, Any]] = {}
+        if strength != previous[0]:
+            for rule in rules.on_strength(strength):
+                matches[rule.id] = {"rule_id": rule.id, "user_id": rule.user_id, "reason": "signal_strength"}
+        for rule in rules.on_r_multiple(previous[1], r_multiple):
+            matches.setdefault(rule.id, {"rule_id": rule.id, "user_id": rule.user_id, "reason": "r_multiple"})
+        fired = [
+            match for match in matches.values()
+            if rules.rules[match["rule_id"]].setup_type in (None, setup["setup_type"])
+        ]
+        if not fired:
+            return None
+
+        self.alerts += 1
+        return {
+            "symbol": state.symbol,
+            "setup": setup,
+            "previous_strength": previous[0],
+            "previous_r_multiple": previous[1],
+            "matches": fired,
+        }
+
+    def evaluate_marked(self, states: IndicatorStateRegistry) -> List[Dict[str, Any]]:
+        """Evaluate every symbol marked since the last call"""
+        dirty, self._dirty = self._dirty, set()
+        alerts = []
+        for symbol in dirty:
+            state = states.get(symbol)
+            if state is not None:
+                alert = self.evaluate(state)
+                if alert is not None:
+                    alerts.append(alert)
+        return alerts
+
+    async def run_forever(
+        self,
+        states: IndicatorStateRegistry,
+        publish: Callable[[Dict[str, Any]], Awaitable[None]],
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        reload_interval: float = 30.0
+    ):
+        """Evaluate marked symbols and publish their alerts until cancelled.
+
+        With a `session_factory`, rules are reloaded every `reload_interval`
+        seconds so changes made through other workers are picked up.
+        """
+        since_reload = 0.0
+        while True:
+            await asyncio.sleep(self.interval)
+            for alert in self.evaluate_marked(states):
+                await publish(alert)
+            since_reload += self.interval
+            if session_factory is not None and since_reload >= reload_interval:
+                since_reload = 0.0
+                try:
+                    async with session_factory() as session:
+                        await self.load(session)
+                except Exception as e:
+                    print(f"alert rule reload failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "rules": self.rule_count,
+            "symbols": len(self.rules),
+            "pending": len(self._dirty),
+            "evaluations": self.evaluations,
+            "alerts": self.alerts,
+        }
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from .pubsub import MessageBus
+
+AnalysisResult = Optional[Dict[str, Any]]
+
+class AnalysisCache:
+    """Per-symbol analysis results shared by every client of this worker.
+
+    Concurrent requests for a symbol wait on one in-flight computation instead
+    of each querying the database. A result stays valid until new market data
+    for its symbol arrives (see `attach`) or `ttl` seconds pass, whichever is
+    first; the TTL covers data written without a broadcast.
+    """
+
+    def __init__(self, compute: Callable[[str], Awaitable[AnalysisResult]], ttl: Optional[float] = 5.0):
+        self.compute = compute
+        self.ttl = ttl
+        self._versions: Dict[str, int] = {}
+        self._results: Dict[str, Tuple[int, float, AnalysisResult]] = {}
+        self._inflight: Dict[str, Tuple[int, asyncio.Task]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0  # requests that waited on an in-flight computation
+        self.invalidations = 0
+
+    def attach(self, bus: MessageBus):
+        """Invalidate a symbol whenever market data for it is published on the bus"""
+        bus.subscribe(self._on_bus_message)
+
+    def _on_bus_message(self, channel: str, payload: Dict[str, Any]):
+        if channel == "market_data":
+            self.invalidate(payload["symbol"])
+
+    def invalidate(self, symbol: str):
+        self._versions[symbol] = self._versions.get(symbol, 0) + 1
+        if self._results.pop(symbol, None) is not None:
+            self.invalidations += 1
+
+    async def get(self, symbol: str) -> AnalysisResult:
+        """Cached analysis for `symbol`, computing it at most once at a time"""
+        version = self._versions.get(symbol, 0)
+        cached = self._results.get(symbol)
+        if cached is not None and cached[0] == version and not self._expired(cached[1]):
+            self.hits += 1
+            return cached[2]
+
+        inflight = self._inflight.get(symbol)
+        if inflight is not None and inflight[0] == version:
+            self.joined += 1
+            task = inflight[1]
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._compute(symbol, version))
+            self._inflight[symbol] = (version, task)
+        # Shielded so one waiter disconnecting does not cancel the others' result
+        return await asyncio.shield(task)
+
+    async def _compute(self, symbol: str, version: int) -> AnalysisResult:
+        try:
+            result = await self.compute(symbol)
+            # Data that arrived mid-computation makes this result stale; don't keep it
+            if self._versions.get(symbol, 0) == version:
+                self._results[symbol] = (version, time.monotonic(), result)
+            return result
+        finally:
+            if self._inflight.get(symbol, (None,))[0] == version:
+                del self._inflight[symbol]
+
+    def _expired(self, computed_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - computed_at > self.ttl
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "symbols": len(self._results),
+            "hits": self.hits,
+            "misses": self.misses,
+            "joined": self.joined,
+            "invalidations": self.invalidations,
+        }
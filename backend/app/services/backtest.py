@@ -0,0 +1,241 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .market_processor import MarketProcessor, MarketSeries, ScoringInputs, SignalParams
+
+# Upper edges of the R-multiple distribution buckets; the last bucket is open-ended
+R_BUCKETS = (-1.0, 0.0, 1.0, 2.0, 3.0)
+
+OUTCOMES = ("target", "stop", "timeout", "open")
+
+@dataclass
+class TradeLog:
+    """Simulated trades for one symbol, one array element per trade"""
+    entry_index: np.ndarray
+    exit_index: np.ndarray
+    is_momentum: np.ndarray
+    direction: np.ndarray  # +1 long, -1 short
+    entry_price: np.ndarray
+    stop_loss: np.ndarray
+    target_price: np.ndarray
+    exit_price: np.ndarray
+    r_multiple: np.ndarray  # realized, in units of initial risk
+    outcome: np.ndarray  # index into OUTCOMES
+
+    def __len__(self) -> int:
+        return len(self.entry_index)
+
+    @property
+    def closed(self) -> np.ndarray:
+        return self.outcome != OUTCOMES.index("open")
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "entry_index": int(self.entry_index[i]),
+                "exit_index": int(self.exit_index[i]),
+                "setup_type": "MOMENTUM" if self.is_momentum[i] else "MEAN_REVERSION",
+                "direction": "LONG" if self.direction[i] > 0 else "SHORT",
+                "entry_price": float(self.entry_price[i]),
+                "stop_loss": float(self.stop_loss[i]),
+                "target_price": float(self.target_price[i]),
+                "exit_price": float(self.exit_price[i]),
+                "r_multiple": float(self.r_multiple[i]),
+                "outcome": OUTCOMES[self.outcome[i]],
+            }
+            for i in range(len(self))
+        ]
+
+def summarize(r_multiples: np.ndarray) -> Dict[str, Any]:
+    """Win rate, average R and R distribution of closed trades"""
+    count = len(r_multiples)
+    buckets = np.searchsorted(np.array(R_BUCKETS), r_multiples, side="left")
+    counts = np.bincount(buckets, minlength=len(R_BUCKETS) + 1)
+    labels = [f"<={R_BUCKETS[0]:g}"] + [
+        f"{low:g}..{high:g}" for low, high in zip(R_BUCKETS, R_BUCKETS[1:])
+    ] + [f">{R_BUCKETS[-1]:g}"]
+    return {
+        "trades": count,
+        "wins": int((r_multiples > 0).sum()),
+        "win_rate": float((r_multiples > 0).mean()) if count else 0.0,
+        "average_r": float(r_multiples.mean()) if count else 0.0,
+        "total_r": float(r_multiples.sum()),
+        "r_percentiles": {
+            f"p{q}": float(np.percentile(r_multiples, q)) if count else 0.0 for q in (10, 50, 90)
+        },
+        "r_distribution": dict(zip(labels, counts.tolist())),
+    }
+
+@dataclass
+class SymbolBacktest:
+    symbol: str
+    bars: int
+    trades: TradeLog
+
+    def summary(self) -> Dict[str, Any]:
+        closed = self.trades.closed
+        return {
+            "symbol": self.symbol,
+            "bars": self.bars,
+            "open_trades": int((~closed).sum()),
+            **summarize(self.trades.r_multiple[closed]),
+        }
+
+@dataclass
+class BacktestReport:
+    symbols: Dict[str, SymbolBacktest] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals over every symbol's closed trades, plus per-symbol summaries"""
+        closed = [result.trades.r_multiple[result.trades.closed] for result in self.symbols.values()]
+        combined = np.concatenate(closed) if closed else np.empty(0)
+        return {
+            "bars": sum(result.bars for result in self.symbols.values()),
+            **summarize(combined),
+            "symbols": {symbol: result.summary() for symbol, result in self.symbols.items()},
+        }
+
+def _first_exit(
+    prices: np.ndarray,
+    start: int,
+    end: int,
+    direction: float,
+    stop_loss: float,
+    target_price: float
+) -> Tuple[int, int]:
+    """First bar in [start, end) that touches the stop or target, and which one; (-1, -1) if none"""
+    low, high = (stop_loss, target_price) if direction > 0 else (target_price, stop_loss)
+    chunk = 64
+    while start < end:
+        stop = min(start + chunk, end)
+        window = prices[start:stop]
+        hit = (window <= low) | (window >= high)
+        offset = int(hit.argmax())
+        if hit[offset]:
+            price = window[offset]
+            stopped = price <= stop_loss if direction > 0 else price >= stop_loss
+            return start + offset, OUTCOMES.index("stop" if stopped else "target")
+        start = stop
+        # Most trades resolve quickly; widen the scan for the ones that don't
+        chunk = min(chunk * 4, 1 << 16)
+    return -1, -1
+
+def _simulate(
+    prices: np.ndarray,
+    candidates: np.ndarray,
+    levels: Dict[str, np.ndarray],
+    max_bars: Optional[int]
+) -> TradeLog:
+    """Trades from entry candidates (ascending bar indices) and their levels"""
+    count = len(prices)
+    stop_loss = levels["stop_loss"].tolist()
+    target_price = levels["target_price"].tolist()
+    is_momentum = levels["is_momentum"].tolist()
+    entry_prices = prices[candidates].tolist()
+
+    trades: List[tuple] = []
+    position = 0
+    while True:
+        position = int(candidates.searchsorted(position))
+        if position >= len(candidates):
+            break
+        entry = int(candidates[position])
+        entry_price = entry_prices[position]
+        stop, target = stop_loss[position], target_price[position]
+        direction = 1.0 if target > entry_price else -1.0
+        end = count if max_bars is None else min(count, entry + 1 + max_bars)
+
+        exit_index, outcome = _first_exit(prices, entry + 1, end, direction, stop, target)
+        if outcome == OUTCOMES.index("stop"):
+            exit_price = stop
+        elif outcome == OUTCOMES.index("target"):
+            exit_price = target
+        else:
+            exit_index = end - 1
+            exit_price = float(prices[exit_index])
+            outcome = OUTCOMES.index("open" if end == count else "timeout")
+
+        trades.append((
+            entry, exit_index, is_momentum[position], direction, entry_price, stop, target,
+            exit_price, direction * (exit_price - entry_price) / abs(entry_price - stop), outcome,
+        ))
+        position = exit_index + 1
+
+    columns = list(zip(*trades)) if trades else [()] * 10
+    dtypes = (np.int64, np.int64, bool, np.float64, np.float64, np.float64, np.float64,
+              np.float64, np.float64, np.int8)
+    return TradeLog(*(np.array(column, dtype=dtype) for column, dtype in zip(columns, dtypes)))
+
+def simulate_trades(
+    prices: np.ndarray,
+    levels: Dict[str, np.ndarray],
+    min_score: float = 0.8,
+    max_bars: Optional[int] = None
+) -> TradeLog:
+    """Enter on every bar whose setup scores at least `min_score` while flat.
+
+    One position is held at a time. Stops and targets fill at their level on
+    the first bar that touches them. With `max_bars`, a trade still open after
+    that many bars exits at that bar's price ("timeout"); a trade still open
+    when the data ends is marked to the last price ("open").
+    """
+    with np.errstate(invalid="ignore"):
+        candidates = np.flatnonzero((levels["score"] >= min_score) & (levels["r_multiple"] > 0))
+    return _simulate(prices, candidates, {key: value[candidates] for key, value in levels.items()}, max_bars)
+
+def simulate_inputs(
+    inputs: ScoringInputs,
+    processor: MarketProcessor,
+    min_score: Optional[float] = None,
+    max_bars: Optional[int] = None
+) -> TradeLog:
+    """Trades from precomputed indicator inputs under `processor`'s params.
+
+    Entries default to STRONG setups (the params' `strong_score`). Levels are
+    only built for bars that score high enough to enter.
+    """
+    if min_score is None:
+        min_score = processor.params.strong_score
+    momentum, mean_reversion = processor.score_inputs(inputs)
+    candidates = np.flatnonzero(np.maximum(momentum, mean_reversion) >= min_score)
+    levels = processor.setup_levels(
+        momentum[candidates], mean_reversion[candidates],
+        inputs.prices[candidates], inputs.sma_20[candidates]
+    )
+    tradable = levels["r_multiple"] > 0
+    levels = {key: value[tradable] for key, value in levels.items()}
+    return _simulate(inputs.prices, candidates[tradable], levels, max_bars)
+
+def backtest_symbol(
+    symbol: str,
+    series: MarketSeries,
+    min_score: Optional[float] = None,
+    max_bars: Optional[int] = None,
+    params: Optional[SignalParams] = None
+) -> SymbolBacktest:
+    """Score every bar of one symbol's history and simulate the resulting trades"""
+    processor = MarketProcessor(params)
+    inputs = processor.history_inputs(series)
+    return SymbolBacktest(symbol, len(inputs.prices), simulate_inputs(inputs, processor, min_score, max_bars))
+
+def _backtest_item(args: tuple) -> SymbolBacktest:
+    return backtest_symbol(*args)
+
+def run_backtest(
+    series: Dict[str, MarketSeries],
+    min_score: Optional[float] = None,
+    max_bars: Optional[int] = None,
+    workers: Optional[int] = None,
+    params: Optional[SignalParams] = None
+) -> BacktestReport:
+    """Backtest many symbols, one process per symbol up to `workers` (default: all cores)"""
+    workers = min(workers or os.cpu_count() or 1, len(series))
+    items = [(symbol, data, min_score, max_bars, params) for symbol, data in series.items()]
+    if workers <= 1:
+        results = [_backtest_item(item) for item in items]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_backtest_item, items))
+    return BacktestReport({result.symbol: result for result in results})
@@ -0,0 +1,234 @@
+"""OHLCV bars rolled up from market_data ticks.
+
+Backfill stored ticks into bars from the backend directory:
+
+    python -m app.services.bars BTCUSD ETHUSD --days 7 [--timeframes 1m,5m]
+"""
+import argparse
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.market_data import MarketData
+from ..models.ohlcv_bar import OHLCVBar
+from .history_store import HistoryStore
+from .market_processor import MarketSeries
+
+TIMEFRAMES: Dict[str, int] = {"1s": 1, "1m": 60, "5m": 300, "1h": 3600}
+
+BAR_COLUMNS = ["symbol", "timeframe", "timestamp", "open", "high", "low", "close", "volume", "tick_count"]
+
+_EPOCH = datetime(1970, 1, 1)
+
+def timeframe_seconds(timeframe: str) -> int:
+    try:
+        return TIMEFRAMES[timeframe]
+    except KeyError:
+        raise ValueError(f"Unknown timeframe: {timeframe}") from None
+
+def bar_start(timestamp: datetime, seconds: int) -> datetime:
+    """Start of the bar of `seconds` length containing `timestamp`"""
+    period = timedelta(seconds=seconds)
+    return _EPOCH + (timestamp - _EPOCH) // period * period
+
+@dataclass
+class Bar:
+    symbol: str
+    timeframe: str
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    tick_count: int = 1
+
+    def update(self, price: float, volume: float):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += volume
+        self.tick_count += 1
+
+    def as_row(self) -> tuple:
+        """Row in BAR_COLUMNS order"""
+        return (
+            self.symbol, self.timeframe, self.timestamp, self.open, self.high,
+            self.low, self.close, self.volume, self.tick_count,
+        )
+
+class BarAggregator:
+    """Rolls ticks into bars for every configured timeframe as they arrive.
+
+    A bar closes when the first tick of a later bar arrives for its symbol,
+    so quiet symbols write their last bar late rather than early. Ticks for a
+    bar that has already closed are counted in `late_ticks` and dropped; a
+    backfill recomputes those bars from the stored ticks.
+    """
+
+    def __init__(self, timeframes: Iterable[str] = TIMEFRAMES):
+        self.timeframes = [(name, timedelta(seconds=timeframe_seconds(name))) for name in timeframes]
+        self.open_bars: Dict[Tuple[str, str], Bar] = {}
+        self.late_ticks = 0
+
+    def update(self, symbol: str, price: float, volume: float, timestamp: datetime) -> List[Bar]:
+        """Add one tick; returns the bars it closed"""
+        closed = []
+        offset = timestamp - _EPOCH
+        for name, period in self.timeframes:
+            start = _EPOCH + offset // period * period
+            bar = self.open_bars.get((symbol, name))
+            if bar is not None and bar.timestamp == start:
+                bar.update(price, volume)
+                continue
+            if bar is not None and start < bar.timestamp:
+                self.late_ticks += 1
+                continue
+            if bar is not None:
+                closed.append(bar)
+            self.open_bars[(symbol, name)] = Bar(symbol, name, start, price, price, price, price, volume)
+        return closed
+
+    def current(self, symbol: str, timeframe: str) -> Optional[Bar]:
+        """The bar still being built for a symbol, if any"""
+        return self.open_bars.get((symbol, timeframe))
+
+    def drain(self) -> List[Bar]:
+        """Close every open bar (at shutdown)"""
+        bars = list(self.open_bars.values())
+        self.open_bars.clear()
+        return bars
+
+class BarColumns(NamedTuple):
+    """Bars of one symbol and timeframe as parallel columns, oldest first"""
+    timestamps: np.ndarray  # int64 nanoseconds since the Unix epoch of each bar's start
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    tick_count: np.ndarray
+
+    def series(self) -> MarketSeries:
+        return MarketSeries(self.close, self.volume)
+
+def aggregate(timestamps: np.ndarray, prices: np.ndarray, volumes: np.ndarray, seconds: int) -> BarColumns:
+    """Bars from time-ordered ticks (timestamps in epoch nanoseconds) in one vectorized pass"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    volumes = np.asarray(volumes, dtype=np.float64)
+    if not len(timestamps):
+        empty = np.empty(0)
+        return BarColumns(np.empty(0, np.int64), empty, empty, empty, empty, empty, np.empty(0, np.int64))
+
+    period = seconds * 1_000_000_000
+    buckets = timestamps // period
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(prices))
+    return BarColumns(
+        buckets[starts] * period,
+        prices[starts],
+        np.maximum.reduceat(prices, starts),
+        np.minimum.reduceat(prices, starts),
+        prices[ends - 1],
+        np.add.reduceat(volumes, starts),
+        ends - starts,
+    )
+
+def bar_rows(symbol: str, timeframe: str, bars: BarColumns) -> List[tuple]:
+    """Bar columns as rows in BAR_COLUMNS order"""
+    starts = bars.timestamps.astype("datetime64[ns]").astype("datetime64[us]").tolist()
+    return [
+        (symbol, timeframe, start, *values)
+        for start, *values in zip(
+            starts, bars.open.tolist(), bars.high.tolist(), bars.low.tolist(),
+            bars.close.tolist(), bars.volume.tolist(), bars.tick_count.tolist(),
+        )
+    ]
+
+async def write_bars(session: AsyncSession, rows: Sequence[tuple]):
+    """Insert bars, replacing any already stored for the same symbol, timeframe and start"""
+    if not rows:
+        return
+    connection = await session.connection()
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(OHLCVBar.__table__)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(OHLCVBar.__table__)
+    else:
+        raise NotImplementedError(f"Bar upserts are not supported on {dialect}")
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["symbol", "timeframe", "timestamp"],
+        set_={name: stmt.excluded[name] for name in BAR_COLUMNS[3:]},
+    )
+    await connection.execute(stmt, [dict(zip(BAR_COLUMNS, row)) for row in rows])
+
+async def _load_ticks(
+    db: AsyncSession,
+    symbol: str,
+    since: datetime,
+    store: Optional[HistoryStore]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if store is not None and store.covers(symbol, since):
+        columns = store.read(symbol, since)
+        return columns.timestamps, columns.prices, columns.volumes
+    stmt = select(
+        MarketData.timestamp, MarketData.price, func.coalesce(MarketData.volume, 0.0)
+    ).where(
+        MarketData.symbol == symbol,
+        MarketData.timestamp >= since,
+        MarketData.price.isnot(None)
+    ).order_by(MarketData.timestamp)
+    rows = (await db.execute(stmt)).all()
+    timestamps, prices, volumes = list(zip(*rows)) if rows else ((), (), ())
+    return np.array(timestamps, dtype="datetime64[ns]").view(np.int64), np.array(prices), np.array(volumes)
+
+async def backfill_bars(
+    db: AsyncSession,
+    symbol: str,
+    since: datetime,
+    timeframes: Iterable[str] = TIMEFRAMES,
+    store: Optional[HistoryStore] = None
+) -> int:
+    """Recompute a symbol's bars from its stored ticks since `since`; returns bars written.
+
+    `since` is rounded down to a bar boundary per timeframe so the first bar
+    is never built from a partial set of ticks.
+    """
+    timeframes = list(timeframes)
+    longest = max(timeframe_seconds(name) for name in timeframes)
+    since = bar_start(since, longest)
+    timestamps, prices, volumes = await _load_ticks(db, symbol, since, store)
+
+    written = 0
+    for name in timeframes:
+        rows = bar_rows(symbol, name, aggregate(timestamps, prices, volumes, timeframe_seconds(name)))
+        await write_bars(db, rows)
+        written += len(rows)
+    await db.commit()
+    return written
+
+async def _main(args: argparse.Namespace):
+    from ..models.base import async_session
+    from .history_store import history_store
+
+    since = datetime.utcnow() - timedelta(days=args.days)
+    timeframes = [name.strip() for name in args.timeframes.split(",") if name.strip()]
+    async with async_session() as db:
+        for symbol in args.symbols:
+            written = await backfill_bars(db, symbol, since, timeframes, history_store)
+            print(f"{symbol}: {written:,} bars")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--timeframes", default=",".join(TIMEFRAMES))
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,176 @@
+import asyncio
+from collections import deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Union
+from fastapi import WebSocket
+
+# Only market data may be dropped or conflated; setup alerts, errors and
+# replies to the client are always delivered
+DROPPABLE_TYPES = {"market_data"}
+
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"  # evict the oldest droppable message
+    CONFLATE = "conflate"  # keep only the latest market_data per symbol, then drop oldest
+
+class _Entry:
+    __slots__ = ("payload", "kind", "key")
+
+    def __init__(self, payload: Union[str, bytes], kind: str, key: Optional[str]):
+        self.payload = payload
+        self.kind = kind
+        self.key = key
+
+class ClientSendQueue:
+    """Bounded outbound queue for one connection, drained by its own writer task.
+
+    Producers only ever enqueue, so a slow client fills its own queue and
+    loses (or conflates) market data instead of holding up every broadcast.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_size: int = 256,
+        policy: OverflowPolicy = OverflowPolicy.CONFLATE,
+        send_timeout: float = 1.0,
+        on_failure: Optional[Callable[[WebSocket], Awaitable[None]]] = None
+    ):
+        self.websocket = websocket
+        self.max_size = max_size
+        self.policy = OverflowPolicy(policy)
+        self.send_timeout = send_timeout
+        self.on_failure = on_failure
+
+        self._entries: Deque[_Entry] = deque()
+        self._latest: Dict[str, _Entry] = {}  # pending market_data entry per symbol
+        self._evicted: Set[str] = set()  # symbols that lost a queued update
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._entries)
+
+    def start(self):
+        if self._task is None:
+            self._closed = False
+            self._task = asyncio.create_task(self._writer())
+
+    async def close(self):
+        """Stop the writer and discard anything still queued"""
+        # The writer closes its own queue when a send fails; it exits by itself then
+        self._closed = True
+        if self._task is not None and self._task is not asyncio.current_task():
+            # wait_for() in 3.11 can swallow a cancel that lands as a send completes,
+            # so the writer also stops on the flag once woken
+            self._task.cancel()
+            self._ready.set()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+        self._entries.clear()
+        self._latest.clear()
+        self._evicted.clear()
+        self._idle.set()
+
+    def will_conflate(self, key: str) -> bool:
+        """True if a message put for `key` now would replace one still queued"""
+        return self.policy == OverflowPolicy.CONFLATE and key in self._latest
+
+    def pop_evicted(self, key: str) -> bool:
+        """True (once) if an update for `key` was dropped since the last call"""
+        if key in self._evicted:
+            self._evicted.discard(key)
+            return True
+        return False
+
+    def put(self, payload: Union[str, bytes], kind: str, key: Optional[str] = None) -> bool:
+        """Enqueue a pre-serialized message without blocking; False if it was dropped"""
+        critical = kind not in DROPPABLE_TYPES
+        conflatable = not critical and key is not None
+
+        if self.policy == OverflowPolicy.CONFLATE and conflatable:
+            pending = self._latest.get(key)
+            if pending is not None:
+                # Replace in place: keeps its queue position, delivers the newest tick
+                pending.payload = payload
+                self.conflated += 1
+                return True
+
+        if len(self._entries) >= self.max_size and not critical:
+            if not self._evict_oldest():
+                self.dropped += 1
+                return False
+
+        entry = _Entry(payload, kind, key if conflatable else None)
+        self._entries.append(entry)
+        if entry.key is not None:
+            self._latest[entry.key] = entry
+
+        self.max_depth = max(self.max_depth, len(self._entries))
+        self._idle.clear()
+        self._ready.set()
+        return True
+
+    def _evict_oldest(self) -> bool:
+        """Drop the oldest non-critical message to make room"""
+        for entry in self._entries:
+            if entry.kind in DROPPABLE_TYPES:
+                self._entries.remove(entry)
+                if entry.key is not None:
+                    self._evicted.add(entry.key)
+                    if self._latest.get(entry.key) is entry:
+                        del self._latest[entry.key]
+                self.dropped += 1
+                return True
+        return False
+
+    async def _writer(self):
+        while not self._closed:
+            if not self._entries:
+                self._ready.clear()
+                self._idle.set()
+                await self._ready.wait()
+                continue
+
+            entry = self._entries.popleft()
+            if entry.key is not None and self._latest.get(entry.key) is entry:
+                del self._latest[entry.key]
+
+            try:
+                if isinstance(entry.payload, bytes):
+                    send = self.websocket.send_bytes(entry.payload)
+                else:
+                    send = self.websocket.send_text(entry.payload)
+                await asyncio.wait_for(send, self.send_timeout)
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._idle.set()
+                if self.on_failure is not None:
+                    await self.on_failure(self.websocket)
+                return
+
+    async def drain(self):
+        """Wait until everything queued so far has been handed to the socket"""
+        await self._idle.wait()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+        }
@@ -0,0 +1,526 @@
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import get_settings
+from ..models.market_data import MarketData
+from .market_processor import MarketSeries
+from .wire_format import epoch_ns
+
+# Segment file: 16-byte header, then every timestamp, then every price, then every volume
+SEGMENT_HEADER = struct.Struct("<8sQ")
+SEGMENT_MAGIC = b"TLHIST01"
+
+# Appends since the last compaction, one fixed-size record per tick
+TAIL_DTYPE = np.dtype([("timestamp", "<i8"), ("price", "<f8"), ("volume", "<f8")])
+
+class HistoryColumns(NamedTuple):
+    """One symbol's ticks as parallel columns, oldest first"""
+    timestamps: np.ndarray  # int64 nanoseconds since the Unix epoch, UTC
+    prices: np.ndarray
+    volumes: np.ndarray
+
+    def series(self) -> MarketSeries:
+        return MarketSeries(self.prices, self.volumes)
+
+    def since(self, since_ns: Optional[int]) -> "HistoryColumns":
+        if since_ns is None:
+            return self
+        start = int(self.timestamps.searchsorted(since_ns, side="left"))
+        return HistoryColumns(self.timestamps[start:], self.prices[start:], self.volumes[start:])
+
+EMPTY = HistoryColumns(np.empty(0, np.int64), np.empty(0, np.float64), np.empty(0, np.float64))
+
+def _to_ns(value: Optional[datetime]) -> Optional[int]:
+    return None if value is None else epoch_ns(value)
+
+def write_segment(path: str, columns: HistoryColumns):
+    """Write a segment next to `path` and move it into place, so readers never see half a file"""
+    os.replace(stage_segment(path, columns), path)
+
+def stage_segment(path: str, columns: HistoryColumns) -> str:
+    """Write and sync a segment to `path`.tmp; returns that path, which moving into place publishes"""
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, len(columns.timestamps)))
+        f.write(np.ascontiguousarray(columns.timestamps, dtype="<i8").tobytes())
+        f.write(np.ascontiguousarray(columns.prices, dtype="<f8").tobytes())
+        f.write(np.ascontiguousarray(columns.volumes, dtype="<f8").tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    return temporary
+
+def read_segment(path: str) -> HistoryColumns:
+    """Memory-map a segment; the columns are read-only views of the mapping, nothing is copied"""
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, rows = SEGMENT_HEADER.unpack_from(mapping)
+    if magic != SEGMENT_MAGIC or len(mapping) != SEGMENT_HEADER.size + 24 * rows:
+        raise ValueError(f"Corrupt history segment: {path}")
+    # The arrays keep the mapping alive; it is unmapped once the last view is gone
+    offset = SEGMENT_HEADER.size
+    return HistoryColumns(
+        np.frombuffer(mapping, dtype="<i8", count=rows, offset=offset),
+        np.frombuffer(mapping, dtype="<f8", count=rows, offset=offset + 8 * rows),
+        np.frombuffer(mapping, dtype="<f8", count=rows, offset=offset + 16 * rows),
+    )
+
+class _SymbolHistory:
+    """On-disk state of one symbol: segment-<gen>.col, tail-<gen>.bin and its coverage.
+
+    `lock` guards the in-memory state and is only ever held briefly;
+    `compaction_lock` serializes rewrites, which write their segment without `lock`.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.compaction_lock = threading.Lock()
+        self.generation = 0
+        self.base = EMPTY
+        self.complete_since: Optional[int] = None
+        self._tail_file = None
+        self._reset_tail()
+
+    def _reset_tail(self):
+        self.tail: List[np.ndarray] = []
+        self.tail_rows = 0
+        self.tail_bytes = 0
+        self._merged: Optional[HistoryColumns] = None
+        self._buffers: Optional[HistoryColumns] = None  # _merged's columns with spare capacity after them
+
+    def segment_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"segment-{generation:08d}.col")
+
+    def tail_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"tail-{generation:08d}.bin")
+
+    def newest_generation(self) -> int:
+        names = os.listdir(self.directory)
+        return max((int(name[8:16]) for name in names if name.startswith("segment-") and name.endswith(".col")), default=0)
+
+    def load(self, writer: bool = True):
+        """Open the newest segment and its tail.
+
+        The writer also removes leftovers of an interrupted compaction and
+        truncates a torn final tail record; a reader leaves the files alone
+        and only takes the whole records.
+        """
+        self.close()
+        self.generation = self.newest_generation()
+        self.base = EMPTY
+        self.complete_since = None
+        self._reset_tail()
+        if writer:
+            current = {f"segment-{self.generation:08d}.col", f"tail-{self.generation:08d}.bin"}
+            for name in os.listdir(self.directory):
+                if name.endswith(".tmp") or (name.startswith(("segment-", "tail-")) and name not in current):
+                    os.remove(os.path.join(self.directory, name))
+        if os.path.exists(self.segment_path(self.generation)):
+            self.base = read_segment(self.segment_path(self.generation))
+
+        tail_path = self.tail_path(self.generation)
+        if os.path.exists(tail_path):
+            size = os.path.getsize(tail_path)
+            whole = size - size % TAIL_DTYPE.itemsize
+            if writer and whole != size:
+                # A torn final record from a crash mid-append
+                os.truncate(tail_path, whole)
+            self._read_tail(whole)
+        self.load_coverage()
+
+    def load_coverage(self):
+        coverage = os.path.join(self.directory, "coverage")
+        if os.path.exists(coverage):
+            with open(coverage) as f:
+                self.complete_since = int(f.read())
+
+    def _read_tail(self, size: int):
+        """Take the tail records between what is already held and `size` bytes"""
+        count = (size - self.tail_bytes) // TAIL_DTYPE.itemsize
+        if count > 0:
+            self._add_tail(np.fromfile(
+                self.tail_path(self.generation), dtype=TAIL_DTYPE, count=count, offset=self.tail_bytes
+            ))
+
+    def refresh(self):
+        """Catch up with the writing process: a new generation is reloaded, tail growth is read on"""
+        try:
+            if self.newest_generation() != self.generation:
+                self.load(writer=False)
+                return
+            tail_path = self.tail_path(self.generation)
+            if os.path.exists(tail_path):
+                self._read_tail(os.path.getsize(tail_path))
+            if self.complete_since is None:
+                self.load_coverage()
+        except (OSError, ValueError):
+            # Files moved underneath us by a compaction in progress; start over from what is there now
+            self.load(writer=False)
+
+    def set_coverage(self, since_ns: int):
+        self.complete_since = since_ns
+        path = os.path.join(self.directory, "coverage")
+        with open(path + ".tmp", "w") as f:
+            f.write(str(since_ns))
+        os.replace(path + ".tmp", path)
+
+    def append(self, records: np.ndarray):
+        if self._tail_file is None:
+            self._tail_file = open(self.tail_path(self.generation), "ab", buffering=0)
+        self._tail_file.write(records.tobytes())
+        self._add_tail(records)
+
+    def _add_tail(self, records: np.ndarray):
+        self.tail.append(records)
+        self.tail_rows += len(records)
+        self.tail_bytes += records.nbytes
+        self._extend_merged(records)
+
+    def _extend_merged(self, records: np.ndarray):
+        """Grow the cached merged view by in-order records; out-of-order ones rebuild it on the next read"""
+        if self._merged is None:
+            return
+        timestamps = records["timestamp"]
+        rows = len(self._merged.timestamps)
+        if (rows and timestamps[0] < self._merged.timestamps[-1]) or (np.diff(timestamps) < 0).any():
+            self._merged = self._buffers = None
+            return
+        needed = rows + len(records)
+        if needed > len(self._buffers.timestamps):
+            grown = []
+            for column in self._buffers:
+                bigger = np.empty(max(needed, 2 * len(column)), dtype=column.dtype)
+                bigger[:rows] = column[:rows]
+                grown.append(bigger)
+            self._buffers = HistoryColumns(*grown)
+        # Views already handed out end at `rows`, so filling the spare capacity never changes them
+        self._buffers.timestamps[rows:needed] = timestamps
+        self._buffers.prices[rows:needed] = records["price"]
+        self._buffers.volumes[rows:needed] = records["volume"]
+        self._merged = HistoryColumns(*(column[:needed] for column in self._buffers))
+
+    def columns(self) -> HistoryColumns:
+        """Segment plus tail, time-ordered; the segment views themselves when the tail is empty.
+
+        The merged copy is kept and extended by later in-order appends, so
+        reads between appends do not concatenate the segment again.
+        """
+        if not self.tail:
+            return self.base
+        if self._merged is None:
+            tail = np.concatenate(self.tail) if len(self.tail) > 1 else self.tail[0]
+            timestamps = np.concatenate((self.base.timestamps, tail["timestamp"]))
+            prices = np.concatenate((self.base.prices, tail["price"]))
+            volumes = np.concatenate((self.base.volumes, tail["volume"]))
+            if len(timestamps) > 1 and (np.diff(timestamps) < 0).any():
+                order = np.argsort(timestamps, kind="stable")
+                timestamps, prices, volumes = timestamps[order], prices[order], volumes[order]
+            rows = len(timestamps)
+            capacity = rows + max(rows // 4, 1024)
+            buffers = []
+            for column in (timestamps, prices, volumes):
+                buffer = np.empty(capacity, dtype=column.dtype)
+                buffer[:rows] = column
+                buffers.append(buffer)
+            self._buffers = HistoryColumns(*buffers)
+            self._merged = HistoryColumns(*(column[:rows] for column in buffers))
+        return self._merged
+
+    def snapshot(self) -> Tuple[HistoryColumns, int]:
+        """The current columns and how many tail batches they include; call with `lock` held"""
+        return self.columns(), len(self.tail)
+
+    def stage(self, columns: HistoryColumns) -> int:
+        """Write the next generation's segment without publishing it; call with `compaction_lock` held"""
+        generation = self.generation + 1
+        stage_segment(self.segment_path(generation), columns)
+        return generation
+
+    def swap(self, generation: int, included_batches: int):
+        """Publish a staged segment; tail batches appended after the snapshot start the new tail.
+
+        Call with `lock` held. The carried-over tail is written before the
+        segment is moved into place, so a crash in between leaves the previous
+        generation whole and load() discards the half-made one.
+        """
+        carried = self.tail[included_batches:]
+        records = np.concatenate(carried) if carried else None
+        if records is not None:
+            with open(self.tail_path(generation), "wb") as f:
+                f.write(records.tobytes())
+        path = self.segment_path(generation)
+        os.replace(path + ".tmp", path)
+
+        previous = self.generation
+        self.generation = generation
+        self.base = read_segment(path)
+        self.close()
+        self._reset_tail()
+        if records is not None:
+            self._add_tail(records)
+        for stale in (self.segment_path(previous), self.tail_path(previous)):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    def close(self):
+        if self._tail_file is not None:
+            self._tail_file.close()
+            self._tail_file = None
+
+class HistoryStore:
+    """Local columnar tick history, one directory per symbol.
+
+    Each symbol has a compacted segment (memory-mapped, so `MarketProcessor`
+    reads its price and volume columns without copying) and an append-only
+    tail of ticks written since. `compact` folds the tail into a new segment
+    and drops ticks older than `retention_days`. A symbol's coverage is the
+    time from which it holds every tick; readers fall back to the database for
+    windows that start earlier.
+
+    Each symbol has its own lock, held only briefly by appends and reads.
+    Compaction writes and syncs the new segment without it and takes it just
+    to swap the segment in, so it can run in a worker thread while the event
+    loop keeps appending and reading.
+
+    Only one process may write a store: the writer holds an exclusive lock on
+    `writer.lock` under `root`, taken with `writer=True` or `acquire_writer`.
+    Other processes open it read-only and check for tail growth and newer
+    generations before every read, so they never serve a stale window.
+    """
+
+    def __init__(self, root: str, retention_days: Optional[int] = None, writer: bool = True):
+        self.root = root
+        self.retention_days = retention_days
+        self._symbols: Dict[str, _SymbolHistory] = {}
+        self._lock = threading.Lock()
+        self._writer_lock = None
+        os.makedirs(root, exist_ok=True)
+
+        self.rows_appended = 0
+        self.compactions = 0
+        if writer:
+            self.acquire_writer()
+
+    @property
+    def writer(self) -> bool:
+        return self._writer_lock is not None
+
+    def acquire_writer(self):
+        """Make this the process that appends to and compacts the store; fails if another one is"""
+        if self._writer_lock is not None:
+            return
+        lock = open(os.path.join(self.root, "writer.lock"), "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            raise RuntimeError(f"History store {self.root} is already written by another process")
+        with self._lock:
+            self._writer_lock = lock
+            histories = list(self._symbols.values())
+        # Reload as the writer, tidying up after any interrupted compaction
+        for history in histories:
+            with history.lock:
+                history.load()
+
+    def _require_writer(self):
+        if self._writer_lock is None:
+            raise RuntimeError(f"History store {self.root} is open read-only in this process")
+
+    def _history(self, symbol: str, create: bool = False) -> Optional[_SymbolHistory]:
+        with self._lock:
+            history = self._symbols.get(symbol)
+            if history is None:
+                directory = os.path.join(self.root, quote(symbol, safe=""))
+                if not os.path.isdir(directory):
+                    if not create:
+                        return None
+                    os.makedirs(directory)
+                history = _SymbolHistory(directory)
+                if self.writer:
+                    history.load()
+                else:
+                    history.refresh()
+                self._symbols[symbol] = history
+                return history
+        if not self.writer:
+            with history.lock:
+                history.refresh()
+        return history
+
+    def symbols(self) -> List[str]:
+        on_disk = {unquote(name) for name in os.listdir(self.root) if name != "writer.lock"}
+        return sorted(on_disk | set(self._symbols))
+
+    def append(self, symbol: str, timestamps: Sequence[int], prices: Sequence[float], volumes: Sequence[float]):
+        """Append ticks (timestamps in epoch nanoseconds) to a symbol's tail"""
+        records = np.empty(len(timestamps), dtype=TAIL_DTYPE)
+        if not len(records):
+            return
+        records["timestamp"] = timestamps
+        records["price"] = prices
+        records["volume"] = volumes
+        self._require_writer()
+        history = self._history(symbol, create=True)
+        with history.lock:
+            history.append(records)
+            if history.complete_since is None:
+                # Everything from the first tick seen onwards is held
+                history.set_coverage(int(records["timestamp"].min()))
+        self.rows_appended += len(records)
+
+    def append_rows(self, rows: Iterable[tuple]):
+        """Append ingestion rows, (symbol, price, volume, timestamp, ...) tuples, grouped by symbol"""
+        grouped: Dict[str, List[tuple]] = {}
+        for row in rows:
+            grouped.setdefault(row[0], []).append(row)
+        for symbol, symbol_rows in grouped.items():
+            _, prices, volumes, timestamps = list(zip(*symbol_rows))[:4]
+            nanoseconds = np.array(timestamps, dtype="datetime64[ns]").view(np.int64)
+            self.append(symbol, nanoseconds, prices, volumes)
+
+    def covers(self, symbol: str, since: datetime) -> bool:
+        """Whether every tick of `symbol` from `since` onwards is in the store"""
+        history = self._history(symbol)
+        return history is not None and history.complete_since is not None and history.complete_since <= epoch_ns(since)
+
+    def read(self, symbol: str, since: Optional[datetime] = None) -> HistoryColumns:
+        """A symbol's ticks from `since` on; zero-copy views of the segment when the tail is compacted"""
+        history = self._history(symbol)
+        if history is None:
+            return EMPTY
+        with history.lock:
+            columns = history.columns()
+        return columns.since(_to_ns(since))
+
+    def read_series(self, symbol: str, since: Optional[datetime] = None) -> Optional[MarketSeries]:
+        """Prices and volumes since `since`, or None when there are none (like `fetch_series`)"""
+        columns = self.read(symbol, since)
+        return columns.series() if len(columns.prices) else None
+
+    def _retained(self, history: _SymbolHistory, columns: HistoryColumns, now: Optional[datetime]) -> HistoryColumns:
+        if self.retention_days is None:
+            return columns
+        cutoff = epoch_ns((now or datetime.utcnow()) - timedelta(days=self.retention_days))
+        if history.complete_since is not None and history.complete_since < cutoff:
+            history.set_coverage(cutoff)
+        return columns.since(cutoff)
+
+    def compact(self, symbol: str, now: Optional[datetime] = None) -> int:
+        """Fold a symbol's tail into a new segment; returns the rows it now holds"""
+        self._require_writer()
+        history = self._history(symbol)
+        if history is None:
+            return 0
+        with history.compaction_lock:
+            with history.lock:
+                columns, included = history.snapshot()
+                columns = self._retained(history, columns, now)
+            # The slow part runs unlocked; ticks appended meanwhile are carried over by swap()
+            generation = history.stage(columns)
+            with history.lock:
+                history.swap(generation, included)
+        self.compactions += 1
+        return len(columns.timestamps)
+
+    def compact_all(self, min_tail_rows: int = 1, now: Optional[datetime] = None) -> int:
+        """Compact every loaded symbol with at least `min_tail_rows` appended; returns how many were"""
+        if not self.writer:
+            return 0
+        compacted = 0
+        with self._lock:
+            histories = list(self._symbols.items())
+        for symbol, history in histories:
+            if history.tail_rows >= min_tail_rows:
+                self.compact(symbol, now)
+                compacted += 1
+        return compacted
+
+    def merge(self, symbol: str, columns: HistoryColumns, complete_since: datetime):
+        """Add older ticks (e.g. from the database) and extend coverage back to `complete_since`"""
+        self._require_writer()
+        history = self._history(symbol, create=True)
+        with history.compaction_lock:
+            with history.lock:
+                current, included = history.snapshot()
+            merged = HistoryColumns(*(np.concatenate(pair) for pair in zip(columns, current)))
+            order = np.argsort(merged.timestamps, kind="stable")
+            generation = history.stage(HistoryColumns(*(column[order] for column in merged)))
+            with history.lock:
+                history.swap(generation, included)
+                since_ns = epoch_ns(complete_since)
+                if history.complete_since is None or since_ns < history.complete_since:
+                    history.set_coverage(since_ns)
+        self.compactions += 1
+
+    async def run_forever(self, interval: float = 60.0, min_tail_rows: int = 10000):
+        """Compact symbols whose tails have grown, in a worker thread, on a fixed interval"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.compact_all, min_tail_rows)
+            except Exception as e:
+                print(f"history compaction failed: {e}")
+
+    def close(self):
+        with self._lock:
+            for history in self._symbols.values():
+                with history.lock:
+                    history.close()
+            if self._writer_lock is not None:
+                self._writer_lock.close()
+                self._writer_lock = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "symbols": len(self._symbols),
+            "rows_appended": self.rows_appended,
+            "tail_rows": sum(history.tail_rows for history in self._symbols.values()),
+            "compactions": self.compactions,
+        }
+
+async def backfill(store: HistoryStore, db: AsyncSession, symbols: Iterable[str], since: datetime) -> int:
+    """Copy ticks the store is missing since `since` from market_data; returns rows copied"""
+    copied = 0
+    for symbol in symbols:
+        if store.covers(symbol, since):
+            continue
+        stmt = select(
+            MarketData.timestamp, MarketData.price, func.coalesce(MarketData.volume, 0.0)
+        ).where(MarketData.symbol == symbol, MarketData.timestamp >= since, MarketData.price.isnot(None))
+        held = store.read(symbol)
+        if len(held.timestamps):
+            # Only the stretch before what the store already holds
+            first = datetime(1970, 1, 1) + timedelta(microseconds=int(held.timestamps[0]) // 1000)
+            stmt = stmt.where(MarketData.timestamp < first)
+        rows = (await db.execute(stmt.order_by(MarketData.timestamp))).all()
+        timestamps, prices, volumes = list(zip(*rows)) if rows else ((), (), ())
+        store.merge(symbol, HistoryColumns(
+            np.array(timestamps, dtype="datetime64[ns]").view(np.int64),
+            np.array(prices, dtype=np.float64),
+            np.array(volumes, dtype=np.float64),
+        ), since)
+        copied += len(rows)
+    return copied
+
+def open_history_store() -> Optional[HistoryStore]:
+    settings = get_settings()
+    if not settings.HISTORY_STORE_PATH:
+        return None
+    # Read-only until the worker running the feed calls acquire_writer()
+    return HistoryStore(
+        settings.HISTORY_STORE_PATH, retention_days=settings.MARKET_DATA_RETENTION_DAYS, writer=False
+    )
+
+history_store = open_history_store()
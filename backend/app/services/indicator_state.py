@@ -0,0 +1,210 @@
+import math
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+class RollingMean:
+    """Fixed-period simple moving average over a ring buffer with O(1) updates"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.buffer: List[float] = [0.0] * period
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def update(self, value: float):
+        if self.count >= self.period:
+            self.total -= self.buffer[self.index]
+        self.buffer[self.index] = value
+        self.total += value
+        self.index = (self.index + 1) % self.period
+        self.count += 1
+
+        # Re-sum once per lap so floating point drift cannot accumulate
+        if self.index == 0:
+            self.total = math.fsum(self.buffer)
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.count < self.period:
+            return None
+        return self.total / self.period
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {
+            "period": self.period,
+            "buffer": list(self.buffer),
+            "index": self.index,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> "RollingMean":
+        rolling = cls(snapshot["period"])
+        rolling.buffer = [float(x) for x in snapshot["buffer"]]
+        rolling.index = snapshot["index"]
+        rolling.count = snapshot["count"]
+        rolling.total = math.fsum(rolling.buffer)
+        return rolling
+
+class WilderRSI:
+    """Relative Strength Index with Wilder smoothing, updated one price at a time"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.last_price: Optional[float] = None
+        self.deltas = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def update(self, price: float):
+        if self.last_price is not None:
+            delta = price - self.last_price
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            self.deltas += 1
+
+            if self.deltas <= self.period:
+                # Seed phase: accumulate a simple mean of the first `period` deltas
+                self.avg_gain += (gain - self.avg_gain) / self.deltas
+                self.avg_loss += (loss - self.avg_loss) / self.deltas
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        self.last_price = price
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.deltas < self.period:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {
+            "period": self.period,
+            "last_price": self.last_price,
+            "deltas": self.deltas,
+            "avg_gain": self.avg_gain,
+            "avg_loss": self.avg_loss,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> "WilderRSI":
+        rsi = cls(snapshot["period"])
+        rsi.last_price = snapshot["last_price"]
+        rsi.deltas = snapshot["deltas"]
+        rsi.avg_gain = snapshot["avg_gain"]
+        rsi.avg_loss = snapshot["avg_loss"]
+        return rsi
+
+class IndicatorState:
+    """Incremental indicator state for one symbol, fed one tick at a time"""
+
+    RECENT_PRICES = 6
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.sma_20 = RollingMean(20)
+        self.sma_50 = RollingMean(50)
+        self.rsi = WilderRSI(14)
+        self.prev_sma_20: Optional[float] = None
+        self.prev_sma_50: Optional[float] = None
+        self.recent_prices: deque = deque(maxlen=self.RECENT_PRICES)
+
+        self.count = 0
+        self.last_volume = 0.0
+        self.volume_mean = 0.0
+        # Welford running mean / sum of squared deviations of price
+        self.price_mean = 0.0
+        self.price_m2 = 0.0
+
+    def update(self, price: float, volume: float):
+        """Fold one tick into every indicator"""
+        price = float(price)
+        volume = float(volume)
+
+        self.prev_sma_20 = self.sma_20.value
+        self.prev_sma_50 = self.sma_50.value
+        self.sma_20.update(price)
+        self.sma_50.update(price)
+        self.rsi.update(price)
+        self.recent_prices.append(price)
+
+        self.count += 1
+        self.last_volume = volume
+        self.volume_mean += (volume - self.volume_mean) / self.count
+
+        delta = price - self.price_mean
+        self.price_mean += delta / self.count
+        self.price_m2 += delta * (price - self.price_mean)
+
+    @property
+    def current_price(self) -> Optional[float]:
+        return self.recent_prices[-1] if self.recent_prices else None
+
+    @property
+    def price_std(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return math.sqrt(self.price_m2 / self.count)
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """Serialize the state to a JSON-compatible dict"""
+        return {
+            "symbol": self.symbol,
+            "sma_20": self.sma_20.to_snapshot(),
+            "sma_50": self.sma_50.to_snapshot(),
+            "rsi": self.rsi.to_snapshot(),
+            "prev_sma_20": self.prev_sma_20,
+            "prev_sma_50": self.prev_sma_50,
+            "recent_prices": list(self.recent_prices),
+            "count": self.count,
+            "last_volume": self.last_volume,
+            "volume_mean": self.volume_mean,
+            "price_mean": self.price_mean,
+            "price_m2": self.price_m2,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> "IndicatorState":
+        """Rebuild a state from `to_snapshot` output"""
+        state = cls(snapshot["symbol"])
+        state.sma_20 = RollingMean.from_snapshot(snapshot["sma_20"])
+        state.sma_50 = RollingMean.from_snapshot(snapshot["sma_50"])
+        state.rsi = WilderRSI.from_snapshot(snapshot["rsi"])
+        state.prev_sma_20 = snapshot["prev_sma_20"]
+        state.prev_sma_50 = snapshot["prev_sma_50"]
+        state.recent_prices.extend(snapshot["recent_prices"])
+        state.count = snapshot["count"]
+        state.last_volume = snapshot["last_volume"]
+        state.volume_mean = snapshot["volume_mean"]
+        state.price_mean = snapshot["price_mean"]
+        state.price_m2 = snapshot["price_m2"]
+        return state
+
+class IndicatorStateRegistry:
+    """Per-symbol incremental indicator states"""
+
+    def __init__(self):
+        self.states: Dict[str, IndicatorState] = {}
+
+    def get(self, symbol: str) -> Optional[IndicatorState]:
+        return self.states.get(symbol)
+
+    def update(self, symbol: str, price: float, volume: float) -> IndicatorState:
+        """Apply a tick to a symbol's state, creating it on first sight"""
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = IndicatorState(symbol)
+        state.update(price, volume)
+        return state
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {symbol: state.to_snapshot() for symbol, state in self.states.items()}
+
+    def restore(self, snapshot: Dict[str, Dict[str, Any]]):
+        self.states = {
+            symbol: IndicatorState.from_snapshot(data) for symbol, data in snapshot.items()
+        }
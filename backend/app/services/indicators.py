@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+from typing import Sequence, Union
+
+ArrayLike = Union[np.ndarray, Sequence[float]]
+
+
+def as_array(values: ArrayLike) -> np.ndarray:
+    """Return values as a contiguous float64 array without copying when possible"""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def sma(prices: ArrayLike, period: int) -> np.ndarray:
+    """Simple Moving Average for every full window, computed from a running sum"""
+    prices = as_array(prices)
+    if period <= 0 or len(prices) < period:
+        return np.empty(0, dtype=np.float64)
+
+    # Anchor on the first price so the running sum stays small on long series
+    anchor = prices[0]
+    csum = np.empty(len(prices) + 1, dtype=np.float64)
+    csum[0] = 0.0
+    np.cumsum(prices - anchor, out=csum[1:])
+    return (csum[period:] - csum[:-period]) / period + anchor
+
+
+def wilder_smooth(values: ArrayLike, period: int) -> np.ndarray:
+    """Wilder smoothing seeded with the mean of the first `period` values"""
+    values = as_array(values)
+    if period <= 0 or len(values) < period:
+        return np.empty(0, dtype=np.float64)
+
+    series = np.empty(len(values) - period + 1, dtype=np.float64)
+    series[0] = values[:period].mean()
+    series[1:] = values[period:]
+    # avg_t = (avg_{t-1} * (period - 1) + x_t) / period is an EMA with alpha = 1 / period
+    return pd.Series(series).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+
+
+def rsi(prices: ArrayLike, period: int = 14) -> np.ndarray:
+    """Relative Strength Index using Wilder smoothing"""
+    prices = as_array(prices)
+    if len(prices) < period + 1:
+        return np.empty(0, dtype=np.float64)
+
+    deltas = np.diff(prices)
+    avg_gain = wilder_smooth(np.maximum(deltas, 0.0), period)
+    avg_loss = wilder_smooth(np.maximum(-deltas, 0.0), period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    values[avg_loss == 0] = 100.0
+    return values
+
+
+def rolling_std(values: ArrayLike, period: int) -> np.ndarray:
+    """Population standard deviation for every full window"""
+    values = as_array(values)
+    if period <= 0 or len(values) < period:
+        return np.empty(0, dtype=np.float64)
+
+    centered = values - values.mean()
+    csum = np.concatenate(([0.0], np.cumsum(centered)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+    window_sum = csum[period:] - csum[:-period]
+    window_sum_sq = csum_sq[period:] - csum_sq[:-period]
+    variance = window_sum_sq / period - (window_sum / period) ** 2
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def sma_matrix(matrix: np.ndarray, period: int) -> np.ndarray:
+    """Row-wise SMA over a left NaN-padded (symbols x time) matrix; NaN where a window is incomplete"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    rows, width = matrix.shape
+    if period <= 0 or width < period:
+        return np.empty((rows, 0), dtype=np.float64)
+
+    valid = ~np.isnan(matrix)
+    anchor = matrix[:, -1:]
+    filled = np.where(valid, matrix - anchor, 0.0)
+
+    csum = np.zeros((rows, width + 1), dtype=np.float64)
+    np.cumsum(filled, axis=1, out=csum[:, 1:])
+    counts = np.zeros((rows, width + 1), dtype=np.int64)
+    np.cumsum(valid, axis=1, out=counts[:, 1:])
+
+    sums = csum[:, period:] - csum[:, :-period]
+    full = (counts[:, period:] - counts[:, :-period]) == period
+    return np.where(full, sums / period + anchor, np.nan)
+
+
+def wilder_smooth_matrix(matrix: np.ndarray, period: int) -> np.ndarray:
+    """Row-wise Wilder smoothing over a left NaN-padded matrix, aligned like `wilder_smooth`"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    rows, width = matrix.shape
+    if period <= 0 or width < period:
+        return np.empty((rows, 0), dtype=np.float64)
+
+    out_width = width - period + 1
+    first_valid = np.argmax(~np.isnan(matrix), axis=1)
+    first_valid[np.isnan(matrix).all(axis=1)] = width
+    has_seed = first_valid <= width - period
+
+    csum = np.zeros((rows, width + 1), dtype=np.float64)
+    np.cumsum(np.nan_to_num(matrix), axis=1, out=csum[:, 1:])
+    row_index = np.arange(rows)
+    seed_start = np.minimum(first_valid, width)
+    seed_end = np.minimum(first_valid + period, width)
+    seeds = (csum[row_index, seed_end] - csum[row_index, seed_start]) / period
+
+    # Column k of the output smooths through matrix column k + period - 1
+    series = matrix[:, period - 1:].copy()
+    columns = np.arange(out_width)
+    series[columns[None, :] < first_valid[:, None]] = np.nan
+    seeded_rows = np.flatnonzero(has_seed)
+    series[seeded_rows, first_valid[seeded_rows]] = seeds[seeded_rows]
+    series[~has_seed] = np.nan
+
+    smoothed = pd.DataFrame(series.T).ewm(alpha=1.0 / period, adjust=False).mean()
+    return smoothed.to_numpy().T
+
+
+def rsi_matrix(matrix: np.ndarray, period: int = 14) -> np.ndarray:
+    """Row-wise RSI over a left NaN-padded matrix, aligned to the last column"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    rows, width = matrix.shape
+    if width < period + 1:
+        return np.empty((rows, 0), dtype=np.float64)
+
+    deltas = np.diff(matrix, axis=1)
+    avg_gain = wilder_smooth_matrix(np.maximum(deltas, 0.0), period)
+    avg_loss = wilder_smooth_matrix(np.maximum(-deltas, 0.0), period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    values[avg_loss == 0] = 100.0
+    return values
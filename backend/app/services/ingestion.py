@@ -0,0 +1,282 @@
+import asyncio
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.base import async_session
+from ..models.market_data import MarketData
+from .alert_engine import AlertEngine
+from .bars import BarAggregator, write_bars
+from .history_store import HistoryStore
+from .indicator_state import IndicatorState, IndicatorStateRegistry
+from .market_processor import MarketProcessor
+
+MARKET_DATA_COLUMNS = [
+    "symbol", "price", "volume", "timestamp",
+    "sma_20", "sma_50", "rsi", "momentum_score", "mean_reversion_score",
+]
+
+def parse_timestamp(value: Union[datetime, float, int, str, None]) -> datetime:
+    """Normalize feed timestamps (datetime, epoch seconds or ISO-8601) to naive UTC"""
+    if value is None:
+        return datetime.utcnow()
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.utcfromtimestamp(value)
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+
+def _nan(value: Optional[float]) -> float:
+    return np.nan if value is None else value
+
+@dataclass
+class IngestionStats:
+    rows_written: int = 0
+    flushes: int = 0
+    flush_seconds: float = 0.0
+    failed_flushes: int = 0
+    backpressure_waits: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.rows_written / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def write_rows_per_second(self) -> float:
+        """Throughput of the database writes alone"""
+        return self.rows_written / self.flush_seconds if self.flush_seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "backpressure_waits": self.backpressure_waits,
+            "rows_per_second": self.rows_per_second,
+            "write_rows_per_second": self.write_rows_per_second,
+        }
+
+class MarketDataIngestor:
+    """Buffers incoming ticks and writes them to market_data in multi-row batches.
+
+    Indicator columns are filled from per-symbol incremental state as each tick
+    is buffered, so rows are inserted complete and never need a follow-up UPDATE.
+    With a `history_store`, each written batch is also appended to it. With a
+    `bar_aggregator`, ticks are rolled into OHLCV bars as they are buffered and
+    closed bars are written in the same transaction as the ticks. With an
+    `alert_engine`, every tick marks its symbol for alert evaluation.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session,
+        states: Optional[IndicatorStateRegistry] = None,
+        processor: Optional[MarketProcessor] = None,
+        batch_size: int = 5000,
+        flush_interval: float = 0.25,
+        max_pending: int = 50000,
+        history_store: Optional[HistoryStore] = None,
+        bar_aggregator: Optional[BarAggregator] = None,
+        alert_engine: Optional[AlertEngine] = None
+    ):
+        self.session_factory = session_factory
+        self.states = states or IndicatorStateRegistry()
+        self.processor = processor or MarketProcessor()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.history_store = history_store
+        self.bar_aggregator = bar_aggregator
+        self.alert_engine = alert_engine
+        self.stats = IngestionStats()
+
+        self._buffer: List[tuple] = []
+        self._features: List[tuple] = []
+        self._bars: List[tuple] = []
+        self._flush_requested = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def start(self):
+        """Start the background flusher"""
+        if self._task is None:
+            self._running = True
+            self.stats = IngestionStats()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write out anything still buffered"""
+        self._running = False
+        if self._task is not None:
+            self._flush_requested.set()
+            await self._task
+            self._task = None
+        if self.bar_aggregator is not None:
+            self._bars.extend(bar.as_row() for bar in self.bar_aggregator.drain())
+        await self.flush()
+
+    async def _run(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # The batch is back in the buffer; pause so a down database is not retried in a tight loop
+                self.stats.failed_flushes += 1
+                print(f"market data flush failed: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    async def ingest(
+        self,
+        symbol: str,
+        price: float,
+        volume: float = 0.0,
+        timestamp: Union[datetime, float, int, str, None] = None
+    ) -> IndicatorState:
+        """Buffer one tick, waiting while the buffer is full"""
+        while len(self._buffer) >= self.max_pending:
+            self.stats.backpressure_waits += 1
+            self._drained.clear()
+            self._flush_requested.set()
+            await self._drained.wait()
+
+        state = self.states.update(symbol, price, volume)
+        sma_20 = state.sma_20.value
+        sma_50 = state.sma_50.value
+        rsi = state.rsi.value
+        timestamp = parse_timestamp(timestamp)
+        # Row in MARKET_DATA_COLUMNS order; scores are appended at flush time
+        self._buffer.append((
+            symbol, float(price), float(volume), timestamp, sma_20, sma_50, rsi,
+        ))
+        if self.bar_aggregator is not None:
+            for bar in self.bar_aggregator.update(symbol, float(price), float(volume), timestamp):
+                self._bars.append(bar.as_row())
+        if self.alert_engine is not None:
+            self.alert_engine.mark(symbol)
+        recent = tuple(state.recent_prices)
+        self._features.append((
+            _nan(sma_20), _nan(sma_50), _nan(state.prev_sma_20), _nan(state.prev_sma_50),
+            _nan(rsi), state.last_volume, state.volume_mean,
+        ) + (np.nan,) * (IndicatorState.RECENT_PRICES - len(recent)) + recent)
+
+        if len(self._buffer) >= self.batch_size:
+            self._flush_requested.set()
+            # Give the flusher a chance to pick up the batch even if the producer never blocks
+            await asyncio.sleep(0)
+        return state
+
+    async def ingest_market_data(self, data: Dict[str, Any]) -> IndicatorState:
+        """Buffer a tick in the `TradingViewService.get_market_data` dict format"""
+        return await self.ingest(
+            data["symbol"], data["price"], data.get("volume") or 0.0, data.get("timestamp")
+        )
+
+    async def ingest_many(self, ticks: Iterable[Dict[str, Any]]):
+        for tick in ticks:
+            await self.ingest_market_data(tick)
+
+    def _score_buffered(self, features: List[tuple]) -> tuple:
+        """Vectorized signal scores for every buffered row"""
+        columns = np.array(features, dtype=np.float64)
+        return self.processor.score_signals(
+            columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3], columns[:, 4],
+            columns[:, 7:], columns[:, 5], columns[:, 6]
+        )
+
+    async def flush(self) -> int:
+        """Write all buffered rows in one multi-row insert; on failure they stay buffered"""
+        async with self._flush_lock:
+            try:
+                if not self._buffer and not self._bars:
+                    return 0
+                rows, self._buffer = self._buffer, []
+                features, self._features = self._features, []
+                bars, self._bars = self._bars, []
+
+                started = time.perf_counter()
+                try:
+                    if rows:
+                        momentum_scores, mean_reversion_scores = self._score_buffered(features)
+                        scored = [
+                            row + scores
+                            for row, scores in zip(rows, zip(momentum_scores.tolist(), mean_reversion_scores.tolist()))
+                        ]
+                    else:
+                        scored = []
+                    async with self.session_factory() as session:
+                        if scored:
+                            await self._write(session, scored)
+                        await write_bars(session, bars)
+                        await session.commit()
+                except Exception:
+                    self._buffer = rows + self._buffer
+                    self._features = features + self._features
+                    self._bars = bars + self._bars
+                    raise
+                if self.history_store is not None:
+                    self.history_store.append_rows(scored)
+
+                self.stats.rows_written += len(scored)
+                self.stats.flushes += 1
+                self.stats.flush_seconds += time.perf_counter() - started
+                return len(scored)
+            finally:
+                # Wake producers waiting on backpressure even when the write failed
+                self._drained.set()
+
+    async def _write(self, session: AsyncSession, rows: List[tuple]):
+        """Insert rows with COPY on PostgreSQL/asyncpg, otherwise a driver-level executemany"""
+        connection = await session.connection()
+        dialect = connection.dialect
+        if dialect.name == "postgresql" and dialect.driver == "asyncpg":
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                MarketData.__tablename__, records=rows, columns=MARKET_DATA_COLUMNS
+            )
+            return
+
+        # Compile the INSERT once for this dialect and hand the driver plain
+        # parameter tuples, skipping per-row ORM/Core parameter handling
+        compiled = insert(MarketData.__table__).compile(
+            dialect=dialect, column_keys=MARKET_DATA_COLUMNS
+        )
+        processors = [
+            MarketData.__table__.c[name].type.bind_processor(dialect)
+            for name in MARKET_DATA_COLUMNS
+        ]
+        converters = [(i, p) for i, p in enumerate(processors) if p is not None]
+        if converters:
+            rows = [_convert(row, converters) for row in rows]
+
+        if compiled.positional:
+            order = [MARKET_DATA_COLUMNS.index(name) for name in compiled.positiontup]
+            if order == list(range(len(MARKET_DATA_COLUMNS))):
+                params = rows
+            else:
+                params = [tuple(row[i] for i in order) for row in rows]
+        else:
+            params = [dict(zip(MARKET_DATA_COLUMNS, row)) for row in rows]
+        await connection.exec_driver_sql(str(compiled), params)
+
+def _convert(row: tuple, converters: List[tuple]) -> tuple:
+    for index, processor in converters:
+        if row[index] is not None:
+            row = row[:index] + (processor(row[index]),) + row[index + 1:]
+    return row
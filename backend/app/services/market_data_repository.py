@@ -0,0 +1,93 @@
+import numpy as np
+from itertools import chain
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.market_data import MarketData
+from ..models.ohlcv_bar import OHLCVBar
+from .history_store import HistoryStore
+from .market_processor import MarketSeries, PriceMatrix
+
+async def fetch_series(db: AsyncSession, symbol: str, since: datetime) -> Optional[MarketSeries]:
+    """Load a symbol's prices and volumes since `since` as NumPy arrays, oldest first.
+
+    Only the two needed columns are selected and rows are never turned into
+    ORM entities, so nothing enters the session identity map.
+    """
+    stmt = select(MarketData.price, func.coalesce(MarketData.volume, 0.0)).where(
+        MarketData.symbol == symbol,
+        MarketData.timestamp >= since,
+        MarketData.price.isnot(None)
+    ).order_by(MarketData.timestamp)
+
+    result = await db.execute(stmt)
+    rows = result.all()
+    if not rows:
+        return None
+
+    # Flatten the row tuples straight into one buffer; np.array on Row objects is far slower
+    columns = np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=2 * len(rows))
+    columns = columns.reshape(-1, 2)
+    return MarketSeries(np.ascontiguousarray(columns[:, 0]), np.ascontiguousarray(columns[:, 1]))
+
+async def fetch_bars(db: AsyncSession, symbol: str, timeframe: str, since: datetime) -> Optional[MarketSeries]:
+    """Bar closes and volumes of one timeframe since `since`, oldest first, like `fetch_series`"""
+    stmt = select(OHLCVBar.close, OHLCVBar.volume).where(
+        OHLCVBar.symbol == symbol,
+        OHLCVBar.timeframe == timeframe,
+        OHLCVBar.timestamp >= since
+    ).order_by(OHLCVBar.timestamp)
+
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        return None
+    columns = np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=2 * len(rows)).reshape(-1, 2)
+    return MarketSeries(np.ascontiguousarray(columns[:, 0]), np.ascontiguousarray(columns[:, 1]))
+
+async def load_series(
+    db: AsyncSession,
+    symbol: str,
+    since: datetime,
+    store: Optional[HistoryStore] = None,
+    timeframe: Optional[str] = None
+) -> Optional[MarketSeries]:
+    """Ticks (or `timeframe` bars) since `since`; ticks come from the history store when it holds the whole window"""
+    if timeframe is not None:
+        return await fetch_bars(db, symbol, timeframe, since)
+    if store is not None and store.covers(symbol, since):
+        return store.read_series(symbol, since)
+    return await fetch_series(db, symbol, since)
+
+async def fetch_price_matrix(
+    db: AsyncSession,
+    symbols: List[str],
+    since: datetime,
+    timeframe: Optional[str] = None
+) -> PriceMatrix:
+    """Load several symbols in one query and pack them into an aligned price matrix"""
+    if timeframe is not None:
+        return await _fetch_bar_matrix(db, symbols, since, timeframe)
+    stmt = select(
+        MarketData.symbol, MarketData.price, func.coalesce(MarketData.volume, 0.0)
+    ).where(
+        MarketData.symbol.in_(symbols),
+        MarketData.timestamp >= since,
+        MarketData.price.isnot(None)
+    ).order_by(MarketData.symbol, MarketData.timestamp)
+
+    result = await db.execute(stmt)
+    rows = result.all()
+    columns = list(zip(*rows)) if rows else [(), (), ()]
+    return PriceMatrix.from_columns(*columns)
+
+async def _fetch_bar_matrix(db: AsyncSession, symbols: List[str], since: datetime, timeframe: str) -> PriceMatrix:
+    stmt = select(OHLCVBar.symbol, OHLCVBar.close, OHLCVBar.volume).where(
+        OHLCVBar.symbol.in_(symbols),
+        OHLCVBar.timeframe == timeframe,
+        OHLCVBar.timestamp >= since
+    ).order_by(OHLCVBar.symbol, OHLCVBar.timestamp)
+
+    rows = (await db.execute(stmt)).all()
+    columns = list(zip(*rows)) if rows else [(), (), ()]
+    return PriceMatrix.from_columns(*columns)
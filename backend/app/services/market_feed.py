@@ -0,0 +1,306 @@
+import asyncio
+import json
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+import aiohttp
+from ..models.market_data import MarketData
+from .ingestion import MarketDataIngestor, parse_timestamp
+from .tradingview_service import TradingViewError, TradingViewService
+from .websocket_manager import WebSocketManager
+
+class SequenceTracker:
+    """Puts sequenced feed ticks back in order.
+
+    Duplicates (seq already released) are dropped. A tick that arrives ahead
+    of a missing seq is held until the gap is filled by a replay or given up
+    with `skip_gap`, so downstream indicator state always sees ticks in order.
+    """
+
+    def __init__(self, last_seq: Optional[int] = None):
+        self.last_seq = last_seq
+        self.gap_since: Optional[float] = None
+        self._held: Dict[int, Dict[str, Any]] = {}
+
+        self.duplicates = 0
+        self.lost = 0
+
+    def push(self, seq: int, tick: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Accept one tick; returns the ticks now ready, in sequence order"""
+        if self.last_seq is None:
+            self.last_seq = seq - 1
+        if seq <= self.last_seq or seq in self._held:
+            self.duplicates += 1
+            return []
+        self._held[seq] = tick
+        return self._release()
+
+    def _release(self) -> List[Dict[str, Any]]:
+        ready = []
+        while self.last_seq + 1 in self._held:
+            self.last_seq += 1
+            ready.append(self._held.pop(self.last_seq))
+        if ready or not self._held:
+            self.gap_since = None
+        if self._held and self.gap_since is None:
+            # A new (or next) gap starts its timeout now
+            self.gap_since = time.monotonic()
+        return ready
+
+    def missing(self) -> Optional[tuple]:
+        """First missing (from, to) seq range, if ticks are being held"""
+        if not self._held:
+            return None
+        return self.last_seq + 1, min(self._held) - 1
+
+    def skip_gap(self, through: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Give up on seqs up to `through` (default: the current gap) and release what follows"""
+        gap = self.missing()
+        if through is None:
+            if gap is None:
+                return []
+            through = gap[1]
+        if self.last_seq is None or through <= self.last_seq:
+            return []
+        self.lost += sum(1 for seq in range(self.last_seq + 1, through + 1) if seq not in self._held)
+        for seq in [s for s in self._held if s <= through]:
+            del self._held[seq]
+        self.last_seq = through
+        self.gap_since = None
+        return self._release()
+
+class FeedDisconnected(Exception):
+    """The feed connection closed or errored; the consumer will reconnect"""
+
+def _newer(snapshot: Dict[str, Any], tick: Dict[str, Any]) -> bool:
+    if snapshot.get("timestamp") is None:
+        return True  # stamped when ingested, after the tick
+    try:
+        return parse_timestamp(snapshot["timestamp"]) > parse_timestamp(tick.get("timestamp"))
+    except (TypeError, ValueError, OverflowError):
+        return False
+
+class MarketFeedClient:
+    """Long-lived consumer of the streaming market data feed.
+
+    The feed numbers ticks per symbol. `ticks()` is an async generator that
+    never ends on its own: it reconnects with jittered backoff, resumes each
+    symbol after the last seq it delivered, asks the feed to replay seq ranges
+    missing from the live stream, and gives up on a range after `gap_timeout`
+    seconds or when the feed reports it gone. When ticks are lost and a REST
+    `snapshots` service is given, that symbol's latest snapshot is emitted
+    after the ticks released past the gap, provided it has a price and is
+    newer than them. Malformed messages are logged, counted and dropped.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        symbols: List[str],
+        snapshots: Optional[TradingViewService] = None,
+        gap_timeout: float = 2.0,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 10.0,
+        heartbeat: float = 15.0
+    ):
+        self.url = url
+        self.snapshots = snapshots
+        self.gap_timeout = gap_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.heartbeat = heartbeat
+        self.trackers = {symbol: SequenceTracker() for symbol in symbols}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._gaps: Set[str] = set()  # symbols holding ticks behind a missing seq
+        self._requested: Dict[str, tuple] = {}  # gap last asked for, per symbol
+
+        self.connects = 0
+        self.ticks_received = 0
+        self.replay_requests = 0
+        self.snapshots_sent = 0
+        self.malformed = 0
+        self.restarts = 0
+
+    async def ticks(self) -> AsyncIterator[Dict[str, Any]]:
+        """Ticks in seq order across reconnects, in the `get_market_data` dict format"""
+        failures = 0
+        self._session = aiohttp.ClientSession()
+        try:
+            while True:
+                try:
+                    async for tick in self._connection_ticks():
+                        failures = 0
+                        yield tick
+                except (aiohttp.ClientError, asyncio.TimeoutError, FeedDisconnected) as e:
+                    print(f"market feed disconnected: {e!r}")
+                failures += 1
+                ceiling = min(self.max_reconnect_delay, self.reconnect_delay * 2 ** (failures - 1))
+                await asyncio.sleep(random.uniform(ceiling / 2, ceiling))
+        finally:
+            await self.close()
+
+    async def _connection_ticks(self) -> AsyncIterator[Dict[str, Any]]:
+        async with self._session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+            self._ws = ws
+            self.connects += 1
+            self._requested.clear()
+            await ws.send_json({
+                "type": "subscribe",
+                "symbols": list(self.trackers),
+                "resume_from": {
+                    symbol: tracker.last_seq
+                    for symbol, tracker in self.trackers.items()
+                    if tracker.last_seq is not None
+                },
+            })
+            while True:
+                try:
+                    msg = await ws.receive(timeout=self._receive_timeout())
+                except asyncio.TimeoutError:
+                    msg = None
+
+                if msg is not None:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        raise FeedDisconnected(f"feed closed ({msg.type.name})")
+                    try:
+                        ready = await self._handle(json.loads(msg.data))
+                    except (ValueError, KeyError, TypeError, AttributeError) as e:
+                        self.malformed += 1
+                        print(f"market feed dropped malformed message: {e!r}")
+                        ready = []
+                    for tick in ready:
+                        yield tick
+
+                for symbol in list(self._gaps):
+                    tracker = self.trackers[symbol]
+                    if tracker.gap_since is None:
+                        self._gaps.discard(symbol)
+                    elif time.monotonic() - tracker.gap_since >= self.gap_timeout:
+                        for tick in await self._lost(symbol, tracker.skip_gap()):
+                            yield tick
+                    elif not self._already_requested(symbol, tracker.missing()):
+                        await self._request_replay(symbol, tracker.missing())
+
+    def _receive_timeout(self) -> Optional[float]:
+        gaps = [self.trackers[symbol].gap_since for symbol in self._gaps]
+        gaps = [since for since in gaps if since is not None]
+        if not gaps:
+            return None
+        return max(self.gap_timeout - (time.monotonic() - min(gaps)), 0.0)
+
+    def _already_requested(self, symbol: str, gap: tuple) -> bool:
+        """Whether `gap` lies inside the range last requested (a replay still arriving)"""
+        requested = self._requested.get(symbol)
+        return requested is not None and requested[0] <= gap[0] and gap[1] <= requested[1]
+
+    async def _request_replay(self, symbol: str, gap: tuple):
+        self._requested[symbol] = gap
+        self.replay_requests += 1
+        await self._ws.send_json({"type": "replay", "symbol": symbol, "from": gap[0], "to": gap[1]})
+
+    async def _handle(self, message: Dict[str, Any]) -> List[Dict[str, Any]]:
+        kind = message.get("type")
+        tracker = self.trackers.get(message.get("symbol"))
+        if tracker is None:
+            return []
+        if kind == "tick":
+            self.ticks_received += 1
+            ready = tracker.push(int(message["seq"]), {
+                "symbol": message["symbol"],
+                "price": float(message["price"]),
+                "volume": message.get("volume"),
+                "timestamp": message.get("timestamp"),
+            })
+            if tracker.gap_since is not None:
+                self._gaps.add(message["symbol"])
+            return ready
+        if kind == "gap":
+            # The feed no longer has these seqs; stop waiting for them
+            return await self._lost(message["symbol"], tracker.skip_gap(message["to"]))
+        return []
+
+    async def _lost(self, symbol: str, released: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Follow the ticks released past a gap with a fresh REST snapshot.
+
+        The snapshot is skipped when it has no price, or when it is not newer
+        than the last released tick, so time never runs backwards downstream.
+        With nothing released the ticks after the gap are still on their way
+        (a replay in progress) and will carry the price on, so none is fetched.
+        """
+        if self.snapshots is None or not released:
+            return released
+        try:
+            snapshot = await self.snapshots.get_market_data(symbol)
+        except TradingViewError as e:
+            print(f"snapshot for {symbol} failed: {e}")
+            return released
+        if snapshot.get("price") is None or not _newer(snapshot, released[-1]):
+            return released
+        self.snapshots_sent += 1
+        return released + [snapshot]
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        trackers = self.trackers.values()
+        return {
+            "connects": self.connects,
+            "ticks_received": self.ticks_received,
+            "duplicates": sum(tracker.duplicates for tracker in trackers),
+            "replay_requests": self.replay_requests,
+            "lost": sum(tracker.lost for tracker in trackers),
+            "snapshots": self.snapshots_sent,
+            "malformed": self.malformed,
+            "restarts": self.restarts,
+            "last_seq": {symbol: tracker.last_seq for symbol, tracker in self.trackers.items()},
+        }
+
+async def ingest_ticks(
+    ticks: AsyncIterator[Dict[str, Any]],
+    ingestor: MarketDataIngestor
+) -> AsyncIterator[MarketData]:
+    """Buffer each tick for writing and yield it with its indicators filled in"""
+    async for tick in ticks:
+        state = await ingestor.ingest_market_data(tick)
+        # Signal scores are computed per batch at flush time, so they are not known yet
+        yield MarketData(
+            symbol=tick["symbol"],
+            price=tick["price"],
+            volume=tick.get("volume") or 0.0,
+            timestamp=parse_timestamp(tick.get("timestamp")),
+            sma_20=state.sma_20.value,
+            sma_50=state.sma_50.value,
+            rsi=state.rsi.value
+        )
+
+async def broadcast_ticks(
+    rows: AsyncIterator[MarketData],
+    manager: WebSocketManager
+) -> AsyncIterator[MarketData]:
+    async for row in rows:
+        await manager.broadcast_market_data(row)
+        yield row
+
+async def run_feed(feed: MarketFeedClient, ingestor: MarketDataIngestor, manager: WebSocketManager):
+    """Feed -> ingestion -> WebSocket broadcast, until cancelled"""
+    async for _ in broadcast_ticks(ingest_ticks(feed.ticks(), ingestor), manager):
+        pass
+
+async def supervise_feed(
+    feed: MarketFeedClient,
+    ingestor: MarketDataIngestor,
+    manager: WebSocketManager,
+    restart_delay: float = 1.0
+):
+    """Run the feed pipeline until cancelled, logging and restarting it whenever it fails"""
+    while True:
+        try:
+            await run_feed(feed, ingestor, manager)
+        except Exception as e:
+            # Sequence trackers survive the restart, so the feed resumes where it stopped
+            feed.restarts += 1
+            print(f"market feed pipeline failed, restarting: {e!r}")
+        await asyncio.sleep(restart_delay)
@@ -1,135 +1,342 @@
 import numpy as np
-from typing import List, Dict, Union
+from typing import Any, List, Dict, NamedTuple, Optional, Sequence, Tuple, Union
 from ..models.market_data import MarketData
-from dataclasses import dataclass
+from . import indicators
+from .indicator_state import IndicatorState
+from dataclasses import asdict, dataclass
+
+def _tail(matrix: np.ndarray, columns: int) -> np.ndarray:
+    """Last `columns` columns of a matrix, NaN-padded on the left when it is narrower"""
+    if matrix.shape[1] >= columns:
+        return matrix[:, matrix.shape[1] - columns:]
+    padding = np.full((matrix.shape[0], columns - matrix.shape[1]), np.nan)
+    return np.hstack((padding, matrix))
 
 @dataclass
 class Signal:
     value: str
     score: float
 
+class MarketSeries(NamedTuple):
+    """Compact columnar price/volume series for one symbol, oldest first"""
+    prices: np.ndarray
+    volumes: np.ndarray
+
+class PriceWindow:
+    """The most recent `capacity` prices and volumes of one symbol, in a ring buffer"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.prices = np.empty(capacity, dtype=np.float64)
+        self.volumes = np.empty(capacity, dtype=np.float64)
+        self.index = 0
+        self.count = 0
+        self.last_timestamp: Any = None
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, price: float, volume: float = 0.0, timestamp: Any = None) -> bool:
+        """Add a tick; a repeat of the last timestamp is ignored so re-polling adds nothing"""
+        if timestamp is not None and timestamp == self.last_timestamp:
+            return False
+        self.prices[self.index] = price
+        self.volumes[self.index] = volume
+        self.index = (self.index + 1) % self.capacity
+        self.count += 1
+        self.last_timestamp = timestamp
+        return True
+
+    def series(self) -> MarketSeries:
+        """Window contents oldest first, as a copy"""
+        if self.count < self.capacity:
+            return MarketSeries(self.prices[:self.count].copy(), self.volumes[:self.count].copy())
+        order = np.r_[self.index:self.capacity, 0:self.index]
+        return MarketSeries(self.prices[order], self.volumes[order])
+
+class AnalysisContext:
+    """Price and volume series for one analysis, with indicators cached on first use"""
+
+    def __init__(self, prices: np.ndarray, volumes: np.ndarray):
+        self.prices = indicators.as_array(prices)
+        self.volumes = indicators.as_array(volumes)
+        self._cache: Dict[Tuple[Any, ...], Any] = {}
+
+    @classmethod
+    def from_market_data(cls, market_data: List[MarketData]) -> "AnalysisContext":
+        """Extract the price and volume series from market data rows once"""
+        count = len(market_data)
+        prices = np.fromiter((d.price for d in market_data), dtype=np.float64, count=count)
+        volumes = np.fromiter((d.volume for d in market_data), dtype=np.float64, count=count)
+        return cls(prices, volumes)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def _cached(self, key: Tuple[Any, ...], compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def current_price(self) -> float:
+        return float(self.prices[-1])
+
+    def sma(self, period: int) -> np.ndarray:
+        return self._cached(("sma", period), lambda: indicators.sma(self.prices, period))
+
+    def rsi(self, period: int = 14) -> np.ndarray:
+        return self._cached(("rsi", period), lambda: indicators.rsi(self.prices, period))
+
+    def volume_mean(self) -> float:
+        return self._cached(("volume_mean",), lambda: float(self.volumes.mean()))
+
+    def price_std(self) -> float:
+        return self._cached(("price_std",), lambda: float(self.prices.std()))
+
+@dataclass
+class PriceMatrix:
+    """Price and volume series for many symbols, right-aligned on the latest tick
+    and NaN-padded on the left (symbols x time)"""
+    symbols: List[str]
+    prices: np.ndarray
+    volumes: np.ndarray
+    lengths: np.ndarray
+
+    @classmethod
+    def from_columns(
+        cls,
+        symbols: Sequence[str],
+        prices: Sequence[float],
+        volumes: Sequence[float]
+    ) -> "PriceMatrix":
+        """Pack rows sorted by (symbol, timestamp) into an aligned matrix"""
+        symbols = np.asarray(symbols, dtype=object)
+        count = len(symbols)
+        if count == 0:
+            empty = np.empty((0, 0), dtype=np.float64)
+            return cls([], empty, empty.copy(), np.empty(0, dtype=np.int64))
+
+        # Row boundaries wherever the symbol changes
+        breaks = np.flatnonzero(symbols[1:] != symbols[:-1]) + 1
+        starts = np.concatenate(([0], breaks))
+        lengths = np.diff(np.concatenate((starts, [count])))
+        width = int(lengths.max())
+
+        rows = np.repeat(np.arange(len(starts)), lengths)
+        columns = np.arange(count) - np.repeat(starts, lengths) + np.repeat(width - lengths, lengths)
+
+        price_matrix = np.full((len(starts), width), np.nan)
+        price_matrix[rows, columns] = prices
+        volume_matrix = np.full((len(starts), width), np.nan)
+        volume_matrix[rows, columns] = volumes
+        return cls(symbols[starts].tolist(), price_matrix, volume_matrix, lengths)
+
+MarketInput = Union[List[MarketData], MarketSeries, AnalysisContext]
+ArrayOrFloat = Union[float, np.ndarray]
+
+@dataclass(frozen=True)
+class SignalParams:
+    """Weights, filters, strength buckets and exit distances used to score setups"""
+    # Momentum score weights
+    trend_weight: float = 0.3  # price above SMA-20 above SMA-50
+    crossover_weight: float = 0.3  # SMA-20 crossing above SMA-50
+    rsi_band_weight: float = 0.2  # RSI inside the neutral band
+    momentum_volume_weight: float = 0.2
+    # Mean reversion score weights
+    deviation_weight: float = 0.3
+    rsi_extreme_weight: float = 0.3  # RSI outside the neutral band
+    velocity_weight: float = 0.2
+    reversion_volume_weight: float = 0.2
+    # Filters
+    rsi_low: float = 30.0
+    rsi_high: float = 70.0
+    deviation_threshold: float = 0.02  # distance from SMA-20, as a fraction of it
+    velocity_threshold: float = 0.01  # mean of the last five returns
+    # Strength buckets
+    strong_score: float = 0.8
+    moderate_score: float = 0.5
+    weak_score: float = 0.3
+    # Stop and target distances as fractions of the entry price
+    momentum_stop: float = 0.02
+    momentum_target: float = 0.06
+    mean_reversion_stop: float = 0.02
+
+    def to_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+class ScoringInputs(NamedTuple):
+    """Per-bar indicator inputs to the signal scores; independent of SignalParams"""
+    prices: np.ndarray
+    sma_20: np.ndarray
+    sma_50: np.ndarray
+    prev_sma_20: np.ndarray
+    prev_sma_50: np.ndarray
+    rsi: np.ndarray
+    velocity: np.ndarray
+    volumes: np.ndarray
+    volume_mean: np.ndarray
+
+def _velocity(recent_prices: np.ndarray) -> ArrayOrFloat:
+    """Mean of the returns between consecutive recent prices"""
+    recent_returns = np.diff(recent_prices, axis=-1) / recent_prices[..., :-1]
+    return recent_returns.mean(axis=-1)
+
+def _align(values: np.ndarray, length: int) -> np.ndarray:
+    """Right-align an indicator series to `length` bars, NaN-padded on the left"""
+    aligned = np.full(length, np.nan)
+    if len(values):
+        aligned[length - len(values):] = values
+    return aligned
+
 class MarketProcessor:
+    def __init__(self, params: Optional[SignalParams] = None):
+        self.params = params or SignalParams()
+
     def calculate_sma(self, prices: List[float], period: int) -> List[float]:
         """Calculate Simple Moving Average"""
-        if len(prices) < period:
-            return []
-        
-        sma = []
-        for i in range(len(prices) - period + 1):
-            sma.append(np.mean(prices[i:i+period]))
-        return sma
+        return indicators.sma(prices, period).tolist()
 
     def calculate_rsi(self, prices: List[float], period: int = 14) -> List[float]:
         """Calculate Relative Strength Index"""
-        if len(prices) < period + 1:
-            return []
+        return indicators.rsi(prices, period).tolist()
+
+    def build_context(self, market_data: MarketInput) -> AnalysisContext:
+        """Wrap market data in an analysis context, reusing one if given"""
+        if isinstance(market_data, AnalysisContext):
+            return market_data
+        if isinstance(market_data, MarketSeries):
+            return AnalysisContext(market_data.prices, market_data.volumes)
+        return AnalysisContext.from_market_data(market_data)
+
+    def _classify(self, score: float) -> Signal:
+        """Map a signal score onto its strength bucket"""
+        if score >= self.params.strong_score:
+            return Signal("STRONG", score)
+        elif score >= self.params.moderate_score:
+            return Signal("MODERATE", score)
+        elif score >= self.params.weak_score:
+            return Signal("WEAK", score)
+        else:
+            return Signal("NEUTRAL", score)
+
+    def _momentum_score(
+        self,
+        price: ArrayOrFloat,
+        sma_20: ArrayOrFloat,
+        sma_50: ArrayOrFloat,
+        prev_sma_20: ArrayOrFloat,
+        prev_sma_50: ArrayOrFloat,
+        rsi: ArrayOrFloat,
+        volume: ArrayOrFloat,
+        volume_mean: ArrayOrFloat
+    ) -> ArrayOrFloat:
+        """Score momentum from the latest indicator values (scalars or per-symbol arrays)"""
+        params = self.params
+        # Price above moving averages
+        momentum_score = params.trend_weight * ((price > sma_20) & (sma_20 > sma_50))
         
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
+        # Moving average crossovers
+        momentum_score = momentum_score + params.crossover_weight * (
+            (sma_20 > sma_50) & (prev_sma_20 <= prev_sma_50)
+        )
         
-        avg_gain = np.mean(gains[:period])
-        avg_loss = np.mean(losses[:period])
+        # RSI conditions (NaN when RSI is unavailable)
+        momentum_score = momentum_score + params.rsi_band_weight * (
+            (rsi >= params.rsi_low) & (rsi <= params.rsi_high)
+        )
         
-        if avg_loss == 0:
-            return [100.0]
+        # Volume confirmation
+        momentum_score = momentum_score + params.momentum_volume_weight * (volume > volume_mean)
         
-        rs = avg_gain / avg_loss
-        rsi = [100 - (100 / (1 + rs))]
+        return momentum_score
+
+    def _mean_reversion_score(
+        self,
+        price: ArrayOrFloat,
+        velocity: ArrayOrFloat,
+        sma_20: ArrayOrFloat,
+        rsi: ArrayOrFloat,
+        volume: ArrayOrFloat,
+        volume_mean: ArrayOrFloat
+    ) -> ArrayOrFloat:
+        """Score mean reversion from the latest indicator values (scalars or per-symbol arrays)"""
+        params = self.params
+        # Price deviation from moving average
+        deviation = (price - sma_20) / sma_20
+        mean_reversion_score = params.deviation_weight * (np.abs(deviation) > params.deviation_threshold)
         
-        for i in range(period, len(deltas)):
-            avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-            avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-            
-            if avg_loss == 0:
-                rsi.append(100.0)
-            else:
-                rs = avg_gain / avg_loss
-                rsi.append(100 - (100 / (1 + rs)))
+        # RSI extremes
+        mean_reversion_score = mean_reversion_score + params.rsi_extreme_weight * (
+            (rsi < params.rsi_low) | (rsi > params.rsi_high)
+        )
         
-        return rsi
+        # Price velocity over the last five returns
+        mean_reversion_score = mean_reversion_score + params.velocity_weight * (
+            np.abs(velocity) > params.velocity_threshold
+        )
+        
+        # Volume confirmation
+        mean_reversion_score = mean_reversion_score + params.reversion_volume_weight * (volume > volume_mean)
+        
+        return mean_reversion_score
 
-    def calculate_momentum_signal(self, market_data: List[MarketData]) -> Signal:
+    def calculate_momentum_signal(self, market_data: MarketInput) -> Signal:
         """Calculate momentum signal based on price action and indicators"""
-        prices = [d.price for d in market_data]
-        volumes = [d.volume for d in market_data]
+        ctx = self.build_context(market_data)
         
         # Calculate indicators
-        sma_20 = self.calculate_sma(prices, 20)
-        sma_50 = self.calculate_sma(prices, 50)
-        rsi = self.calculate_rsi(prices)
+        sma_20 = ctx.sma(20)
+        sma_50 = ctx.sma(50)
+        rsi = ctx.rsi()
         
         if len(sma_20) < 2 or len(sma_50) < 2:
             return Signal("NEUTRAL", 0.0)
         
-        # Calculate momentum score
-        momentum_score = 0.0
-        
-        # Price above moving averages
-        if prices[-1] > sma_20[-1] > sma_50[-1]:
-            momentum_score += 0.3
-        
-        # Moving average crossovers
-        if sma_20[-1] > sma_50[-1] and sma_20[-2] <= sma_50[-2]:
-            momentum_score += 0.3
-        
-        # RSI conditions
-        if rsi and 30 <= rsi[-1] <= 70:
-            momentum_score += 0.2
-        
-        # Volume confirmation
-        if volumes[-1] > np.mean(volumes):
-            momentum_score += 0.2
-        
-        # Determine signal strength
-        if momentum_score >= 0.8:
-            return Signal("STRONG", momentum_score)
-        elif momentum_score >= 0.5:
-            return Signal("MODERATE", momentum_score)
-        elif momentum_score >= 0.3:
-            return Signal("WEAK", momentum_score)
-        else:
-            return Signal("NEUTRAL", momentum_score)
+        return self._classify(float(self._momentum_score(
+            ctx.prices[-1], sma_20[-1], sma_50[-1], sma_20[-2], sma_50[-2],
+            rsi[-1] if len(rsi) else np.nan,
+            ctx.volumes[-1], ctx.volume_mean()
+        )))
 
-    def calculate_mean_reversion_signal(self, market_data: List[MarketData]) -> Signal:
+    def calculate_mean_reversion_signal(self, market_data: MarketInput) -> Signal:
         """Calculate mean reversion signal based on price action and indicators"""
-        prices = [d.price for d in market_data]
-        volumes = [d.volume for d in market_data]
+        ctx = self.build_context(market_data)
         
-        sma_20 = self.calculate_sma(prices, 20)
-        rsi = self.calculate_rsi(prices)
+        sma_20 = ctx.sma(20)
+        rsi = ctx.rsi()
         
-        if len(sma_20) < 2 or not rsi:
+        if len(sma_20) < 2 or not len(rsi):
             return Signal("NEUTRAL", 0.0)
         
-        mean_reversion_score = 0.0
-        
-        # Price deviation from moving average
-        deviation = (prices[-1] - sma_20[-1]) / sma_20[-1]
-        if abs(deviation) > 0.02:  # 2% deviation
-            mean_reversion_score += 0.3
-        
-        # RSI extremes
-        if rsi[-1] < 30 or rsi[-1] > 70:
-            mean_reversion_score += 0.3
+        recent_prices = ctx.prices[-6:]
+        return self._classify(float(self._mean_reversion_score(
+            recent_prices[-1], _velocity(recent_prices), sma_20[-1], rsi[-1],
+            ctx.volumes[-1], ctx.volume_mean()
+        )))
+
+    def calculate_momentum_signal_from_state(self, state: IndicatorState) -> Signal:
+        """Calculate momentum signal from incremental state without a history scan"""
+        if state.prev_sma_50 is None:
+            return Signal("NEUTRAL", 0.0)
         
-        # Price velocity
-        recent_returns = np.diff(prices[-5:]) / prices[-6:-1]
-        if abs(np.mean(recent_returns)) > 0.01:  # 1% average move
-            mean_reversion_score += 0.2
+        rsi = state.rsi.value
+        return self._classify(float(self._momentum_score(
+            state.current_price, state.sma_20.value, state.sma_50.value,
+            state.prev_sma_20, state.prev_sma_50, np.nan if rsi is None else rsi,
+            state.last_volume, state.volume_mean
+        )))
+
+    def calculate_mean_reversion_signal_from_state(self, state: IndicatorState) -> Signal:
+        """Calculate mean reversion signal from incremental state without a history scan"""
+        if state.prev_sma_20 is None or state.rsi.value is None:
+            return Signal("NEUTRAL", 0.0)
         
-        # Volume confirmation
-        if volumes[-1] > np.mean(volumes):
-            mean_reversion_score += 0.2
-        
-        if mean_reversion_score >= 0.8:
-            return Signal("STRONG", mean_reversion_score)
-        elif mean_reversion_score >= 0.5:
-            return Signal("MODERATE", mean_reversion_score)
-        elif mean_reversion_score >= 0.3:
-            return Signal("WEAK", mean_reversion_score)
-        else:
-            return Signal("NEUTRAL", mean_reversion_score)
+        recent_prices = np.fromiter(state.recent_prices, dtype=np.float64)
+        return self._classify(float(self._mean_reversion_score(
+            recent_prices[-1], _velocity(recent_prices), state.sma_20.value,
+            state.rsi.value, state.last_volume, state.volume_mean
+        )))
 
     def calculate_r_multiple(self, entry_price: float, stop_loss: float, target_price: float) -> float:
         """Calculate R-multiple based on entry, stop, and target prices"""
@@ -140,11 +347,14 @@ class MarketProcessor:
         reward = abs(target_price - entry_price)
         return reward / risk
 
-    def identify_setup(self, market_data: List[MarketData]) -> Dict[str, Union[str, float]]:
-        """Identify potential A+ setups based on market data"""
-        momentum_signal = self.calculate_momentum_signal(market_data)
-        mean_reversion_signal = self.calculate_mean_reversion_signal(market_data)
-        
+    def _build_setup(
+        self,
+        momentum_signal: Signal,
+        mean_reversion_signal: Signal,
+        current_price: float,
+        sma_20: Optional[float]
+    ) -> Dict[str, Union[str, float]]:
+        """Turn the two signals into a setup with entry, stop and target"""
         # Determine primary setup type
         if momentum_signal.score > mean_reversion_signal.score:
             setup_type = "MOMENTUM"
@@ -155,18 +365,20 @@ class MarketProcessor:
             signal_strength = mean_reversion_signal.value
             score = mean_reversion_signal.score
         
-        current_price = market_data[-1].price
-        
         # Calculate entry, stop, and target based on setup type
         if setup_type == "MOMENTUM":
             entry_price = current_price
-            stop_loss = current_price * 0.98  # 2% stop loss
-            target_price = current_price * 1.06  # 6% target
+            stop_loss = current_price * (1 - self.params.momentum_stop)
+            target_price = current_price * (1 + self.params.momentum_target)
         else:  # MEAN_REVERSION
-            sma_20 = self.calculate_sma([d.price for d in market_data], 20)[-1]
             entry_price = current_price
-            stop_loss = current_price * 1.02 if current_price > sma_20 else current_price * 0.98
-            target_price = sma_20
+            if sma_20 is None:
+                # Not enough history for a mean to revert to
+                stop_loss = target_price = current_price
+            else:
+                stop = self.params.mean_reversion_stop
+                stop_loss = current_price * (1 + stop) if current_price > sma_20 else current_price * (1 - stop)
+                target_price = sma_20
         
         r_multiple = self.calculate_r_multiple(entry_price, stop_loss, target_price)
         
@@ -180,15 +392,194 @@ class MarketProcessor:
             'target_price': target_price
         }
 
-    def calculate_invalidation_zones(self, market_data: List[MarketData]) -> Dict[str, float]:
-        """Calculate invalidation zones based on historical price action"""
-        prices = [d.price for d in market_data]
-        sma_20 = self.calculate_sma(prices, 20)[-1]
+    def identify_setup(self, market_data: MarketInput) -> Dict[str, Union[str, float]]:
+        """Identify potential A+ setups based on market data"""
+        ctx = self.build_context(market_data)
+        sma_20 = ctx.sma(20)
+        return self._build_setup(
+            self.calculate_momentum_signal(ctx),
+            self.calculate_mean_reversion_signal(ctx),
+            ctx.current_price,
+            float(sma_20[-1]) if len(sma_20) else None
+        )
+
+    def identify_setup_from_state(self, state: IndicatorState) -> Dict[str, Union[str, float]]:
+        """Identify potential A+ setups from incremental state"""
+        return self._build_setup(
+            self.calculate_momentum_signal_from_state(state),
+            self.calculate_mean_reversion_signal_from_state(state),
+            state.current_price,
+            state.sma_20.value
+        )
+
+    def calculate_invalidation_zones(self, market_data: MarketInput) -> Optional[Dict[str, float]]:
+        """Calculate invalidation zones based on historical price action; None before 20 prices"""
+        ctx = self.build_context(market_data)
+        sma = ctx.sma(20)
+        if not len(sma):
+            return None
+        sma_20 = float(sma[-1])
         
         # Calculate standard deviation of prices
-        std_dev = np.std(prices)
+        std_dev = ctx.price_std()
         
         return {
             'upper_zone': sma_20 + (2 * std_dev),
             'lower_zone': sma_20 - (2 * std_dev)
         }
+
+    def analyze(self, market_data: MarketInput) -> Tuple[Dict[str, Union[str, float]], Optional[Dict[str, float]]]:
+        """Setup and invalidation zones from one shared analysis context"""
+        ctx = self.build_context(market_data)
+        return self.identify_setup(ctx), self.calculate_invalidation_zones(ctx)
+
+    def score_signals(
+        self,
+        sma_20: np.ndarray,
+        sma_50: np.ndarray,
+        prev_sma_20: np.ndarray,
+        prev_sma_50: np.ndarray,
+        rsi: np.ndarray,
+        recent_prices: np.ndarray,
+        volume: np.ndarray,
+        volume_mean: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized momentum and mean reversion scores; NaN inputs mark missing history"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            momentum_scores = np.where(
+                ~np.isnan(prev_sma_50),
+                self._momentum_score(
+                    recent_prices[..., -1], sma_20, sma_50, prev_sma_20, prev_sma_50,
+                    rsi, volume, volume_mean
+                ),
+                0.0
+            )
+            mean_reversion_scores = np.where(
+                ~np.isnan(prev_sma_20) & ~np.isnan(rsi),
+                self._mean_reversion_score(
+                    recent_prices[..., -1], _velocity(recent_prices), sma_20, rsi, volume, volume_mean
+                ),
+                0.0
+            )
+        return momentum_scores, mean_reversion_scores
+
+    def identify_setups(self, matrix: PriceMatrix) -> Dict[str, Dict[str, Any]]:
+        """Identify setups and invalidation zones for every symbol in a price matrix at once"""
+        prices, volumes = matrix.prices, matrix.volumes
+        if not matrix.symbols:
+            return {}
+        
+        sma_20 = _tail(indicators.sma_matrix(prices, 20), 2)
+        sma_50 = _tail(indicators.sma_matrix(prices, 50), 2)
+        rsi = _tail(indicators.rsi_matrix(prices), 1)[:, 0]
+        recent_prices = _tail(prices, 6)
+        last_volume = volumes[:, -1]
+        volume_mean = np.nanmean(volumes, axis=1)
+        std_dev = np.nanstd(prices, axis=1)
+        
+        momentum_scores, mean_reversion_scores = self.score_signals(
+            sma_20[:, 1], sma_50[:, 1], sma_20[:, 0], sma_50[:, 0],
+            rsi, recent_prices, last_volume, volume_mean
+        )
+        
+        results = {}
+        for i, symbol in enumerate(matrix.symbols):
+            current_sma = None if np.isnan(sma_20[i, 1]) else float(sma_20[i, 1])
+            setup = self._build_setup(
+                self._classify(float(momentum_scores[i])),
+                self._classify(float(mean_reversion_scores[i])),
+                float(prices[i, -1]),
+                current_sma
+            )
+            zones = None
+            if current_sma is not None:
+                zones = {
+                    'upper_zone': current_sma + (2 * float(std_dev[i])),
+                    'lower_zone': current_sma - (2 * float(std_dev[i]))
+                }
+            results[symbol] = {"setup": setup, "invalidation_zones": zones}
+        return results
+
+    def history_inputs(self, market_data: MarketInput) -> ScoringInputs:
+        """Indicator inputs for every bar, computed once and reusable under any SignalParams.
+
+        Bar t gets what `identify_setup` would see on the history up to and
+        including t, so a backtest needs no per-bar recomputation.
+        """
+        ctx = self.build_context(market_data)
+        count = len(ctx)
+        sma_20 = _align(ctx.sma(20), count)
+        sma_50 = _align(ctx.sma(50), count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            returns = np.diff(ctx.prices) / ctx.prices[:-1]
+        return ScoringInputs(
+            prices=ctx.prices,
+            sma_20=sma_20,
+            sma_50=sma_50,
+            prev_sma_20=np.concatenate(([np.nan], sma_20[:-1])),
+            prev_sma_50=np.concatenate(([np.nan], sma_50[:-1])),
+            rsi=_align(ctx.rsi(), count),
+            velocity=_align(indicators.sma(returns, 5), count),
+            volumes=ctx.volumes,
+            # identify_setup averages volume over all history so far
+            volume_mean=np.cumsum(ctx.volumes) / np.arange(1, count + 1),
+        )
+
+    def score_inputs(self, inputs: ScoringInputs) -> Tuple[np.ndarray, np.ndarray]:
+        """Momentum and mean reversion scores at every bar under this processor's params"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            momentum_scores = np.where(
+                ~np.isnan(inputs.prev_sma_50),
+                self._momentum_score(
+                    inputs.prices, inputs.sma_20, inputs.sma_50, inputs.prev_sma_20,
+                    inputs.prev_sma_50, inputs.rsi, inputs.volumes, inputs.volume_mean
+                ),
+                0.0
+            )
+            mean_reversion_scores = np.where(
+                ~np.isnan(inputs.prev_sma_20) & ~np.isnan(inputs.rsi),
+                self._mean_reversion_score(
+                    inputs.prices, inputs.velocity, inputs.sma_20, inputs.rsi,
+                    inputs.volumes, inputs.volume_mean
+                ),
+                0.0
+            )
+        return momentum_scores, mean_reversion_scores
+
+    def score_history(self, market_data: MarketInput) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Momentum and mean reversion scores, and SMA-20, at every bar in one vectorized pass"""
+        inputs = self.history_inputs(market_data)
+        momentum_scores, mean_reversion_scores = self.score_inputs(inputs)
+        return momentum_scores, mean_reversion_scores, inputs.sma_20
+
+    def setup_levels(
+        self,
+        momentum_scores: np.ndarray,
+        mean_reversion_scores: np.ndarray,
+        prices: np.ndarray,
+        sma_20: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """Vectorized `_build_setup`: setup type, score, stop and target for every bar"""
+        is_momentum = momentum_scores > mean_reversion_scores
+        params = self.params
+        above_mean = prices > sma_20
+        reversion_stop = np.where(
+            above_mean, prices * (1 + params.mean_reversion_stop), prices * (1 - params.mean_reversion_stop)
+        )
+        has_mean = ~np.isnan(sma_20)
+        stop_loss = np.where(
+            is_momentum, prices * (1 - params.momentum_stop), np.where(has_mean, reversion_stop, prices)
+        )
+        target_price = np.where(
+            is_momentum, prices * (1 + params.momentum_target), np.where(has_mean, sma_20, prices)
+        )
+        risk = np.abs(prices - stop_loss)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r_multiple = np.where(risk > 0, np.abs(target_price - prices) / risk, 0.0)
+        return {
+            "is_momentum": is_momentum,
+            "score": np.where(is_momentum, momentum_scores, mean_reversion_scores),
+            "stop_loss": stop_loss,
+            "target_price": target_price,
+            "r_multiple": r_multiple,
+        }
@@ -0,0 +1,154 @@
+"""Grid search over SignalParams against stored market history.
+
+Run from the backend directory:
+
+    python -m app.services.param_sweep BTCUSD ETHUSD --days 90 [--workers N] [--top 20]
+"""
+import argparse
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields, replace
+from datetime import datetime, timedelta
+from itertools import product
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from .backtest import simulate_inputs, summarize
+from .history_store import history_store
+from .market_data_repository import load_series
+from .market_processor import MarketProcessor, MarketSeries, ScoringInputs, SignalParams
+
+# 3^7 = 2187 combinations around the defaults
+DEFAULT_GRID: Dict[str, Sequence[float]] = {
+    "strong_score": (0.6, 0.7, 0.8),
+    "rsi_low": (25.0, 30.0, 35.0),
+    "deviation_threshold": (0.01, 0.02, 0.03),
+    "velocity_threshold": (0.005, 0.01, 0.02),
+    "momentum_stop": (0.01, 0.02, 0.03),
+    "momentum_target": (0.04, 0.06, 0.09),
+    "mean_reversion_stop": (0.01, 0.02, 0.03),
+}
+
+# Indicator inputs per symbol, installed once in each pool worker
+_history: Dict[str, ScoringInputs] = {}
+
+def param_grid(base: Optional[SignalParams] = None, **choices: Sequence[float]) -> List[SignalParams]:
+    """Every combination of the given field values, other fields taken from `base`"""
+    base = base or SignalParams()
+    known = {f.name for f in fields(SignalParams)}
+    unknown = set(choices) - known
+    if unknown:
+        raise ValueError(f"Unknown signal parameters: {', '.join(sorted(unknown))}")
+    names = list(choices)
+    return [replace(base, **dict(zip(names, values))) for values in product(*choices.values())]
+
+def prepare_history(series: Dict[str, MarketSeries]) -> Dict[str, ScoringInputs]:
+    """Indicators for every symbol, computed once and shared by every combination"""
+    processor = MarketProcessor()
+    return {symbol: processor.history_inputs(data) for symbol, data in series.items()}
+
+def evaluate(
+    params: SignalParams,
+    history: Dict[str, ScoringInputs],
+    min_score: Optional[float] = None,
+    max_bars: Optional[int] = None
+) -> Dict[str, Any]:
+    """Backtest one combination over every symbol's history"""
+    processor = MarketProcessor(params)
+    closed = []
+    for inputs in history.values():
+        trades = simulate_inputs(inputs, processor, min_score, max_bars)
+        closed.append(trades.r_multiple[trades.closed])
+    summary = summarize(np.concatenate(closed) if closed else np.empty(0))
+    return {
+        "params": params,
+        "trades": summary["trades"],
+        "win_rate": summary["win_rate"],
+        "expectancy": summary["average_r"],
+        "total_r": summary["total_r"],
+        "r_p10": summary["r_percentiles"]["p10"],
+        "r_p90": summary["r_percentiles"]["p90"],
+    }
+
+def _init_worker(history: Dict[str, ScoringInputs]):
+    global _history
+    _history = history
+
+def _evaluate_item(args: tuple) -> Dict[str, Any]:
+    params, min_score, max_bars = args
+    return evaluate(params, _history, min_score, max_bars)
+
+def rank(results: List[Dict[str, Any]], min_trades: int = 30) -> List[Dict[str, Any]]:
+    """Best R expectancy first; combinations with fewer than `min_trades` trades rank last"""
+    return sorted(
+        results,
+        key=lambda r: (r["trades"] >= min_trades, r["expectancy"], r["trades"]),
+        reverse=True
+    )
+
+def run_sweep(
+    series: Dict[str, MarketSeries],
+    grid: List[SignalParams],
+    min_score: Optional[float] = None,
+    max_bars: Optional[int] = None,
+    min_trades: int = 30,
+    workers: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Evaluate every combination in `grid`, spread over a process pool, ranked by expectancy"""
+    history = prepare_history(series)
+    workers = min(workers or os.cpu_count() or 1, len(grid))
+    if workers <= 1:
+        results = [evaluate(params, history, min_score, max_bars) for params in grid]
+    else:
+        # The history is sent to each worker once, not with every combination
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(history,)) as pool:
+            items = [(params, min_score, max_bars) for params in grid]
+            results = list(pool.map(_evaluate_item, items, chunksize=max(1, len(items) // (workers * 8))))
+    return rank(results, min_trades)
+
+def format_table(results: List[Dict[str, Any]], names: Sequence[str], top: int = 20) -> str:
+    """Ranked results as a fixed-width text table showing the swept parameters"""
+    header = [f"{'rank':>4}"] + [f"{name:>20}" for name in names] + [
+        f"{'trades':>7}", f"{'win rate':>8}", f"{'exp. R':>7}", f"{'total R':>8}"
+    ]
+    lines = [" ".join(header)]
+    for position, result in enumerate(results[:top], 1):
+        values = [f"{getattr(result['params'], name):>20g}" for name in names]
+        lines.append(" ".join([f"{position:>4}"] + values + [
+            f"{result['trades']:>7}", f"{result['win_rate']:>8.1%}",
+            f"{result['expectancy']:>7.3f}", f"{result['total_r']:>8.1f}"
+        ]))
+    return "\n".join(lines)
+
+async def load_history(db: AsyncSession, symbols: Sequence[str], since: datetime) -> Dict[str, MarketSeries]:
+    """Stored prices and volumes since `since` for each symbol that has any"""
+    history = {}
+    for symbol in symbols:
+        series = await load_series(db, symbol, since, history_store)
+        if series is not None:
+            history[symbol] = series
+    return history
+
+async def _main(args: argparse.Namespace):
+    from ..models.base import async_session
+
+    async with async_session() as db:
+        series = await load_history(db, args.symbols, datetime.utcnow() - timedelta(days=args.days))
+    if not series:
+        raise SystemExit("No stored market data for those symbols")
+
+    grid = param_grid(**DEFAULT_GRID)
+    results = run_sweep(series, grid, max_bars=args.max_bars, min_trades=args.min_trades, workers=args.workers)
+    print(f"{len(grid)} combinations over {sum(len(s.prices) for s in series.values()):,} bars")
+    print(format_table(results, list(DEFAULT_GRID), args.top))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--max-bars", type=int, default=None)
+    parser.add_argument("--min-trades", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    asyncio.run(_main(parser.parse_args()))
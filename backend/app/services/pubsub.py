@@ -0,0 +1,229 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import struct
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Set
+
+try:
+    import orjson
+except ImportError:  # optional fast encoder
+    orjson = None
+
+BusHandler = Callable[[str, Dict[str, Any]], None]
+
+_FRAME_HEADER = struct.Struct(">I")
+
+logger = logging.getLogger(__name__)
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _frame(channel: str, payload: Dict[str, Any]) -> bytes:
+    body = _dumps({"c": channel, "p": payload})
+    return _FRAME_HEADER.pack(len(body)) + body
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    return await reader.readexactly(_FRAME_HEADER.unpack(header)[0])
+
+class MessageBus(ABC):
+    """Publishes messages to every worker process, including the publishing one.
+
+    Handlers run synchronously on the event loop of each subscribing worker.
+    """
+
+    def __init__(self):
+        self.handlers: List[BusHandler] = []
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+
+    def subscribe(self, handler: BusHandler):
+        self.handlers.append(handler)
+
+    def _dispatch(self, channel: str, payload: Dict[str, Any]):
+        for handler in self.handlers:
+            try:
+                handler(channel, payload)
+            except Exception:
+                # One failing handler must not keep the message from the others
+                logger.exception("pub/sub handler %r failed on %s", handler, channel)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, payload: Dict[str, Any]):
+        """Send `payload` on `channel` to the handlers of every worker"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+        }
+
+class LocalBus(MessageBus):
+    """Single-process bus: publishing just dispatches to local handlers"""
+
+    async def publish(self, channel: str, payload: Dict[str, Any]):
+        self.published += 1
+        self._dispatch(channel, payload)
+
+class UnixSocketBus(MessageBus):
+    """Bus shared by the workers on one host over a Unix domain socket.
+
+    Whichever worker holds an exclusive lock on `<path>.lock` serves the socket
+    and relays each frame to every other worker; the rest connect to it. If the
+    hub exits, the lock is released and the survivors elect a new one. Frames
+    are length-prefixed JSON and are dropped, not queued, for a peer whose
+    socket buffer is over `max_peer_buffer` bytes, or while reconnecting.
+    """
+
+    def __init__(self, path: str, reconnect_delay: float = 0.2, max_peer_buffer: int = 4 * 2**20):
+        super().__init__()
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self.max_peer_buffer = max_peer_buffer
+        self.is_hub = False
+
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, timeout: float = 5.0):
+        """Join the bus, becoming the hub if no other worker is"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._teardown()
+
+    def _try_lock(self) -> bool:
+        fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                if self._try_lock():
+                    await self._serve()
+                else:
+                    await self._follow()
+            except (ConnectionError, FileNotFoundError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                await self._teardown()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left behind by a hub that died; we hold the lock
+        self._server = await asyncio.start_unix_server(self._serve_peer, self.path)
+        os.chmod(self.path, 0o600)
+        self.is_hub = True
+        self._connected.set()
+        await self._server.serve_forever()
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._peers.add(writer)
+        try:
+            while True:
+                body = await _read_frame(reader)
+                self._relay(_FRAME_HEADER.pack(len(body)) + body, exclude=writer)
+                self._receive(body)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _follow(self):
+        reader, writer = await asyncio.open_unix_connection(self.path)
+        self._writer = writer
+        self._connected.set()
+        while True:
+            self._receive(await _read_frame(reader))
+
+    def _relay(self, frame: bytes, exclude: Optional[asyncio.StreamWriter] = None):
+        for peer in list(self._peers):
+            if peer is exclude:
+                continue
+            if peer.transport.get_write_buffer_size() > self.max_peer_buffer:
+                self.dropped += 1
+                continue
+            peer.write(frame)
+
+    def _receive(self, body: bytes):
+        message = _loads(body)
+        self.received += 1
+        self._dispatch(message["c"], message["p"])
+
+    async def _teardown(self):
+        self._connected.clear()
+        self.is_hub = False
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for peer in list(self._peers):
+            peer.close()
+        self._peers.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def publish(self, channel: str, payload: Dict[str, Any]):
+        """Deliver locally right away and forward to every other worker"""
+        self.published += 1
+        self._dispatch(channel, payload)
+        frame = _frame(channel, payload)
+        if self.is_hub:
+            self._relay(frame)
+        elif self._writer is not None and not self._writer.is_closing():
+            self._writer.write(frame)
+            if self._writer.transport.get_write_buffer_size() > self.max_peer_buffer:
+                await self._writer.drain()
+        else:
+            self.dropped += 1
+
+def create_bus(backend: str, path: Optional[str] = None) -> MessageBus:
+    """Bus for the configured backend: "local" (one worker) or "unix" (workers on one host)"""
+    if backend == "local":
+        return LocalBus()
+    if backend == "unix":
+        return UnixSocketBus(path)
+    raise ValueError(f"Unknown pub/sub backend: {backend}")
@@ -0,0 +1,54 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+class TokenBucket:
+    """Async token-bucket rate limiter.
+
+    Allows bursts of up to `capacity` calls, then `rate` calls per second.
+    Waiters are served in arrival order. A `rate` of None disables limiting.
+    """
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate or 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        self.acquired += 1
+        if not self.rate:
+            return 0.0
+        async with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            delay = (1 - self._tokens) / self.rate
+            # Holding the lock while sleeping keeps later callers queued behind us
+            await asyncio.sleep(delay)
+            self._refill()
+            self._tokens -= 1
+        self.waited += 1
+        self.wait_seconds += delay
+        return delay
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "rate": self.rate or 0.0,
+            "capacity": self.capacity,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "wait_seconds": self.wait_seconds,
+        }
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from ..models.market_data import MarketData, PARTITIONED
+
+PARTITION_PREFIX = f"{MarketData.__tablename__}_p"
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+def partition_day(name: str) -> Optional[date]:
+    """Day covered by a partition table name, or None if it is not one of ours"""
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+class MarketDataRetention:
+    """Keeps market_data bounded to a retention window.
+
+    With PostgreSQL declarative partitioning enabled, daily partitions are
+    created ahead of time and expired ones are dropped whole. Otherwise old
+    rows are deleted in bounded chunks so a single retention pass never holds
+    a long write lock.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        retention_days: Optional[int],
+        partitions_ahead: int = 2,
+        partitioned: bool = PARTITIONED,
+        delete_chunk: int = 50000
+    ):
+        self.engine = engine
+        self.retention_days = retention_days
+        self.partitions_ahead = partitions_ahead
+        self.partitioned = partitioned
+        self.delete_chunk = delete_chunk
+
+    async def ensure_partitions(self, today: Optional[date] = None) -> List[str]:
+        """Create daily partitions from today through `partitions_ahead` days out"""
+        if not self.partitioned:
+            return []
+        today = today or datetime.utcnow().date()
+        created = []
+        async with self.engine.begin() as conn:
+            # Catch-all so late or far-future ticks never fail to insert
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {MarketData.__tablename__}_default "
+                f"PARTITION OF {MarketData.__tablename__} DEFAULT"
+            ))
+            for offset in range(self.partitions_ahead + 1):
+                day = today + timedelta(days=offset)
+                name = partition_name(day)
+                await conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {MarketData.__tablename__} "
+                    f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                ))
+                created.append(name)
+        return created
+
+    async def _partition_names(self, conn) -> List[str]:
+        result = await conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = :table"
+        ), {"table": MarketData.__tablename__})
+        return [row[0] for row in result]
+
+    async def apply_retention(self, now: Optional[datetime] = None) -> int:
+        """Drop expired partitions or delete expired rows; returns partitions/rows removed"""
+        if self.retention_days is None:
+            return 0
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+
+        if self.partitioned:
+            dropped = 0
+            async with self.engine.begin() as conn:
+                for name in await self._partition_names(conn):
+                    day = partition_day(name)
+                    # A partition is expired once its whole day is before the cutoff
+                    if day is not None and day + timedelta(days=1) <= cutoff.date():
+                        await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                        dropped += 1
+            return dropped
+
+        deleted = 0
+        while True:
+            async with self.engine.begin() as conn:
+                expired = select(MarketData.id).where(
+                    MarketData.timestamp < cutoff
+                ).limit(self.delete_chunk)
+                result = await conn.execute(delete(MarketData).where(MarketData.id.in_(expired)))
+            deleted += result.rowcount
+            if result.rowcount < self.delete_chunk:
+                return deleted
+
+    async def run_forever(self, interval: float = 3600.0):
+        """Maintain partitions and retention on a fixed interval"""
+        while True:
+            try:
+                await self.ensure_partitions()
+                await self.apply_retention()
+            except Exception as e:
+                print(f"market_data retention failed: {e}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,107 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.trade_setup import TradeSetup
+
+HISTORY_COLUMNS = (
+    TradeSetup.id,
+    TradeSetup.setup_type,
+    TradeSetup.signal_strength,
+    TradeSetup.r_multiple,
+    TradeSetup.entry_price,
+    TradeSetup.stop_loss,
+    TradeSetup.target_price,
+    TradeSetup.timestamp,
+)
+
+Cursor = Tuple[datetime, int]
+
+def encode_cursor(timestamp: datetime, setup_id: int) -> str:
+    """Opaque cursor for the position just after (timestamp, id) in newest-first order"""
+    raw = json.dumps([timestamp.isoformat(), setup_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverse of `encode_cursor`; raises ValueError for anything it did not produce"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, setup_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(setup_id)
+    except (binascii.Error, TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def history_query(
+    symbol: str,
+    after: Optional[Cursor] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Select:
+    """Newest-first setups for a symbol, resuming strictly after `after`.
+
+    Seeks on (symbol, timestamp, id) instead of using OFFSET, so every page
+    costs the same however deep it is. `id` breaks ties between setups that
+    share a timestamp.
+    """
+    stmt = select(*HISTORY_COLUMNS).where(TradeSetup.symbol == symbol)
+    if after is not None:
+        stmt = stmt.where(tuple_(TradeSetup.timestamp, TradeSetup.id) < tuple_(*after))
+    if since is not None:
+        stmt = stmt.where(TradeSetup.timestamp >= since)
+    if until is not None:
+        stmt = stmt.where(TradeSetup.timestamp < until)
+    return stmt.order_by(TradeSetup.timestamp.desc(), TradeSetup.id.desc())
+
+def setup_row(row) -> Dict[str, Any]:
+    return {
+        "setup_type": row.setup_type,
+        "signal_strength": row.signal_strength,
+        "r_multiple": row.r_multiple,
+        "entry_price": row.entry_price,
+        "stop_loss": row.stop_loss,
+        "target_price": row.target_price,
+        "timestamp": row.timestamp.isoformat()
+    }
+
+async def fetch_history_page(
+    db: AsyncSession,
+    symbol: str,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of setups and the cursor for the next page (None on the last one)"""
+    after = decode_cursor(cursor) if cursor else None
+    result = await db.execute(history_query(symbol, after).limit(limit + 1))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return [setup_row(row) for row in rows], next_cursor
+
+async def stream_history(
+    db: AsyncSession,
+    symbol: str,
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    chunk_size: int = 1000
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield setups newest first as the database returns them.
+
+    Rows arrive through a server-side cursor `chunk_size` at a time, so memory
+    stays flat however much history is exported.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    stmt = history_query(symbol, after, since, until).execution_options(yield_per=chunk_size)
+    result = await db.stream(stmt)
+    try:
+        async for partition in result.partitions():
+            for row in partition:
+                yield setup_row(row)
+    finally:
+        await result.close()
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.base import async_session
+from ..models.trade_setup import TradeSetup
+
+SETUP_FIELDS = ("setup_type", "signal_strength", "r_multiple", "entry_price", "stop_loss", "target_price")
+
+logger = logging.getLogger(__name__)
+
+def database_unavailable(error: Exception) -> bool:
+    """Whether a failed insert says nothing about the rows themselves (lost connection, missing table)"""
+    if isinstance(error, DBAPIError):
+        return isinstance(error, OperationalError) or error.connection_invalidated
+    return isinstance(error, OSError)
+
+class TradeSetupWriter:
+    """Persists analysed setups in the background, in batched multi-row inserts.
+
+    Request handlers only enqueue, so they return as soon as analysis is done.
+    A setup identical to the previous one queued for its symbol is skipped. The
+    queue is bounded: when full, new setups are dropped (and counted) rather
+    than holding up the caller.
+
+    A failed flush keeps its rows and is retried with exponential backoff.
+    After `max_attempts` failures in a row the batch is written in halves, so
+    a row the database refuses is found and rejected (and counted) instead of
+    blocking everything queued behind it.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_pending: int = 10000,
+        max_attempts: int = 3,
+        max_retry_delay: float = 30.0
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.max_retry_delay = max_retry_delay
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._last: Dict[str, Tuple] = {}  # last setup fields queued per symbol
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self._failures = 0  # consecutive failed flushes
+        self._retry_at = 0.0
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.written = 0
+        self.rejected = 0
+        self.failed_flushes = 0
+        self.flush_seconds = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def start(self):
+        """Start the background flusher"""
+        if self._task is None:
+            self._running = True
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write out anything still queued"""
+        self._running = False
+        if self._task is not None:
+            self._flush_requested.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            if time.monotonic() < self._retry_at:
+                continue  # backing off after a failed flush
+            try:
+                await self.flush()
+            except Exception:
+                # Keep the rows for the next attempt; a bad batch must not stop the writer
+                self.failed_flushes += 1
+                logger.exception("trade setup flush failed (%d in a row)", self._failures)
+
+    def submit(self, symbol: str, setup: Dict[str, Any], timestamp: Optional[datetime] = None) -> bool:
+        """Queue a setup for writing; False if it was a duplicate or the queue is full"""
+        self.submitted += 1
+        fields = tuple(setup[name] for name in SETUP_FIELDS)
+        if self._last.get(symbol) == fields:
+            self.deduplicated += 1
+            return False
+        if len(self._buffer) >= self.max_pending:
+            self.dropped += 1
+            return False
+
+        self._last[symbol] = fields
+        self._buffer.append({
+            "symbol": symbol,
+            **dict(zip(SETUP_FIELDS, fields)),
+            "timestamp": timestamp or datetime.utcnow(),
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._flush_requested.set()
+        return True
+
+    async def flush(self) -> int:
+        """Write every queued setup in one multi-row insert; returns rows written"""
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+            rows, self._buffer = self._buffer, []
+            isolate = self._failures >= self.max_attempts
+            chunks = [rows]  # a stack, next chunk to write last
+            written = 0
+            started = time.perf_counter()
+            try:
+                while chunks:
+                    chunk = chunks[-1]
+                    try:
+                        await self._insert(chunk)
+                    except Exception as e:
+                        if not isolate or database_unavailable(e):
+                            raise
+                        chunks.pop()
+                        if len(chunk) == 1:
+                            self.rejected += 1
+                            logger.error("rejected trade setup for %s: %s", chunk[0]["symbol"], e)
+                        else:
+                            middle = len(chunk) // 2
+                            chunks += [chunk[middle:], chunk[:middle]]
+                        continue
+                    chunks.pop()
+                    written += len(chunk)
+            except Exception:
+                self._buffer = [row for chunk in reversed(chunks) for row in chunk] + self._buffer
+                self._failures += 1
+                self._retry_at = time.monotonic() + min(
+                    self.flush_interval * 2 ** (self._failures - 1), self.max_retry_delay
+                )
+                raise
+            finally:
+                self.written += written
+                self.flush_seconds += time.perf_counter() - started
+            self._failures = 0
+            self._retry_at = 0.0
+            return written
+
+    async def _insert(self, rows: List[Dict[str, Any]]):
+        async with self.session_factory() as session:
+            await session.execute(insert(TradeSetup), rows)
+            await session.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "written": self.written,
+            "rejected": self.rejected,
+            "failed_flushes": self.failed_flushes,
+        }
@@ -1,19 +1,95 @@
-from typing import Dict, Optional
+import asyncio
+import random
+from typing import Dict, Iterable, Optional, Union
 import aiohttp
 from ..core.config import Settings
+from .market_processor import MarketProcessor, PriceWindow
+from .rate_limit import TokenBucket
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class TradingViewError(Exception):
+    """A TradingView request failed, after any retries"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
 
 class TradingViewService:
+    """TradingView REST client.
+
+    One pooled keep-alive session per service, with DNS caching and per-attempt
+    timeouts. Every request, retries included, takes a token from a shared
+    rate limiter. Transient failures (connection errors, timeouts, 429 and 5xx)
+    are retried with full-jitter exponential backoff, and concurrent requests
+    for the same symbol share one in-flight fetch.
+    """
+
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.base_url = "https://api.tradingview.com/v1"
+        self.base_url = settings.TRADINGVIEW_BASE_URL.rstrip("/")
         self.session: Optional[aiohttp.ClientSession] = None
+        self.rate_limiter = TokenBucket(settings.TRADINGVIEW_RATE_LIMIT, settings.TRADINGVIEW_RATE_BURST)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.processor = MarketProcessor()
+        # Last TRADINGVIEW_WINDOW_SIZE ticks per symbol, for live signals
+        self.windows: Dict[str, PriceWindow] = {}
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.merged = 0  # calls that joined another caller's in-flight fetch
 
     async def _ensure_session(self):
         if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.settings.TRADINGVIEW_MAX_CONNECTIONS,
+                limit_per_host=self.settings.TRADINGVIEW_MAX_CONNECTIONS,
+                ttl_dns_cache=self.settings.TRADINGVIEW_DNS_CACHE_TTL,
+                keepalive_timeout=30
+            )
             self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.settings.TRADINGVIEW_TIMEOUT),
                 headers={"Authorization": f"Bearer {self.settings.TRADINGVIEW_API_KEY}"}
             )
 
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.settings.TRADINGVIEW_BACKOFF_MAX)
+            except ValueError:
+                pass
+        ceiling = min(self.settings.TRADINGVIEW_BACKOFF_MAX, self.settings.TRADINGVIEW_BACKOFF_BASE * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    async def _get_json(self, path: str) -> Dict:
+        """GET `path`, retrying transient failures; raises TradingViewError"""
+        await self._ensure_session()
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            self.requests += 1
+            retry_after = None
+            try:
+                async with self.session.get(f"{self.base_url}{path}") as response:
+                    if response.status == 200:
+                        return await response.json()
+                    error = TradingViewError(f"Failed to fetch {path}: {response.status}", response.status)
+                    if response.status not in RETRYABLE_STATUSES:
+                        self.failures += 1
+                        raise error
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = TradingViewError(f"Failed to fetch {path}: {e!r}")
+            
+            if attempt >= self.settings.TRADINGVIEW_MAX_RETRIES:
+                self.failures += 1
+                raise error
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+            attempt += 1
+
     async def test_connection(self) -> bool:
         """Test connection to TradingView API"""
         try:
@@ -24,46 +100,83 @@ class TradingViewService:
             print(f"Connection test failed: {e}")
             return False
 
+    async def _fetch_market_data(self, symbol: str) -> Dict:
+        data = await self._get_json(f"/markets/{symbol}")
+        return {
+            "symbol": symbol,
+            "price": data.get("price"),
+            "volume": data.get("volume"),
+            "timestamp": data.get("timestamp")
+        }
+
     async def get_market_data(self, symbol: str) -> Dict:
         """Fetch market data for a given symbol"""
-        await self._ensure_session()
-        async with self.session.get(
-            f"{self.base_url}/markets/{symbol}"
-        ) as response:
-            if response.status == 200:
-                data = await response.json()
-                return {
-                    "symbol": symbol,
-                    "price": data.get("price"),
-                    "timestamp": data.get("timestamp")
-                }
-            raise Exception(f"Failed to fetch market data: {response.status}")
+        task = self._inflight.get(symbol)
+        if task is None:
+            task = asyncio.create_task(self._fetch_market_data(symbol))
+            self._inflight[symbol] = task
+            task.add_done_callback(lambda _: self._inflight.pop(symbol, None))
+        else:
+            self.merged += 1
+        # Shielded so one caller giving up does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def get_market_data_batch(
+        self,
+        symbols: Iterable[str],
+        return_exceptions: bool = False
+    ) -> Dict[str, Union[Dict, Exception]]:
+        """Fetch many symbols concurrently, keyed by symbol.
+
+        Concurrency is bounded by the connection pool and the rate limiter.
+        With `return_exceptions`, a failed symbol maps to its exception instead
+        of failing the whole batch.
+        """
+        unique = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(
+            *(self.get_market_data(symbol) for symbol in unique),
+            return_exceptions=return_exceptions
+        )
+        return dict(zip(unique, results))
+
+    def update_window(self, market_data: Dict) -> PriceWindow:
+        """Fold a fetched tick into its symbol's rolling window"""
+        window = self.windows.get(market_data["symbol"])
+        if window is None:
+            window = self.windows[market_data["symbol"]] = PriceWindow(self.settings.TRADINGVIEW_WINDOW_SIZE)
+        if market_data.get("price") is not None:
+            window.append(market_data["price"], market_data.get("volume") or 0.0, market_data.get("timestamp"))
+        return window
 
     async def process_market_data(self, symbol: str) -> Dict:
         """Process market data to identify A+ setups"""
         market_data = await self.get_market_data(symbol)
+        window = self.update_window(market_data)
+        if len(window) == 0:
+            # Nothing priced yet for this symbol, so there is no series to analyse
+            raise TradingViewError(f"No price received for {symbol}")
         
-        # TODO: Implement actual signal processing logic
+        # Signals come from the in-memory window, with no database round-trip
+        ctx = self.processor.build_context(window.series())
+        setup = self.processor.identify_setup(ctx)
         return {
-            "momentum_signal": self._calculate_momentum(market_data),
-            "mean_reversion_signal": self._calculate_mean_reversion(market_data),
-            "r_multiple": self._calculate_r_multiple(market_data)
+            "symbol": symbol,
+            "price": market_data["price"],
+            "momentum_signal": self.processor.calculate_momentum_signal(ctx).value,
+            "mean_reversion_signal": self.processor.calculate_mean_reversion_signal(ctx).value,
+            "r_multiple": setup["r_multiple"],
+            "window": len(window)
         }
 
-    def _calculate_momentum(self, data: Dict) -> str:
-        """Calculate momentum signal"""
-        # TODO: Implement momentum calculation
-        return "neutral"
-
-    def _calculate_mean_reversion(self, data: Dict) -> str:
-        """Calculate mean reversion signal"""
-        # TODO: Implement mean reversion calculation
-        return "neutral"
-
-    def _calculate_r_multiple(self, data: Dict) -> float:
-        """Calculate R-multiple"""
-        # TODO: Implement R-multiple calculation
-        return 1.0
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "merged": self.merged,
+            "inflight": len(self._inflight),
+            "rate_limiter": self.rate_limiter.stats(),
+        }
 
     async def close(self):
         """Close the API session"""
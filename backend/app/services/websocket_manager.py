@@ -1,18 +1,104 @@
 from fastapi import WebSocket
-from typing import List, Dict, Set, Any
-import json
+from typing import List, Dict, Iterable, Optional, Set, Tuple, Any
+import asyncio
+import time
 from ..models.market_data import MarketData
+from .client_queue import ClientSendQueue, OverflowPolicy
+from .pubsub import LocalBus, MessageBus
+from .wire_format import SymbolTable, WireFormat, encode_message, negotiate
 from datetime import datetime
 
+_MISSING = object()
+
+# How often rate-limited clients are re-checked when ticks are not coalesced
+DEFERRED_RETRY_INTERVAL = 0.05
+
+def field_delta(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of `current` that differ from `previous`; empty if nothing changed"""
+    if previous is None:
+        return current
+    delta = {key: value for key, value in current.items() if previous.get(key, _MISSING) != value}
+    if delta:
+        delta["symbol"] = current["symbol"]
+    return delta
+
+class SymbolSubscription:
+    """Rate limit and delta baseline for one client's subscription to one symbol"""
+    __slots__ = ("min_interval", "next_send", "sent", "base")
+
+    def __init__(self, max_rate: Optional[float] = None):
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.next_send = 0.0
+        self.sent: Optional[Dict[str, Any]] = None  # last snapshot queued to the client
+        self.base: Optional[Dict[str, Any]] = None  # snapshot the client holds before `sent`
+
 class WebSocketManager:
-    def __init__(self):
+    def __init__(
+        self,
+        send_timeout: float = 1.0,
+        queue_size: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.CONFLATE,
+        coalesce_interval: Optional[float] = None,
+        bus: Optional[MessageBus] = None
+    ):
         self.active_connections: List[WebSocket] = []
         self.symbol_subscriptions: Dict[str, Set[WebSocket]] = {}
+        self.subscriptions: Dict[WebSocket, Dict[str, SymbolSubscription]] = {}
+        self.send_queues: Dict[WebSocket, ClientSendQueue] = {}
+        self.client_formats: Dict[WebSocket, WireFormat] = {}
+        self.user_connections: Dict[str, Set[WebSocket]] = {}
+        self.connection_users: Dict[WebSocket, str] = {}
+        self.symbol_ids = SymbolTable()
+        self.send_timeout = send_timeout
+        self.queue_size = queue_size
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        
+        # Ticks are merged per symbol and pushed every `coalesce_interval` seconds;
+        # None pushes each tick as it arrives
+        self.coalesce_interval = coalesce_interval or None
+        self.latest_ticks: Dict[str, Dict[str, Any]] = {}
+        self.ticks_received = 0
+        self.updates_sent = 0
+        self._dirty: Set[str] = set()
+        self._deferred: Dict[str, Set[WebSocket]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        
+        # Broadcasts go through the bus so clients connected to other workers see them too
+        self.bus: MessageBus = LocalBus()
+        self.attach_bus(bus or self.bus)
+
+    def attach_bus(self, bus: MessageBus):
+        """Route broadcasts through `bus` and deliver what it carries to local clients"""
+        self.bus = bus
+        bus.subscribe(self._on_bus_message)
+
+    def _on_bus_message(self, channel: str, payload: Dict[str, Any]):
+        if channel == "market_data":
+            timestamp = payload.get("timestamp")
+            if isinstance(timestamp, str):
+                payload["timestamp"] = datetime.fromisoformat(timestamp)
+            self.deliver_market_data(payload)
+        elif channel == "setup_alert":
+            self.deliver_setup_alert(payload)
+        elif channel == "user_alert":
+            self.deliver_user_alert(payload)
 
-    async def connect(self, websocket: WebSocket):
-        """Connect a new client"""
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, user_id: Optional[str] = None):
+        """Connect a new client, agreeing on a wire format via the WebSocket subprotocol.
+
+        Connections opened with a `user_id` also receive that user's rule alerts.
+        """
+        subprotocol, wire_format = negotiate(getattr(websocket, "scope", {}).get("subprotocols", ()))
+        if subprotocol is not None:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
         self.active_connections.append(websocket)
+        self.client_formats[websocket] = wire_format
+        if user_id is not None:
+            self.user_connections.setdefault(user_id, set()).add(websocket)
+            self.connection_users[websocket] = user_id
+        self._queue_for(websocket)
 
     async def disconnect(self, websocket: WebSocket):
         """Disconnect a client"""
@@ -22,12 +108,46 @@ class WebSocketManager:
         # Remove from all symbol subscriptions
         for subscribers in self.symbol_subscriptions.values():
             subscribers.discard(websocket)
+        for waiting in self._deferred.values():
+            waiting.discard(websocket)
+        self.subscriptions.pop(websocket, None)
+        self.client_formats.pop(websocket, None)
+        user_id = self.connection_users.pop(websocket, None)
+        if user_id is not None:
+            connections = self.user_connections[user_id]
+            connections.discard(websocket)
+            if not connections:
+                del self.user_connections[user_id]
+        
+        queue = self.send_queues.pop(websocket, None)
+        if queue is not None:
+            await queue.close()
+
+    def _queue_for(self, websocket: WebSocket) -> ClientSendQueue:
+        """The connection's outbound queue, started on first use"""
+        queue = self.send_queues.get(websocket)
+        if queue is None:
+            queue = self.send_queues[websocket] = ClientSendQueue(
+                websocket,
+                max_size=self.queue_size,
+                policy=self.overflow_policy,
+                send_timeout=self.send_timeout,
+                on_failure=self.disconnect
+            )
+            queue.start()
+        return queue
 
-    async def subscribe_to_symbol(self, websocket: WebSocket, symbol: str):
-        """Subscribe a client to a symbol"""
+    async def subscribe_to_symbol(self, websocket: WebSocket, symbol: str, max_rate: Optional[float] = None):
+        """Subscribe a client to a symbol, optionally capped at `max_rate` updates per second"""
         if symbol not in self.symbol_subscriptions:
             self.symbol_subscriptions[symbol] = set()
         self.symbol_subscriptions[symbol].add(websocket)
+        self.subscriptions.setdefault(websocket, {})[symbol] = SymbolSubscription(max_rate)
+        
+        # Bring the new subscriber up to date on the next flush
+        if symbol in self.latest_ticks:
+            self._deferred.setdefault(symbol, set()).add(websocket)
+            self._ensure_flusher()
 
     async def unsubscribe_from_symbol(self, websocket: WebSocket, symbol: str):
         """Unsubscribe a client from a symbol"""
@@ -35,56 +155,212 @@ class WebSocketManager:
             self.symbol_subscriptions[symbol].discard(websocket)
             if not self.symbol_subscriptions[symbol]:
                 del self.symbol_subscriptions[symbol]
+        self.subscriptions.get(websocket, {}).pop(symbol, None)
+        self._deferred.get(symbol, set()).discard(websocket)
 
-    async def broadcast_market_data(self, market_data: MarketData):
-        """Broadcast market data to subscribed clients"""
-        message = {
-            "type": "market_data",
-            "data": {
-                "symbol": market_data.symbol,
-                "price": market_data.price,
-                "volume": market_data.volume,
-                "timestamp": market_data.timestamp.isoformat(),
-                "sma_20": market_data.sma_20,
-                "sma_50": market_data.sma_50,
-                "rsi": market_data.rsi,
-                "momentum_score": market_data.momentum_score,
-                "mean_reversion_score": market_data.mean_reversion_score
+    def _encode_for(self, websocket: WebSocket, message: Dict[str, Any]):
+        return encode_message(
+            message, self.client_formats.get(websocket, WireFormat.JSON), self.symbol_ids
+        )
+
+    def _fan_out(self, connections: Iterable[WebSocket], message: Dict[str, Any]):
+        """Serialize a message once per wire format and enqueue it for every connection"""
+        targets = list(connections)
+        if not targets:
+            return
+        
+        payloads: Dict[WireFormat, Any] = {}
+        kind = message["type"]
+        for websocket in targets:
+            wire_format = self.client_formats.get(websocket, WireFormat.JSON)
+            if wire_format not in payloads:
+                payloads[wire_format] = encode_message(message, wire_format, self.symbol_ids)
+            self._queue_for(websocket).put(payloads[wire_format], kind)
+
+    async def send_personal_message(self, websocket: WebSocket, message: Dict[str, Any]):
+        """Queue a message for one client behind anything already pending for it"""
+        self._queue_for(websocket).put(self._encode_for(websocket, message), message["type"])
+
+    def client_stats(self) -> List[Dict[str, Any]]:
+        """Wire format, queue depth, drops and conflations for every connection"""
+        return [
+            {
+                "client": str(getattr(websocket, "client", None)),
+                "format": self.client_formats.get(websocket, WireFormat.JSON).value,
+                **queue.stats()
             }
+            for websocket, queue in self.send_queues.items()
+        ]
+
+    async def drain(self):
+        """Wait until every client queue has been flushed to its socket"""
+        await asyncio.gather(*(queue.drain() for queue in list(self.send_queues.values())))
+
+    def _publish(self, symbol: str, targets: Iterable[WebSocket], now: float):
+        """Queue the latest tick for `symbol` to each target as a delta against what it last got"""
+        data = self.latest_ticks.get(symbol)
+        if data is None:
+            return
+        
+        # Clients that received the same snapshot get the same delta, so encode once
+        # per (wire format, baseline)
+        payloads: Dict[Tuple[WireFormat, Optional[int]], Any] = {}
+        for websocket in list(targets):
+            subscription = self.subscriptions.setdefault(websocket, {}).get(symbol)
+            if subscription is None:
+                subscription = self.subscriptions[websocket][symbol] = SymbolSubscription()
+            if now < subscription.next_send:
+                self._deferred.setdefault(symbol, set()).add(websocket)
+                continue
+            
+            queue = self._queue_for(websocket)
+            if queue.pop_evicted(symbol):
+                # An update was dropped on the way out; resync with a full snapshot
+                subscription.sent = subscription.base = None
+            if not queue.will_conflate(symbol):
+                subscription.base = subscription.sent
+            # Otherwise the queued update is replaced, so diff against what the client had before it
+            
+            base = subscription.base
+            wire_format = self.client_formats.get(websocket, WireFormat.JSON)
+            key = (wire_format, None if base is None else id(base))
+            if key not in payloads:
+                delta = field_delta(base, data)
+                payloads[key] = encode_message({
+                    "type": "market_data",
+                    "data": delta,
+                    "delta": base is not None
+                }, wire_format, self.symbol_ids) if delta else None
+            payload = payloads[key]
+            if payload is None:
+                continue
+            
+            if queue.put(payload, "market_data", symbol):
+                subscription.sent = data
+                subscription.next_send = now + subscription.min_interval
+                self.updates_sent += 1
+            else:
+                subscription.sent = subscription.base = None
+
+    def flush_ticks(self):
+        """Push coalesced ticks and any updates held back by client rate limits"""
+        now = time.monotonic()
+        dirty, self._dirty = self._dirty, set()
+        deferred, self._deferred = self._deferred, {}
+        for symbol in dirty | set(deferred):
+            subscribers = self.symbol_subscriptions.get(symbol, set())
+            targets = subscribers if symbol in dirty else deferred[symbol] & subscribers
+            self._publish(symbol, targets, now)
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run_flusher())
+
+    async def _run_flusher(self):
+        interval = self.coalesce_interval or DEFERRED_RETRY_INTERVAL
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                self.flush_ticks()
+                if not self._dirty and not self._deferred:
+                    return
+        finally:
+            self._flusher = None
+
+    async def close(self):
+        """Stop the tick flusher and every client writer"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+        for websocket in list(self.send_queues):
+            await self.disconnect(websocket)
+
+    def feed_stats(self) -> Dict[str, Any]:
+        """Tick intake vs. updates actually queued to clients"""
+        return {
+            "ticks_received": self.ticks_received,
+            "updates_sent": self.updates_sent,
+            "coalesce_interval": self.coalesce_interval,
         }
+
+    async def broadcast_market_data(self, market_data: MarketData):
+        """Broadcast market data to subscribed clients in every worker"""
+        await self.bus.publish("market_data", {
+            "symbol": market_data.symbol,
+            "price": market_data.price,
+            "volume": market_data.volume,
+            "timestamp": market_data.timestamp,  # ISO-8601 in JSON, epoch ns in binary formats
+            "sma_20": market_data.sma_20,
+            "sma_50": market_data.sma_50,
+            "rsi": market_data.rsi,
+            "momentum_score": market_data.momentum_score,
+            "mean_reversion_score": market_data.mean_reversion_score
+        })
+
+    def deliver_market_data(self, data: Dict[str, Any]):
+        """Push a tick to this worker's subscribers, coalesced and as per-client deltas"""
+        self.latest_ticks[data["symbol"]] = data
+        self.ticks_received += 1
         
-        # Broadcast to subscribers of this symbol
-        if market_data.symbol in self.symbol_subscriptions:
-            for connection in self.symbol_subscriptions[market_data.symbol]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    await self.disconnect(connection)
+        if self.coalesce_interval is None:
+            self._publish(
+                data["symbol"],
+                self.symbol_subscriptions.get(data["symbol"], ()),
+                time.monotonic()
+            )
+            if self._deferred:
+                self._ensure_flusher()
+        else:
+            self._dirty.add(data["symbol"])
+            self._ensure_flusher()
 
     async def broadcast_setup_alert(self, setup_alert: Dict[str, Any]):
-        """Broadcast setup alerts to subscribed clients"""
-        message = {
+        """Broadcast setup alerts to subscribed clients in every worker"""
+        await self.bus.publish("setup_alert", {
             "type": "setup_alert",
             "data": setup_alert,
             "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        # Broadcast to subscribers of this symbol
-        symbol = setup_alert.get("symbol")
-        if symbol and symbol in self.symbol_subscriptions:
-            for connection in self.symbol_subscriptions[symbol]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    await self.disconnect(connection)
+        })
+
+    def deliver_setup_alert(self, message: Dict[str, Any]):
+        """Send a setup alert message to this worker's subscribers of its symbol"""
+        symbol = message["data"].get("symbol")
+        if symbol:
+            self._fan_out(self.symbol_subscriptions.get(symbol, ()), message)
+
+    async def broadcast_rule_alert(self, alert: Dict[str, Any]):
+        """Send an `AlertEngine` alert to each matched user's connections in every worker.
+
+        Each user gets only their own matches, never the rules of other users.
+        """
+        matches_by_user: Dict[str, List[Dict[str, Any]]] = {}
+        for match in alert["matches"]:
+            matches_by_user.setdefault(match["user_id"], []).append(match)
+        timestamp = datetime.utcnow().isoformat()
+        for user_id, matches in matches_by_user.items():
+            await self.bus.publish("user_alert", {
+                "user_id": user_id,
+                "message": {
+                    "type": "setup_alert",
+                    "data": {**alert, "matches": matches},
+                    "timestamp": timestamp
+                }
+            })
+
+    def deliver_user_alert(self, payload: Dict[str, Any]):
+        """Send a rule alert to this worker's connections of its user"""
+        self._fan_out(self.user_connections.get(payload["user_id"], ()), payload["message"])
 
     async def broadcast_error(self, websocket: WebSocket, error: str):
         """Send error message to a specific client"""
-        try:
-            await websocket.send_json({
-                "type": "error",
-                "message": error,
-                "timestamp": datetime.utcnow().isoformat()
-            })
-        except Exception:
-            await self.disconnect(websocket)
+        await self.send_personal_message(websocket, {
+            "type": "error",
+            "message": error,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        # Callers usually disconnect right after; give the error a chance to go out first
+        queue = self.send_queues.get(websocket)
+        if queue is not None:
+            try:
+                await asyncio.wait_for(queue.drain(), self.send_timeout)
+            except asyncio.TimeoutError:
+                pass
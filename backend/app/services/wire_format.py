@@ -0,0 +1,185 @@
+import json
+import math
+import struct
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # optional fast encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional binary encoder
+    msgpack = None
+
+class WireFormat(str, Enum):
+    JSON = "json"
+    MSGPACK = "msgpack"  # every message as a MessagePack binary frame
+    STRUCT = "struct"  # market_data as fixed-layout binary frames, everything else JSON text
+
+# WebSocket subprotocols a client can offer, in the server's order of preference
+SUBPROTOCOLS = {
+    "traffic-light.struct.v1": WireFormat.STRUCT,
+    "traffic-light.msgpack.v1": WireFormat.MSGPACK,
+    "traffic-light.json.v1": WireFormat.JSON,
+}
+
+# Struct tick frame, little-endian:
+#   u8 kind, u8 flags, u16 symbol id, u16 field mask,
+#   then one value per set mask bit in TICK_FIELDS order
+#   (timestamp as i64 epoch nanoseconds, the rest as f64 with NaN for null)
+TICK_KIND_MARKET_DATA = 1
+TICK_FLAG_DELTA = 1
+TICK_HEADER = "<BBHH"
+TICK_FIELDS = (
+    ("timestamp", "q"),
+    ("price", "d"),
+    ("volume", "d"),
+    ("sma_20", "d"),
+    ("sma_50", "d"),
+    ("rsi", "d"),
+    ("momentum_score", "d"),
+    ("mean_reversion_score", "d"),
+)
+
+MAX_SYMBOL_ID = 0xFFFF  # ids travel as u16
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_tick_structs: Dict[int, struct.Struct] = {}
+_tick_layouts: Dict[Tuple[str, ...], Tuple[struct.Struct, int, Tuple[str, ...]]] = {}
+
+def negotiate(offered: Iterable[str]) -> Tuple[Optional[str], WireFormat]:
+    """First offered subprotocol this server can speak; plain JSON if none match"""
+    for name in offered:
+        wire_format = SUBPROTOCOLS.get(name)
+        if wire_format is WireFormat.MSGPACK and msgpack is None:
+            continue
+        if wire_format is not None:
+            return name, wire_format
+    return None, WireFormat.JSON
+
+def epoch_ns(value: datetime) -> int:
+    """Nanoseconds since the Unix epoch; naive datetimes are taken as UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MICROSECOND * 1000
+
+class SymbolTableFull(ValueError):
+    """Every u16 symbol id is taken"""
+
+class SymbolTable:
+    """Stable small integer ids for symbols, shared by every binary client.
+
+    Ids are never reused, since clients keep the mapping they were given;
+    once MAX_SYMBOL_ID is handed out, new symbols raise SymbolTableFull.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.symbols: Dict[int, str] = {}
+
+    def id_for(self, symbol: str) -> int:
+        symbol_id = self.ids.get(symbol)
+        if symbol_id is None:
+            if len(self.ids) >= MAX_SYMBOL_ID:
+                raise SymbolTableFull(f"no symbol id left for {symbol}")
+            symbol_id = self.ids[symbol] = len(self.ids) + 1
+            self.symbols[symbol_id] = symbol
+        return symbol_id
+
+def _json_default(value: Any) -> Any:
+    """Fallback for datetimes, NumPy scalars and other float/int-like values"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _finite(value: Any) -> Any:
+    """`value` with NaN and infinities as None, the way orjson writes them"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+def _finite_json_default(value: Any) -> Any:
+    return _finite(_json_default(value))
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return epoch_ns(value)
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+def _tick_layout(keys: Tuple[str, ...]) -> Tuple[struct.Struct, int, Tuple[str, ...]]:
+    """Struct, field mask and packed field order for a data dict with these keys"""
+    layout = _tick_layouts.get(keys)
+    if layout is None:
+        mask = 0
+        names = []
+        for bit, (name, _) in enumerate(TICK_FIELDS):
+            if name in keys:
+                mask |= 1 << bit
+                names.append(name)
+        layout = _tick_layouts[keys] = (_tick_struct(mask), mask, tuple(names))
+    return layout
+
+def _tick_struct(mask: int) -> struct.Struct:
+    layout = _tick_structs.get(mask)
+    if layout is None:
+        codes = "".join(code for bit, (_, code) in enumerate(TICK_FIELDS) if mask & (1 << bit))
+        layout = _tick_structs[mask] = struct.Struct(TICK_HEADER + codes)
+    return layout
+
+def encode_tick(message: Dict[str, Any], symbols: SymbolTable) -> bytes:
+    """Pack a market_data message (full or delta) into a struct tick frame"""
+    data = message["data"]
+    layout, mask, names = _tick_layout(tuple(data))
+    values = [data[name] for name in names]
+    if mask & 1:
+        timestamp = values[0]
+        values[0] = epoch_ns(timestamp) if isinstance(timestamp, datetime) else int(timestamp)
+    if None in values:
+        values = [math.nan if value is None else value for value in values]
+    flags = TICK_FLAG_DELTA if message.get("delta") else 0
+    return layout.pack(TICK_KIND_MARKET_DATA, flags, symbols.id_for(data["symbol"]), mask, *values)
+
+def decode_tick(frame: bytes, symbols: SymbolTable) -> Dict[str, Any]:
+    """Inverse of `encode_tick`, with timestamps left as epoch nanoseconds"""
+    _, flags, symbol_id, mask = struct.unpack_from(TICK_HEADER, frame)
+    values = iter(_tick_struct(mask).unpack(frame)[4:])
+    data: Dict[str, Any] = {"symbol": symbols.symbols[symbol_id]}
+    for bit, (name, _) in enumerate(TICK_FIELDS):
+        if mask & (1 << bit):
+            value = next(values)
+            data[name] = None if isinstance(value, float) and math.isnan(value) else value
+    return {"type": "market_data", "data": data, "delta": bool(flags & TICK_FLAG_DELTA)}
+
+def encode_message(
+    message: Dict[str, Any],
+    wire_format: WireFormat = WireFormat.JSON,
+    symbols: Optional[SymbolTable] = None
+) -> Union[str, bytes]:
+    """Serialize a message once so it can be sent to every recipient as-is"""
+    if wire_format is WireFormat.STRUCT and message["type"] == "market_data":
+        try:
+            return encode_tick(message, symbols or SymbolTable())
+        except SymbolTableFull:
+            pass  # sent as JSON text, which struct clients read for every other message
+    if wire_format is WireFormat.MSGPACK:
+        return msgpack.packb(message, default=_msgpack_default)
+    if orjson is not None:
+        return orjson.dumps(message, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    try:
+        return json.dumps(message, default=_json_default, separators=(",", ":"), allow_nan=False)
+    except ValueError:
+        # NaN or infinity somewhere: null, as with orjson, rather than invalid JSON
+        return json.dumps(_finite(message), default=_finite_json_default, separators=(",", ":"), allow_nan=False)
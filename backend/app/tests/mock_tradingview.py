@@ -0,0 +1,201 @@
+"""In-process stand-ins for the TradingView REST API and streaming feed, for
+tests and benchmarks"""
+import asyncio
+import json
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from aiohttp import web
+
+class MockTradingView:
+    """Serves /test and /markets/{symbol} on a local port.
+
+    `latency` delays every response. `failures[symbol] = n` makes the next n
+    requests for that symbol return `failure_status`. `unknown` symbols get a
+    404. Request counts, peak concurrency and distinct client connections are
+    recorded so tests can check pooling, retries and request merging.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_status: int = 503):
+        self.latency = latency
+        self.failure_status = failure_status
+        self.failures: Dict[str, int] = {}
+        self.unknown = set()
+        self.requests: Counter = Counter()
+        self.active = 0
+        self.peak_active = 0
+        self.connections = set()
+        self.request_times = []
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/v1/test", self._test)
+        app.router.add_get("/v1/markets/{symbol}", self._market)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{port}/v1"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _test(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    async def _market(self, request: web.Request) -> web.Response:
+        symbol = request.match_info["symbol"]
+        self.requests[symbol] += 1
+        self.request_times.append(time.monotonic())
+        self.connections.add(id(request.transport))
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if symbol in self.unknown:
+                return web.json_response({"error": "unknown symbol"}, status=404)
+            if self.failures.get(symbol, 0) > 0:
+                self.failures[symbol] -= 1
+                return web.json_response({"error": "unavailable"}, status=self.failure_status)
+            return web.json_response({
+                "symbol": symbol,
+                "price": 100.0 + len(symbol),
+                "volume": 1000.0,
+                "timestamp": time.time(),
+            })
+        finally:
+            self.active -= 1
+
+class _FeedConnection:
+    def __init__(self, ws: web.WebSocketResponse, symbols: Set[str]):
+        self.ws = ws
+        self.symbols = symbols
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+class MockMarketFeed:
+    """Replays ticks over a websocket in the streaming feed protocol.
+
+    Each symbol's ticks carry their own increasing `seq`, and the last
+    `history` of them are kept for resume and replay requests; older ones are
+    reported as a `gap`. `drop(symbol, n)` loses the next n live ticks of a
+    symbol on every connection, and `disconnect_all()` drops every client, to
+    exercise gap filling and reconnects.
+    """
+
+    def __init__(self, history: int = 1000):
+        self.history = history
+        self.seqs: Counter = Counter()
+        self.buffers: Dict[str, Deque[Tuple[int, str]]] = {}
+        self.connections: List[_FeedConnection] = []
+        self.drops: Counter = Counter()
+        self.subscribes = 0
+        self.replay_requests = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/v1/stream", self._stream)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/v1/stream"
+        return self.url
+
+    async def stop(self):
+        await self.disconnect_all()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def publish(self, symbol: str, price: float, volume: float = 0.0, timestamp: Any = None) -> int:
+        """Append a tick to the feed and send it to every subscriber of its symbol"""
+        self.seqs[symbol] += 1
+        seq = self.seqs[symbol]
+        message = json.dumps({
+            "type": "tick",
+            "seq": seq,
+            "symbol": symbol,
+            "price": price,
+            "volume": volume,
+            "timestamp": timestamp if timestamp is not None else time.time(),
+        })
+        self.buffers.setdefault(symbol, deque(maxlen=self.history)).append((seq, message))
+        if self.drops[symbol] > 0:
+            self.drops[symbol] -= 1
+            return seq
+        for connection in self.connections:
+            if symbol in connection.symbols:
+                connection.queue.put_nowait(message)
+        return seq
+
+    async def replay(self, ticks: Iterable[Dict[str, Any]], interval: float = 0.0):
+        """Publish recorded ticks (`get_market_data` dicts), `interval` seconds apart"""
+        for tick in ticks:
+            self.publish(tick["symbol"], tick["price"], tick.get("volume") or 0.0, tick.get("timestamp"))
+            await asyncio.sleep(interval)
+
+    def send_raw(self, message: str):
+        """Send a message as is to every connection, bypassing the protocol"""
+        for connection in self.connections:
+            connection.queue.put_nowait(message)
+
+    def drop(self, symbol: str, count: int = 1):
+        self.drops[symbol] += count
+
+    async def disconnect_all(self):
+        for connection in list(self.connections):
+            await connection.ws.close()
+
+    def _backlog(self, symbol: str, first: int, last: Optional[int] = None) -> List[str]:
+        """Buffered ticks with first <= seq <= last, led by a gap notice for any no longer kept"""
+        buffer = self.buffers.get(symbol, ())
+        last = self.seqs[symbol] if last is None else last
+        messages = []
+        oldest = buffer[0][0] if buffer else self.seqs[symbol] + 1
+        if first < oldest:
+            messages.append(json.dumps({
+                "type": "gap", "symbol": symbol, "from": first, "to": min(oldest - 1, last)
+            }))
+        messages.extend(message for seq, message in buffer if first <= seq <= last)
+        return messages
+
+    async def _stream(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subscribe = await ws.receive_json()
+        self.subscribes += 1
+        connection = _FeedConnection(ws, set(subscribe["symbols"]))
+        # Queue the resume backlog and register for live ticks without yielding,
+        # so nothing published in between is missed or sent out of order
+        for symbol, last_seq in (subscribe.get("resume_from") or {}).items():
+            for message in self._backlog(symbol, last_seq + 1):
+                connection.queue.put_nowait(message)
+        self.connections.append(connection)
+
+        writer = asyncio.create_task(self._write(connection))
+        try:
+            async for msg in ws:
+                message = json.loads(msg.data)
+                if message.get("type") == "replay":
+                    self.replay_requests += 1
+                    for line in self._backlog(message["symbol"], message["from"], message["to"]):
+                        connection.queue.put_nowait(line)
+        finally:
+            self.connections.remove(connection)
+            writer.cancel()
+        return ws
+
+    async def _write(self, connection: _FeedConnection):
+        while True:
+            message = await connection.queue.get()
+            await connection.ws.send_str(message)
@@ -0,0 +1,9 @@
+"""Reproducible synthetic prices, shared by the tests and the benchmarks"""
+import numpy as np
+from ..services.market_processor import MarketSeries
+
+def random_walk(bars: int = 3000, seed: int = 7, start: float = 100.0, volatility: float = 0.01) -> MarketSeries:
+    """Geometric random walk from `start` with lognormal volumes; the same seed gives the same series"""
+    rng = np.random.default_rng(seed)
+    prices = start * np.exp(np.cumsum(rng.normal(0, volatility, bars)))
+    return MarketSeries(prices, rng.lognormal(7, 0.5, bars))
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import pytest
+from ..services.alert_engine import AlertEngine, Rule, SymbolRules
+from ..services.indicator_state import IndicatorStateRegistry
+from ..services.ingestion import MarketDataIngestor
+from ..services.market_processor import MarketProcessor
+from ..services.websocket_manager import WebSocketManager
+from .test_websocket_service import MockWebSocket
+
+class ScriptedProcessor(MarketProcessor):
+    """Returns queued setups instead of scoring the state"""
+
+    def __init__(self):
+        super().__init__()
+        self.setups = []
+
+    def identify_setup_from_state(self, state):
+        strength, r_multiple, setup_type = self.setups.pop(0)
+        return {"setup_type": setup_type, "signal_strength": strength, "r_multiple": r_multiple}
+
+def engine_with(*rules: Rule):
+    processor = ScriptedProcessor()
+    engine = AlertEngine(processor)
+    for rule in rules:
+        engine.add_rule(rule)
+    states = IndicatorStateRegistry()
+    return engine, processor, states
+
+def step(engine, processor, states, symbol, strength, r_multiple=1.0, setup_type="MOMENTUM"):
+    processor.setups.append((strength, r_multiple, setup_type))
+    states.update(symbol, 100.0, 1.0)
+    engine.mark(symbol)
+    return engine.evaluate_marked(states)
+
+def test_symbol_rules_match_without_scanning():
+    rules = SymbolRules()
+    rules.add(Rule(1, "alice", "BTCUSD", min_strength="STRONG"))
+    rules.add(Rule(2, "bob", "BTCUSD", min_strength="MODERATE"))
+    rules.add(Rule(3, "carol", "BTCUSD"))
+    rules.add(Rule(4, "dave", "BTCUSD", r_multiple_above=2.0))
+    rules.add(Rule(5, "erin", "BTCUSD", r_multiple_above=3.0))
+
+    assert {rule.id for rule in rules.on_strength("STRONG")} == {1, 2, 3}
+    assert {rule.id for rule in rules.on_strength("WEAK")} == {3}
+    assert [rule.id for rule in rules.on_r_multiple(1.5, 3.0)] == [4, 5]
+    assert [rule.id for rule in rules.on_r_multiple(2.0, 2.5)] == []
+    assert rules.on_r_multiple(3.5, 1.0) == []
+
+    rules.remove(4)
+    assert [rule.id for rule in rules.on_r_multiple(1.5, 3.0)] == [5]
+    with pytest.raises(ValueError):
+        Rule(6, "frank", "BTCUSD", min_strength="NEUTRAL")
+
+def test_alerts_only_on_bucket_change():
+    engine, processor, states = engine_with(Rule(1, "alice", "BTCUSD", min_strength="STRONG"))
+
+    assert step(engine, processor, states, "BTCUSD", "WEAK") == []  # first sight is the baseline
+    assert step(engine, processor, states, "BTCUSD", "MODERATE") == []
+    alerts = step(engine, processor, states, "BTCUSD", "STRONG")
+    assert len(alerts) == 1
+    assert alerts[0]["symbol"] == "BTCUSD"
+    assert alerts[0]["previous_strength"] == "MODERATE"
+    assert alerts[0]["matches"] == [{"rule_id": 1, "user_id": "alice", "reason": "signal_strength"}]
+    # Staying STRONG is not a change
+    assert step(engine, processor, states, "BTCUSD", "STRONG") == []
+    assert engine.stats()["alerts"] == 1
+
+def test_r_multiple_threshold_and_setup_type():
+    engine, processor, states = engine_with(
+        Rule(1, "alice", "BTCUSD", r_multiple_above=2.0),
+        Rule(2, "bob", "BTCUSD", r_multiple_above=2.0, setup_type="MEAN_REVERSION"),
+    )
+    step(engine, processor, states, "BTCUSD", "WEAK", 1.0)
+    # A bucket change alone does not fire threshold-only rules
+    assert step(engine, processor, states, "BTCUSD", "STRONG", 1.5) == []
+
+    alerts = step(engine, processor, states, "BTCUSD", "STRONG", 2.5)
+    assert alerts[0]["matches"] == [{"rule_id": 1, "user_id": "alice", "reason": "r_multiple"}]
+    assert step(engine, processor, states, "BTCUSD", "STRONG", 3.0) == []
+    # Falling back below and rising through again re-arms the rule
+    step(engine, processor, states, "BTCUSD", "STRONG", 1.0, "MEAN_REVERSION")
+    alerts = step(engine, processor, states, "BTCUSD", "STRONG", 2.0, "MEAN_REVERSION")
+    assert {match["rule_id"] for match in alerts[0]["matches"]} == {1, 2}
+
+def test_only_marked_symbols_with_rules_are_evaluated():
+    engine, processor, states = engine_with(Rule(1, "alice", "BTCUSD"))
+    states.update("ETHUSD", 10.0, 1.0)
+    engine.mark("ETHUSD")
+    assert engine.stats()["pending"] == 0
+
+    processor.setups.append(("WEAK", 1.0, "MOMENTUM"))
+    for _ in range(5):
+        states.update("BTCUSD", 100.0, 1.0)
+        engine.mark("BTCUSD")
+    engine.evaluate_marked(states)
+    assert engine.evaluations == 1
+
+    engine.remove_rule(1)
+    engine.mark("BTCUSD")
+    assert engine.evaluate_marked(states) == [] and engine.evaluations == 1
+
+@pytest.mark.asyncio
+class TestAlertEngineIngestion:
+    async def test_ingestor_marks_ticked_symbols(self):
+        engine = AlertEngine()
+        engine.add_rule(Rule(1, "alice", "BTCUSD"))
+        ingestor = MarketDataIngestor(alert_engine=engine)
+        await ingestor.ingest("BTCUSD", 100.0, 1.0)
+        await ingestor.ingest("ETHUSD", 10.0, 1.0)
+
+        assert engine.stats()["pending"] == 1
+        assert engine.evaluate_marked(ingestor.states) == []
+        assert engine.last["BTCUSD"][0] == "NEUTRAL"
+
+    async def test_run_forever_publishes_alerts(self):
+        processor = ScriptedProcessor()
+        engine = AlertEngine(processor, interval=0.01)
+        engine.add_rule(Rule(1, "alice", "BTCUSD"))
+        states = IndicatorStateRegistry()
+        published = []
+
+        async def publish(alert):
+            published.append(alert)
+
+        task = asyncio.create_task(engine.run_forever(states, publish))
+        for strength in ("WEAK", "STRONG"):
+            processor.setups.append((strength, 1.0, "MOMENTUM"))
+            states.update("BTCUSD", 100.0, 1.0)
+            engine.mark("BTCUSD")
+            await asyncio.sleep(0.05)
+        task.cancel()
+
+        assert [alert["setup"]["signal_strength"] for alert in published] == ["STRONG"]
+
+    async def test_alerts_reach_only_the_matched_users(self):
+        engine, processor, states = engine_with(
+            Rule(1, "alice", "BTCUSD"), Rule(2, "bob", "BTCUSD"), Rule(3, "bob", "BTCUSD", min_strength="STRONG")
+        )
+        step(engine, processor, states, "BTCUSD", "WEAK")
+        alert = step(engine, processor, states, "BTCUSD", "MODERATE")[0]
+
+        manager = WebSocketManager()
+        alice, bob, carol = MockWebSocket(), MockWebSocket(), MockWebSocket()
+        for websocket, user_id in ((alice, "alice"), (bob, "bob"), (carol, "carol")):
+            await manager.connect(websocket, user_id=user_id)
+            await manager.subscribe_to_symbol(websocket, "BTCUSD")
+        await manager.broadcast_rule_alert(alert)
+        await manager.drain()
+
+        assert carol.sent_messages == []
+        for websocket, rule_id in ((alice, 1), (bob, 2)):
+            message = json.loads(websocket.sent_messages[-1])
+            assert message["type"] == "setup_alert"
+            assert message["data"]["symbol"] == "BTCUSD"
+            assert [match["rule_id"] for match in message["data"]["matches"]] == [rule_id]
+
+        await manager.disconnect(alice)
+        assert "alice" not in manager.user_connections
+        await manager.close()
@@ -0,0 +1,34 @@
+import pytest
+from ..api.endpoints.alerts import alert_engine
+
+@pytest.mark.asyncio
+class TestAlertRulesAPI:
+    async def test_create_list_and_delete(self, test_client):
+        response = await test_client.post("/api/v1/alerts/rules", json={
+            "user_id": "alice", "symbol": "BTCUSD", "min_strength": "STRONG", "r_multiple_above": 2.0
+        })
+        assert response.status_code == 201
+        rule = response.json()
+        assert rule["min_strength"] == "STRONG"
+        assert rule["id"] in {r.id for r in alert_engine.rules["BTCUSD"].rules.values()}
+
+        await test_client.post("/api/v1/alerts/rules", json={"user_id": "bob", "symbol": "BTCUSD"})
+        response = await test_client.get("/api/v1/alerts/rules?user_id=alice")
+        assert [r["id"] for r in response.json()["rules"]] == [rule["id"]]
+
+        response = await test_client.delete(f"/api/v1/alerts/rules/{rule['id']}?user_id=bob")
+        assert response.status_code == 404
+        response = await test_client.delete(f"/api/v1/alerts/rules/{rule['id']}?user_id=alice")
+        assert response.status_code == 204
+        assert (await test_client.get("/api/v1/alerts/rules?user_id=alice")).json()["rules"] == []
+        assert rule["id"] not in alert_engine.rules["BTCUSD"].rules
+
+    async def test_rejects_invalid_rules(self, test_client):
+        for body in (
+            {"user_id": "alice", "symbol": "BTCUSD", "min_strength": "NEUTRAL"},
+            {"user_id": "alice", "symbol": "BTCUSD", "setup_type": "BREAKOUT"},
+            {"user_id": "alice", "symbol": "BTCUSD", "r_multiple_above": -1},
+            {"user_id": "", "symbol": "BTCUSD"},
+        ):
+            response = await test_client.post("/api/v1/alerts/rules", json=body)
+            assert response.status_code == 422
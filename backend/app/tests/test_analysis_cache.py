@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from ..services.analysis_cache import AnalysisCache
+from ..services.pubsub import LocalBus
+
+class CountingCompute:
+    """Analysis stand-in that records calls and can be held open"""
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, symbol):
+        self.calls += 1
+        await self.release.wait()
+        return {"symbol": symbol, "run": self.calls}
+
+@pytest.mark.asyncio
+class TestAnalysisCache:
+    async def test_concurrent_requests_share_one_computation(self):
+        compute = CountingCompute()
+        compute.release.clear()
+        cache = AnalysisCache(compute)
+        
+        waiters = [asyncio.create_task(cache.get("BTCUSD")) for _ in range(100)]
+        await asyncio.sleep(0)
+        compute.release.set()
+        results = await asyncio.gather(*waiters)
+        
+        assert compute.calls == 1
+        assert all(result == {"symbol": "BTCUSD", "run": 1} for result in results)
+        assert cache.stats()["joined"] == 99
+        
+        # Later requests are served from the cache
+        assert await cache.get("BTCUSD") == {"symbol": "BTCUSD", "run": 1}
+        assert compute.calls == 1
+        assert cache.hits == 1
+
+    async def test_new_market_data_invalidates(self):
+        compute = CountingCompute()
+        cache = AnalysisCache(compute)
+        bus = LocalBus()
+        cache.attach(bus)
+        
+        await cache.get("BTCUSD")
+        await cache.get("ETHUSD")
+        await bus.publish("market_data", {"symbol": "BTCUSD", "price": 1.0})
+        
+        assert (await cache.get("BTCUSD"))["run"] == 3
+        assert (await cache.get("ETHUSD"))["run"] == 2
+        assert cache.invalidations == 1
+
+    async def test_result_computed_before_new_data_is_not_kept(self):
+        """Data arriving mid-computation: current waiters get the result, later ones recompute"""
+        compute = CountingCompute()
+        compute.release.clear()
+        cache = AnalysisCache(compute)
+        
+        waiter = asyncio.create_task(cache.get("BTCUSD"))
+        await asyncio.sleep(0)
+        cache.invalidate("BTCUSD")
+        compute.release.set()
+        
+        assert (await waiter)["run"] == 1
+        assert (await cache.get("BTCUSD"))["run"] == 2
+
+    async def test_ttl_expiry(self):
+        compute = CountingCompute()
+        cache = AnalysisCache(compute, ttl=0.01)
+        await cache.get("BTCUSD")
+        await asyncio.sleep(0.02)
+        assert (await cache.get("BTCUSD"))["run"] == 2
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        compute = CountingCompute()
+        compute.release.clear()
+        cache = AnalysisCache(compute)
+        
+        first = asyncio.create_task(cache.get("BTCUSD"))
+        second = asyncio.create_task(cache.get("BTCUSD"))
+        await asyncio.sleep(0)
+        first.cancel()
+        compute.release.set()
+        
+        assert (await second)["run"] == 1
+        assert compute.calls == 1
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from ..services.backtest import OUTCOMES, backtest_symbol, run_backtest, simulate_trades, summarize
+from ..services.market_processor import MarketProcessor, MarketSeries
+from .synthetic import random_walk
+
+def entry_at_first_bar(prices, stop_loss, target_price):
+    count = len(prices)
+    score = np.zeros(count)
+    score[0] = 1.0
+    return {
+        "is_momentum": np.ones(count, dtype=bool),
+        "score": score,
+        "stop_loss": np.full(count, stop_loss),
+        "target_price": np.full(count, target_price),
+        "r_multiple": np.full(count, abs(target_price - prices[0]) / abs(prices[0] - stop_loss)),
+    }
+
+def test_score_history_matches_point_in_time_analysis():
+    processor = MarketProcessor()
+    series = random_walk(400)
+    momentum, mean_reversion, sma_20 = processor.score_history(series)
+    levels = processor.setup_levels(momentum, mean_reversion, series.prices, sma_20)
+    
+    for bar in (0, 10, 19, 20, 49, 50, 51, 137, 399):
+        prefix = MarketSeries(series.prices[:bar + 1], series.volumes[:bar + 1])
+        assert momentum[bar] == pytest.approx(processor.calculate_momentum_signal(prefix).score)
+        assert mean_reversion[bar] == pytest.approx(processor.calculate_mean_reversion_signal(prefix).score)
+        
+        setup = processor.identify_setup(prefix)
+        assert levels["is_momentum"][bar] == (setup["setup_type"] == "MOMENTUM")
+        assert levels["stop_loss"][bar] == pytest.approx(setup["stop_loss"])
+        assert levels["target_price"][bar] == pytest.approx(setup["target_price"])
+        assert levels["r_multiple"][bar] == pytest.approx(setup["r_multiple"])
+
+def test_long_trade_hits_target_or_stop():
+    prices = np.array([100.0, 101.0, 104.0, 106.5, 90.0])
+    trades = simulate_trades(prices, entry_at_first_bar(prices, 98.0, 106.0))
+    assert len(trades) == 1
+    assert trades.exit_index[0] == 3
+    assert OUTCOMES[trades.outcome[0]] == "target"
+    assert trades.r_multiple[0] == pytest.approx(3.0)
+    
+    prices = np.array([100.0, 99.0, 97.5, 110.0])
+    trades = simulate_trades(prices, entry_at_first_bar(prices, 98.0, 106.0))
+    assert OUTCOMES[trades.outcome[0]] == "stop"
+    assert trades.r_multiple[0] == pytest.approx(-1.0)
+
+def test_short_trade_timeout_and_open():
+    # Mean reversion short: stop above, target below
+    prices = np.array([100.0, 101.0, 99.0, 98.0, 97.0, 96.0])
+    levels = entry_at_first_bar(prices, 102.0, 95.0)
+    
+    trades = simulate_trades(prices, levels, max_bars=3)
+    assert trades.direction[0] == -1.0
+    assert OUTCOMES[trades.outcome[0]] == "timeout"
+    assert trades.exit_index[0] == 3
+    assert trades.r_multiple[0] == pytest.approx(1.0)
+    
+    trades = simulate_trades(prices, levels)
+    assert OUTCOMES[trades.outcome[0]] == "open"
+    assert summarize(trades.r_multiple[trades.closed])["trades"] == 0
+
+def test_one_position_at_a_time():
+    prices = np.array([100.0, 100.5, 101.0, 106.0, 100.0, 98.0])
+    levels = entry_at_first_bar(prices, 98.0, 106.0)
+    levels["score"][:] = 1.0
+    trades = simulate_trades(prices, levels)
+    # Re-entry only after the first trade exits on bar 3
+    assert trades.entry_index.tolist() == [0, 4]
+    assert OUTCOMES[trades.outcome[1]] == "stop"
+
+def test_summary_statistics():
+    summary = summarize(np.array([-1.0, -1.0, 3.0, 0.5, 2.5]))
+    assert summary["trades"] == 5
+    assert summary["win_rate"] == pytest.approx(0.6)
+    assert summary["average_r"] == pytest.approx(0.8)
+    assert summary["r_distribution"] == {
+        "<=-1": 2, "-1..0": 0, "0..1": 1, "1..2": 0, "2..3": 2, ">3": 0
+    }
+
+def test_parallel_run_matches_sequential():
+    series = {f"SYM{i}": random_walk(5000, seed=i) for i in range(3)}
+    sequential = run_backtest(series, min_score=0.5, workers=1).summary()
+    parallel = run_backtest(series, min_score=0.5, workers=2).summary()
+    
+    assert sequential == parallel
+    assert sequential["bars"] == 15000
+    assert sequential["trades"] > 0
+    assert sequential["symbols"]["SYM1"] == backtest_symbol("SYM1", series["SYM1"], 0.5).summary()
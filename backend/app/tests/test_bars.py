@@ -0,0 +1,107 @@
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from ..models.market_data import MarketData
+from ..models.ohlcv_bar import OHLCVBar
+from ..services.bars import BarAggregator, aggregate, backfill_bars, bar_rows, bar_start, write_bars
+from ..services.ingestion import MarketDataIngestor
+from ..services.market_data_repository import fetch_bars, fetch_price_matrix
+from ..services.wire_format import epoch_ns
+from .synthetic import random_walk
+
+START = datetime(2024, 1, 1)
+
+def random_ticks(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    offsets = np.cumsum(rng.integers(0, 20_000, count))  # milliseconds apart, with repeats
+    timestamps = [START + timedelta(milliseconds=int(ms)) for ms in offsets]
+    series = random_walk(count, seed)
+    return timestamps, series.prices, series.volumes
+
+def test_bar_start():
+    assert bar_start(datetime(2024, 1, 1, 10, 7, 31, 500), 300) == datetime(2024, 1, 1, 10, 5)
+    assert bar_start(datetime(2024, 1, 1, 10, 7, 31, 500), 1) == datetime(2024, 1, 1, 10, 7, 31)
+
+def test_bulk_aggregate():
+    seconds = [0, 10, 59, 60, 61, 185]
+    bars = aggregate(
+        np.array([epoch_ns(START + timedelta(seconds=s)) for s in seconds]),
+        [5.0, 7.0, 4.0, 6.0, 6.5, 3.0], [1.0, 1.0, 1.0, 2.0, 2.0, 3.0], 60
+    )
+    assert bars.timestamps.tolist() == [epoch_ns(START + timedelta(minutes=m)) for m in (0, 1, 3)]
+    assert bars.open.tolist() == [5.0, 6.0, 3.0]
+    assert bars.high.tolist() == [7.0, 6.5, 3.0]
+    assert bars.low.tolist() == [4.0, 6.0, 3.0]
+    assert bars.close.tolist() == [4.0, 6.5, 3.0]
+    assert bars.volume.tolist() == [3.0, 4.0, 3.0]
+    assert bars.tick_count.tolist() == [3, 2, 1]
+    assert len(aggregate(np.empty(0, np.int64), [], [], 60).close) == 0
+
+def test_incremental_matches_bulk():
+    timestamps, prices, volumes = random_ticks(2000)
+    aggregator = BarAggregator(["1s", "1m", "5m"])
+    closed = []
+    for timestamp, price, volume in zip(timestamps, prices.tolist(), volumes.tolist()):
+        closed.extend(aggregator.update("BTCUSD", price, volume, timestamp))
+    closed.extend(aggregator.drain())
+
+    nanoseconds = np.array(timestamps, dtype="datetime64[ns]").view(np.int64)
+    for name, seconds in (("1s", 1), ("1m", 60), ("5m", 300)):
+        incremental = sorted(bar.as_row() for bar in closed if bar.timeframe == name)
+        bulk = bar_rows("BTCUSD", name, aggregate(nanoseconds, prices, volumes, seconds))
+        assert [row[:3] + (row[-1],) for row in incremental] == [row[:3] + (row[-1],) for row in bulk]
+        np.testing.assert_allclose([row[3:8] for row in incremental], [row[3:8] for row in bulk])
+
+def test_late_ticks_are_dropped():
+    aggregator = BarAggregator(["1m"])
+    aggregator.update("BTCUSD", 10.0, 1.0, START + timedelta(minutes=1))
+    assert aggregator.update("BTCUSD", 11.0, 1.0, START) == []
+    assert aggregator.late_ticks == 1
+    assert aggregator.current("BTCUSD", "1m").close == 10.0
+
+@pytest.mark.asyncio
+class TestBarStorage:
+    async def test_write_bars_upserts(self, session_factory):
+        async with session_factory() as session:
+            row = ("BTCUSD", "1m", START, 1.0, 2.0, 0.5, 1.5, 10.0, 3)
+            await write_bars(session, [row])
+            await write_bars(session, [row[:6] + (1.8, 12.0, 4)])
+            await session.commit()
+
+            bars = (await session.execute(select(OHLCVBar))).scalars().all()
+            assert len(bars) == 1
+            assert (bars[0].close, bars[0].volume, bars[0].tick_count) == (1.8, 12.0, 4)
+
+    async def test_backfill_and_fetch(self, session_factory):
+        async with session_factory() as session:
+            session.add_all([
+                MarketData(symbol="BTCUSD", price=100.0 + i, volume=1.0, timestamp=START + timedelta(seconds=20 * i))
+                for i in range(30)
+            ])
+            await session.commit()
+
+            assert await backfill_bars(session, "BTCUSD", START + timedelta(seconds=30), ["1m", "5m"]) == 10 + 2
+            series = await fetch_bars(session, "BTCUSD", "1m", START)
+            assert series.prices.tolist() == [102.0 + 3 * i for i in range(10)]
+            assert series.volumes.tolist() == [3.0] * 10
+
+            matrix = await fetch_price_matrix(session, ["BTCUSD"], START, "5m")
+            assert matrix.lengths.tolist() == [2]
+            assert await fetch_bars(session, "BTCUSD", "1h", START) is None
+
+    async def test_ingestor_writes_closed_bars(self, session_factory):
+        ingestor = MarketDataIngestor(session_factory=session_factory, bar_aggregator=BarAggregator(["1m"]))
+        for i in range(150):
+            await ingestor.ingest("BTCUSD", 100.0 + i, 1.0, START + timedelta(seconds=i))
+        await ingestor.flush()
+
+        async with session_factory() as session:
+            series = await fetch_bars(session, "BTCUSD", "1m", START)
+            assert series.prices.tolist() == [159.0, 219.0]
+
+        await ingestor.stop()
+        async with session_factory() as session:
+            series = await fetch_bars(session, "BTCUSD", "1m", START)
+            assert series.prices.tolist() == [159.0, 219.0, 249.0]
+            assert series.volumes.tolist() == [60.0, 60.0, 30.0]
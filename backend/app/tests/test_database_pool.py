@@ -0,0 +1,53 @@
+import asyncio
+import os
+import tempfile
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from ..core.config import Settings
+from ..core.pool_metrics import MeteredAsyncQueuePool, pool_status
+from ..models.base import engine_options
+
+def make_settings(url: str, **overrides) -> Settings:
+    return Settings(TRADINGVIEW_API_KEY="test", DATABASE_URL=url, **overrides)
+
+def test_memory_sqlite_keeps_default_pool():
+    options = engine_options(make_settings("sqlite+aiosqlite:///:memory:"))
+    assert "poolclass" not in options
+    assert options["echo"] is False
+
+def test_pool_options_from_settings():
+    settings = make_settings(
+        "postgresql+asyncpg://user@localhost/db",
+        DATABASE_POOL_SIZE=5, DATABASE_MAX_OVERFLOW=2, DATABASE_ECHO=True
+    )
+    options = engine_options(settings)
+    assert options["poolclass"] is MeteredAsyncQueuePool
+    assert options["pool_size"] == 5
+    assert options["max_overflow"] == 2
+    assert options["pool_pre_ping"] is True
+    assert options["echo"] is True
+    assert options["connect_args"]["prepared_statement_cache_size"] == 256
+
+@pytest.mark.asyncio
+async def test_pool_metrics_track_checkouts():
+    path = os.path.join(tempfile.mkdtemp(), "pool.db")
+    settings = make_settings(
+        f"sqlite+aiosqlite:///{path}", DATABASE_POOL_SIZE=1, DATABASE_MAX_OVERFLOW=0
+    )
+    engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings))
+
+    async def query():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(query(), query(), query())
+    status = pool_status(engine)
+    await engine.dispose()
+
+    assert status["pool_class"] == "MeteredAsyncQueuePool"
+    assert status["checkouts"] == 3
+    assert status["checked_out"] == 0
+    # With one connection, later queries had to wait for it
+    assert status["max_wait_ms"] > 0
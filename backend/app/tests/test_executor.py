@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+import pytest
+from ..core.executor import AnalysisExecutor, ExecutorOverloaded, LoopLagMonitor
+from ..services.market_processor import MarketProcessor, MarketSeries
+from .test_market_processor import create_sample_market_data
+
+def sample_series(num_points=300):
+    data = create_sample_market_data(num_points=num_points)
+    return MarketSeries([d.price for d in data], [d.volume for d in data])
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        AnalysisExecutor(kind="gpu")
+
+@pytest.mark.asyncio
+class TestAnalysisExecutor:
+    @pytest.mark.parametrize("kind", ["inline", "thread", "process"])
+    async def test_matches_direct_call(self, kind):
+        processor = MarketProcessor()
+        series = sample_series()
+        executor = AnalysisExecutor(kind=kind, max_workers=2)
+        try:
+            assert await executor.run(processor.analyze, series) == processor.analyze(series)
+        finally:
+            executor.shutdown()
+        assert executor.stats()["completed"] == 1
+
+    async def test_rejects_beyond_max_pending(self):
+        release = threading.Event()
+        executor = AnalysisExecutor(kind="thread", max_workers=1, max_pending=2)
+        calls = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        
+        with pytest.raises(ExecutorOverloaded):
+            await executor.run(release.wait)
+        assert executor.rejected == 1
+        
+        release.set()
+        await asyncio.gather(*calls)
+        assert executor.pending == 0
+        executor.shutdown()
+
+    async def test_timeout_frees_caller_but_keeps_slot(self):
+        """The caller gives up at the timeout; the pending slot frees when the work ends"""
+        executor = AnalysisExecutor(kind="thread", max_workers=1, timeout=0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(time.sleep, 0.2)
+        assert executor.timeouts == 1
+        assert executor.pending == 1
+        
+        await asyncio.sleep(0.3)
+        assert executor.pending == 0
+        executor.shutdown()
+
+    async def test_thread_pool_keeps_loop_responsive(self):
+        """Blocking work on the pool leaves the loop free; inline it shows up as lag"""
+        for kind, blocked in (("thread", False), ("inline", True)):
+            monitor = LoopLagMonitor(interval=0.01)
+            monitor.start()
+            await asyncio.sleep(0.03)
+            executor = AnalysisExecutor(kind=kind)
+            await executor.run(time.sleep, 0.2)
+            await asyncio.sleep(0.03)
+            await monitor.stop()
+            executor.shutdown()
+            assert (monitor.stats()["max_ms"] > 150) is blocked
@@ -0,0 +1,197 @@
+import threading
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from ..models.market_data import MarketData
+from ..services import history_store, indicators
+from ..services.history_store import HistoryStore, backfill
+from ..services.ingestion import MarketDataIngestor
+from ..services.market_data_repository import load_series
+from ..services.market_processor import MarketProcessor
+from ..services.wire_format import epoch_ns
+
+START = datetime(2024, 1, 1)
+
+def ticks(count: int, start: datetime = START, step: timedelta = timedelta(seconds=1)):
+    timestamps = np.array([epoch_ns(start + step * i) for i in range(count)], dtype=np.int64)
+    return timestamps, 100.0 + np.arange(count, dtype=np.float64), np.ones(count)
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history"))
+    yield store
+    store.close()
+
+def test_append_read_and_since(store):
+    store.append("BTCUSD", *ticks(10))
+    columns = store.read("BTCUSD")
+    np.testing.assert_array_equal(columns.prices, 100.0 + np.arange(10))
+
+    recent = store.read("BTCUSD", START + timedelta(seconds=7))
+    assert recent.prices.tolist() == [107.0, 108.0, 109.0]
+    assert store.read_series("ETHUSD") is None
+    assert store.read_series("BTCUSD", START + timedelta(hours=1)) is None
+
+def test_compacted_reads_are_zero_copy_views(store):
+    store.append("BTCUSD", *ticks(100))
+    store.compact("BTCUSD")
+
+    series = store.read_series("BTCUSD", START + timedelta(seconds=50))
+    assert len(series.prices) == 50
+    assert not series.prices.flags.owndata and not series.prices.flags.writeable
+    assert series.prices.flags.c_contiguous
+    # The processor's contiguous float64 conversion passes the mapped column straight through
+    assert np.shares_memory(indicators.as_array(series.prices), series.prices)
+    assert MarketProcessor().identify_setup(series)["entry_price"] == 199.0
+
+def test_compaction_merges_tail_in_order(store):
+    timestamps, prices, volumes = ticks(20)
+    store.append("BTCUSD", timestamps[:10], prices[:10], volumes[:10])
+    store.compact("BTCUSD")
+    # A late tick lands between already-compacted ones
+    store.append("BTCUSD", timestamps[[15, 12, 10]], prices[[15, 12, 10]], volumes[[15, 12, 10]])
+
+    expected = prices[list(range(10)) + [10, 12, 15]]
+    np.testing.assert_array_equal(store.read("BTCUSD").prices, expected)
+    assert store.compact_all(min_tail_rows=3) == 1
+    np.testing.assert_array_equal(store.read("BTCUSD").prices, expected)
+    assert store.stats()["tail_rows"] == 0
+
+def test_appends_and_reads_continue_while_a_compaction_writes(store, monkeypatch):
+    timestamps, prices, volumes = ticks(30)
+    store.append("BTCUSD", timestamps[:10], prices[:10], volumes[:10])
+    staging, release = threading.Event(), threading.Event()
+    stage_segment = history_store.stage_segment
+
+    def slow_stage(path, columns):
+        staging.set()
+        assert release.wait(5)
+        return stage_segment(path, columns)
+
+    monkeypatch.setattr(history_store, "stage_segment", slow_stage)
+    compaction = threading.Thread(target=store.compact, args=("BTCUSD",))
+    compaction.start()
+    assert staging.wait(5)
+    # The segment is being written; the symbol stays open for appends and reads
+    store.append("BTCUSD", timestamps[10:20], prices[10:20], volumes[10:20])
+    assert len(store.read("BTCUSD").prices) == 20
+    release.set()
+    compaction.join(5)
+
+    # Ticks appended during the compaction become the new generation's tail
+    assert store.stats()["tail_rows"] == 10
+    store.append("BTCUSD", timestamps[20:], prices[20:], volumes[20:])
+    np.testing.assert_array_equal(store.read("BTCUSD").prices, prices)
+    store.close()
+    reopened = HistoryStore(store.root)
+    np.testing.assert_array_equal(reopened.read("BTCUSD").prices, prices)
+    reopened.close()
+
+def test_merged_view_is_extended_by_later_appends(store):
+    timestamps, prices, volumes = ticks(30)
+    store.append("BTCUSD", timestamps[:10], prices[:10], volumes[:10])
+    store.compact("BTCUSD")
+    store.append("BTCUSD", timestamps[10:20], prices[10:20], volumes[10:20])
+    first = store.read("BTCUSD")
+    store.append("BTCUSD", timestamps[20:], prices[20:], volumes[20:])
+    second = store.read("BTCUSD")
+
+    # The earlier read is unchanged and the new one continues in the same buffer
+    assert len(first.prices) == 20
+    np.testing.assert_array_equal(second.prices, prices)
+    assert np.shares_memory(first.prices, second.prices)
+
+def test_reopen_recovers_tail_and_segment(tmp_path):
+    root = str(tmp_path / "history")
+    store = HistoryStore(root)
+    store.append("BTC/USD", *ticks(5))
+    store.compact("BTC/USD")
+    store.append("BTC/USD", *ticks(3, START + timedelta(minutes=1)))
+    store.close()
+
+    # A crash mid-append leaves a partial record at the end of the tail
+    history_dir = tmp_path / "history" / "BTC%2FUSD"
+    tail = next(history_dir.glob("tail-*.bin"))
+    with open(tail, "ab") as f:
+        f.write(b"\x00" * 7)
+    (history_dir / "segment-00000009.col.tmp").write_bytes(b"partial")
+
+    reopened = HistoryStore(root)
+    assert reopened.symbols() == ["BTC/USD"]
+    assert len(reopened.read("BTC/USD").prices) == 8
+    assert not list(history_dir.glob("*.tmp"))
+    assert reopened.covers("BTC/USD", START)
+    assert not reopened.covers("BTC/USD", START - timedelta(seconds=1))
+    reopened.close()
+
+def test_retention_drops_old_ticks_and_coverage(tmp_path):
+    store = HistoryStore(str(tmp_path / "history"), retention_days=1)
+    store.append("BTCUSD", *ticks(48, step=timedelta(hours=1)))
+    now = START + timedelta(hours=48)
+
+    assert store.compact("BTCUSD", now) == 24
+    assert store.read("BTCUSD").timestamps[0] == epoch_ns(START + timedelta(days=1))
+    assert not store.covers("BTCUSD", START)
+    assert store.covers("BTCUSD", START + timedelta(days=1))
+    store.close()
+
+def test_readers_follow_the_single_writer(tmp_path):
+    root = str(tmp_path / "history")
+    writer = HistoryStore(root)
+    reader = HistoryStore(root, writer=False)
+    with pytest.raises(RuntimeError):
+        HistoryStore(root)
+    with pytest.raises(RuntimeError):
+        reader.append("BTCUSD", *ticks(1))
+
+    timestamps, prices, volumes = ticks(15)
+    writer.append("BTCUSD", timestamps[:5], prices[:5], volumes[:5])
+    assert len(reader.read("BTCUSD").prices) == 5 and reader.covers("BTCUSD", START)
+    writer.append("BTCUSD", timestamps[5:10], prices[5:10], volumes[5:10])
+    assert len(reader.read("BTCUSD").prices) == 10
+
+    # Compaction is the writer's alone; the reader moves to the new generation
+    assert reader.compact_all() == 0
+    writer.compact_all()
+    writer.append("BTCUSD", timestamps[10:], prices[10:], volumes[10:])
+    np.testing.assert_array_equal(reader.read("BTCUSD").prices, prices)
+    writer.compact("BTCUSD")
+    writer.compact("BTCUSD")
+    np.testing.assert_array_equal(reader.read("BTCUSD").prices, prices)
+    writer.close()
+    reader.close()
+
+    # Once the writer is gone another process may take over
+    HistoryStore(root).close()
+
+@pytest.mark.asyncio
+class TestHistoryStoreIngestion:
+    async def test_ingestor_appends_written_batches(self, store, session_factory):
+        ingestor = MarketDataIngestor(session_factory=session_factory, history_store=store)
+        for i in range(30):
+            await ingestor.ingest("BTCUSD", 100.0 + i, 2.0, START + timedelta(seconds=i))
+        await ingestor.ingest("ETHUSD", 10.0, 1.0, START)
+        await ingestor.flush()
+
+        assert store.read("BTCUSD").prices.tolist() == [100.0 + i for i in range(30)]
+        assert store.read("ETHUSD").timestamps.tolist() == [epoch_ns(START)]
+        assert store.stats()["rows_appended"] == 31
+
+    async def test_load_series_prefers_a_covering_store(self, store, session_factory):
+        async with session_factory() as session:
+            session.add_all([
+                MarketData(symbol="BTCUSD", price=50.0 + i, volume=1.0, timestamp=START + timedelta(minutes=i))
+                for i in range(10)
+            ])
+            await session.commit()
+
+            # Only the last few minutes are in the store, so the full window comes from the database
+            store.append("BTCUSD", *ticks(2, START + timedelta(minutes=8), timedelta(minutes=1)))
+            series = await load_series(session, "BTCUSD", START, store)
+            assert len(series.prices) == 10 and series.prices[0] == 50.0
+
+            assert await backfill(store, session, ["BTCUSD"], START) == 8
+            assert store.covers("BTCUSD", START)
+            series = await load_series(session, "BTCUSD", START, store)
+            assert series.prices.tolist() == [50.0 + i for i in range(8)] + [100.0, 101.0]
+            assert await backfill(store, session, ["BTCUSD"], START) == 0
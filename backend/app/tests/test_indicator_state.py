@@ -0,0 +1,74 @@
+import json
+import pytest
+import numpy as np
+from ..services import indicators
+from ..services.indicator_state import IndicatorState, IndicatorStateRegistry
+from ..services.market_processor import MarketProcessor
+from .test_market_processor import create_sample_market_data
+
+def feed(state, market_data):
+    for d in market_data:
+        state.update(d.price, d.volume)
+    return state
+
+class TestIndicatorState:
+    @pytest.fixture
+    def sample_data(self):
+        return create_sample_market_data(num_points=300)
+
+    def test_matches_batch_indicators(self, sample_data):
+        """Incremental values match the vectorized engine on the same series"""
+        state = feed(IndicatorState("BTCUSD"), sample_data)
+        prices = np.array([d.price for d in sample_data])
+        volumes = np.array([d.volume for d in sample_data])
+
+        assert state.sma_20.value == pytest.approx(indicators.sma(prices, 20)[-1])
+        assert state.sma_50.value == pytest.approx(indicators.sma(prices, 50)[-1])
+        assert state.prev_sma_20 == pytest.approx(indicators.sma(prices, 20)[-2])
+        assert state.rsi.value == pytest.approx(indicators.rsi(prices)[-1])
+        assert state.volume_mean == pytest.approx(volumes.mean())
+        assert state.price_std == pytest.approx(prices.std())
+
+    def test_signals_match_batch(self, sample_data):
+        processor = MarketProcessor()
+        state = feed(IndicatorState("BTCUSD"), sample_data)
+
+        assert processor.calculate_momentum_signal_from_state(state) == \
+            processor.calculate_momentum_signal(sample_data)
+        assert processor.calculate_mean_reversion_signal_from_state(state) == \
+            processor.calculate_mean_reversion_signal(sample_data)
+        assert processor.identify_setup_from_state(state) == \
+            pytest.approx(processor.identify_setup(sample_data))
+
+    def test_warmup_is_neutral(self, sample_data):
+        processor = MarketProcessor()
+        state = feed(IndicatorState("BTCUSD"), sample_data[:10])
+        assert processor.calculate_momentum_signal_from_state(state).value == "NEUTRAL"
+        assert processor.calculate_mean_reversion_signal_from_state(state).value == "NEUTRAL"
+
+    def test_snapshot_restore_resumes(self, sample_data):
+        """A restored state continues exactly where the original left off"""
+        uninterrupted = feed(IndicatorState("BTCUSD"), sample_data)
+
+        partial = feed(IndicatorState("BTCUSD"), sample_data[:137])
+        snapshot = json.loads(json.dumps(partial.to_snapshot()))
+        resumed = feed(IndicatorState.from_snapshot(snapshot), sample_data[137:])
+
+        assert resumed.sma_20.value == pytest.approx(uninterrupted.sma_20.value)
+        assert resumed.sma_50.value == pytest.approx(uninterrupted.sma_50.value)
+        assert resumed.rsi.value == pytest.approx(uninterrupted.rsi.value)
+        assert resumed.price_std == pytest.approx(uninterrupted.price_std)
+        assert list(resumed.recent_prices) == list(uninterrupted.recent_prices)
+
+    def test_registry_snapshot(self, sample_data):
+        registry = IndicatorStateRegistry()
+        for d in sample_data[:60]:
+            registry.update("BTCUSD", d.price, d.volume)
+            registry.update("ETHUSD", d.price / 10, d.volume)
+
+        restored = IndicatorStateRegistry()
+        restored.restore(registry.snapshot())
+        assert set(restored.states) == {"BTCUSD", "ETHUSD"}
+        assert restored.get("ETHUSD").sma_50.value == pytest.approx(
+            registry.get("ETHUSD").sma_50.value
+        )
@@ -0,0 +1,62 @@
+import pytest
+import numpy as np
+from ..services import indicators
+from .synthetic import random_walk
+
+def legacy_sma(prices, period):
+    """Reference per-window SMA the vectorized engine replaced"""
+    if len(prices) < period:
+        return []
+    return [np.mean(prices[i:i+period]) for i in range(len(prices) - period + 1)]
+
+def legacy_rsi(prices, period=14):
+    """Reference element-by-element Wilder RSI the vectorized engine replaced"""
+    if len(prices) < period + 1:
+        return []
+
+    deltas = np.diff(prices)
+    gains = np.where(deltas > 0, deltas, 0)
+    losses = np.where(deltas < 0, -deltas, 0)
+
+    avg_gain = np.mean(gains[:period])
+    avg_loss = np.mean(losses[:period])
+    rsi = [100.0 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss))]
+
+    for i in range(period, len(deltas)):
+        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+        rsi.append(100.0 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss)))
+    return rsi
+
+@pytest.fixture
+def prices():
+    return random_walk(5000, seed=42, start=50000.0, volatility=0.001).prices
+
+class TestIndicatorParity:
+    @pytest.mark.parametrize("period", [1, 5, 20, 50])
+    def test_sma_matches_legacy(self, prices, period):
+        np.testing.assert_allclose(
+            indicators.sma(prices, period), legacy_sma(prices, period), rtol=1e-9
+        )
+
+    @pytest.mark.parametrize("period", [2, 14, 30])
+    def test_rsi_matches_legacy(self, prices, period):
+        np.testing.assert_allclose(
+            indicators.rsi(prices, period), legacy_rsi(prices, period), rtol=1e-9
+        )
+
+    def test_rsi_flat_losses(self):
+        """Strictly rising prices saturate at 100"""
+        rising = np.arange(1.0, 40.0)
+        assert np.all(indicators.rsi(rising) == 100.0)
+
+    def test_rolling_std_matches_windows(self, prices):
+        windows = np.lib.stride_tricks.sliding_window_view(prices, 20)
+        np.testing.assert_allclose(
+            indicators.rolling_std(prices, 20), windows.std(axis=1), rtol=1e-6
+        )
+
+    def test_short_series(self):
+        assert indicators.sma([1.0, 2.0], 20).size == 0
+        assert indicators.rsi([1.0, 2.0]).size == 0
+        assert indicators.rolling_std([1.0, 2.0], 20).size == 0
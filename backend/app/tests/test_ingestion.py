@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+import numpy as np
+from datetime import datetime
+from sqlalchemy import select, func
+from ..models.market_data import MarketData
+from ..services import indicators
+from ..services.ingestion import MarketDataIngestor, parse_timestamp
+from ..services.market_processor import MarketProcessor
+from .test_market_processor import create_sample_market_data
+
+@pytest.mark.asyncio
+class TestMarketDataIngestor:
+    async def test_flush_writes_indicator_columns(self, session_factory):
+        """Rows are inserted with indicators and scores already filled in"""
+        sample = create_sample_market_data(num_points=120)
+        ingestor = MarketDataIngestor(session_factory, batch_size=50)
+        await ingestor.start()
+        for d in sample:
+            await ingestor.ingest(d.symbol, d.price, d.volume, d.timestamp)
+        await ingestor.stop()
+
+        async with session_factory() as session:
+            result = await session.execute(select(MarketData).order_by(MarketData.timestamp))
+            rows = result.scalars().all()
+
+        assert len(rows) == len(sample)
+        assert ingestor.stats.rows_written == len(sample)
+        assert rows[10].sma_20 is None
+        prices = np.array([d.price for d in sample])
+        assert rows[-1].sma_20 == pytest.approx(indicators.sma(prices, 20)[-1])
+        assert rows[-1].sma_50 == pytest.approx(indicators.sma(prices, 50)[-1])
+        assert rows[-1].rsi == pytest.approx(indicators.rsi(prices)[-1])
+
+        processor = MarketProcessor()
+        assert rows[-1].momentum_score == pytest.approx(
+            processor.calculate_momentum_signal(sample).score
+        )
+        assert rows[-1].mean_reversion_score == pytest.approx(
+            processor.calculate_mean_reversion_signal(sample).score
+        )
+
+    async def test_backpressure_blocks_until_flushed(self, session_factory):
+        ingestor = MarketDataIngestor(session_factory, max_pending=10)
+        for i in range(10):
+            await ingestor.ingest("BTCUSD", 100.0 + i, 1.0)
+
+        # No flusher is running, so the next tick has to wait
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(ingestor.ingest("BTCUSD", 200.0, 1.0), 0.05)
+        assert ingestor.stats.backpressure_waits >= 1
+
+        await ingestor.start()
+        await asyncio.wait_for(ingestor.ingest("BTCUSD", 200.0, 1.0), 1.0)
+        await ingestor.stop()
+
+        async with session_factory() as session:
+            count = await session.scalar(select(func.count()).select_from(MarketData))
+        assert count == 11
+
+    async def test_failed_flush_keeps_rows_and_flusher_alive(self, session_factory):
+        failures = [RuntimeError("db down")] * 2
+
+        def flaky_factory():
+            if failures:
+                raise failures.pop()
+            return session_factory()
+
+        ingestor = MarketDataIngestor(flaky_factory, max_pending=10, flush_interval=0.01)
+        for i in range(8):
+            await ingestor.ingest("BTCUSD", 100.0 + i, 1.0)
+        with pytest.raises(RuntimeError):
+            await ingestor.flush()
+        assert ingestor.pending == 8 and len(ingestor._features) == 8
+
+        # The flusher survives the second failure and producers are not left waiting
+        await ingestor.start()
+        await asyncio.wait_for(ingestor.ingest_many(
+            {"symbol": "BTCUSD", "price": 110.0 + i} for i in range(12)
+        ), 1.0)
+        await ingestor.stop()
+        assert ingestor.stats.failed_flushes == 1
+
+        async with session_factory() as session:
+            count = await session.scalar(select(func.count()).select_from(MarketData))
+        assert count == 20
+
+    async def test_ingest_market_data_dict(self, session_factory):
+        ingestor = MarketDataIngestor(session_factory)
+        await ingestor.ingest_market_data(
+            {"symbol": "ETHUSD", "price": 3000.0, "timestamp": "2024-01-01T00:00:00Z"}
+        )
+        assert await ingestor.flush() == 1
+
+    async def test_parse_timestamp(self):
+        moment = datetime(2024, 1, 1, 12, 30)
+        assert parse_timestamp(moment) is moment
+        assert parse_timestamp("2024-01-01T12:30:00Z") == moment
+        assert parse_timestamp((moment - datetime(1970, 1, 1)).total_seconds()) == moment
@@ -1,9 +1,11 @@
+import json
 import pytest
 from httpx import AsyncClient
 from datetime import datetime, timedelta
 from ..main import app
 from ..models.market_data import MarketData
 from ..models.trade_setup import TradeSetup
+from ..services.bars import backfill_bars
 
 @pytest.mark.asyncio
 class TestMarketAnalysisAPI:
@@ -62,6 +64,44 @@ class TestMarketAnalysisAPI:
         assert "stop_loss" in setup
         assert "target_price" in setup
 
+    async def test_get_batch_analysis(self, test_client, test_data):
+        """Test analysing several symbols in one request"""
+        response = await test_client.get("/api/v1/analysis/batch?symbols=BTCUSD,INVALID")
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert set(data["results"]) == {"BTCUSD"}
+        assert data["missing"] == ["INVALID"]
+        
+        analysis = data["results"]["BTCUSD"]
+        assert "setup" in analysis
+        assert "invalidation_zones" in analysis
+        assert analysis["setup"]["setup_type"] in ["MOMENTUM", "MEAN_REVERSION"]
+
+    async def test_analysis_over_bars(self, test_client, test_data, async_session):
+        """Test analysing OHLCV bars instead of raw ticks"""
+        await backfill_bars(async_session, "BTCUSD", datetime.utcnow() - timedelta(hours=2), ["5m"])
+        response = await test_client.get("/api/v1/analysis/current?symbol=BTCUSD&timeframe=5m")
+        assert response.status_code == 200
+        assert response.json()["timeframe"] == "5m"
+        
+        response = await test_client.get("/api/v1/backtest?symbols=BTCUSD&timeframe=5m")
+        assert 20 <= response.json()["bars"] <= 21
+        
+        response = await test_client.get("/api/v1/analysis/batch?symbols=BTCUSD&timeframe=1m")
+        assert response.json()["missing"] == ["BTCUSD"]
+
+    async def test_analysis_over_few_bars(self, test_client, test_data, async_session):
+        """Fewer bars than the 20-period SMA give a setup without invalidation zones"""
+        await backfill_bars(async_session, "BTCUSD", datetime.utcnow() - timedelta(hours=2), ["1h"])
+        response = await test_client.get("/api/v1/analysis/current?symbol=BTCUSD&timeframe=1h")
+        assert response.status_code == 200
+        assert response.json()["invalidation_zones"] is None
+
+    async def test_rejects_unknown_timeframe(self, test_client):
+        response = await test_client.get("/api/v1/analysis/current?symbol=BTCUSD&timeframe=2m")
+        assert response.status_code == 422
+
     async def test_get_setup_history(self, test_client, test_data):
         """Test getting trade setup history"""
         response = await test_client.get("/api/v1/setups/history?symbol=BTCUSD&limit=10")
@@ -80,6 +120,34 @@ class TestMarketAnalysisAPI:
         assert "stop_loss" in setup
         assert "target_price" in setup
         assert "timestamp" in setup
+        assert "next_cursor" in data
+
+    async def test_setup_history_rejects_bad_cursor(self, test_client):
+        """Test that a malformed history cursor is a client error"""
+        response = await test_client.get("/api/v1/setups/history?symbol=BTCUSD&cursor=bogus")
+        assert response.status_code == 400
+
+    async def test_export_setup_history(self, test_client, test_data):
+        """Test streaming setup history as NDJSON"""
+        response = await test_client.get("/api/v1/setups/history/export?symbol=BTCUSD")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) > 0
+        assert "entry_price" in lines[0]
+
+    async def test_backtest(self, test_client, test_data):
+        """Test backtesting stored history"""
+        response = await test_client.get("/api/v1/backtest?symbols=BTCUSD,NOPE&min_score=0.3")
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["bars"] == 100
+        assert data["missing"] == ["NOPE"]
+        for key in ("trades", "win_rate", "average_r", "r_distribution"):
+            assert key in data
+        assert data["symbols"]["BTCUSD"]["bars"] == 100
 
     async def test_invalid_symbol(self, test_client):
         """Test requesting analysis for invalid symbol"""
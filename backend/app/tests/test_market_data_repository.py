@@ -0,0 +1,65 @@
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from ..models.base import Base
+from ..models.market_data import MarketData
+from ..services.market_data_repository import fetch_price_matrix, fetch_series
+from ..services.market_processor import MarketProcessor, MarketSeries
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest.fixture
+async def async_session():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        now = datetime.utcnow()
+        # Inserted newest first to check the fetch orders by timestamp
+        session.add_all([
+            MarketData(symbol="BTCUSD", price=100.0 + i, volume=float(i),
+                       timestamp=now - timedelta(minutes=60 - i))
+            for i in reversed(range(60))
+        ])
+        session.add(MarketData(symbol="ETHUSD", price=10.0, volume=None,
+                               timestamp=now - timedelta(minutes=1)))
+        session.add(MarketData(symbol="BTCUSD", price=1.0, volume=1.0,
+                               timestamp=now - timedelta(days=3)))
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+@pytest.mark.asyncio
+class TestMarketDataRepository:
+    async def test_fetch_series_is_columnar_and_ordered(self, async_session):
+        since = datetime.utcnow() - timedelta(hours=24)
+        series = await fetch_series(async_session, "BTCUSD", since)
+
+        assert isinstance(series, MarketSeries)
+        assert series.prices.dtype == np.float64
+        np.testing.assert_array_equal(series.prices, 100.0 + np.arange(60))
+        np.testing.assert_array_equal(series.volumes, np.arange(60, dtype=np.float64))
+        assert len(async_session.identity_map) == 0
+
+    async def test_missing_volume_and_symbol(self, async_session):
+        since = datetime.utcnow() - timedelta(hours=24)
+        series = await fetch_series(async_session, "ETHUSD", since)
+        assert series.volumes.tolist() == [0.0]
+        assert await fetch_series(async_session, "INVALID", since) is None
+
+    async def test_fetch_price_matrix(self, async_session):
+        since = datetime.utcnow() - timedelta(hours=24)
+        matrix = await fetch_price_matrix(async_session, ["BTCUSD", "ETHUSD"], since)
+        assert matrix.symbols == ["BTCUSD", "ETHUSD"]
+        assert matrix.lengths.tolist() == [60, 1]
+        assert matrix.prices[1, -1] == 10.0
+
+    async def test_processor_accepts_series(self, async_session):
+        processor = MarketProcessor()
+        since = datetime.utcnow() - timedelta(hours=24)
+        series = await fetch_series(async_session, "BTCUSD", since)
+        rows = [MarketData(price=p, volume=v) for p, v in zip(series.prices, series.volumes)]
+        assert processor.identify_setup(series) == processor.identify_setup(rows)
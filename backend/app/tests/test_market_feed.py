@@ -0,0 +1,223 @@
+import asyncio
+import json
+import pytest
+from sqlalchemy import select
+from ..core.config import Settings
+from ..models.market_data import MarketData
+from ..services.ingestion import MarketDataIngestor
+from ..services.market_feed import MarketFeedClient, SequenceTracker, run_feed, supervise_feed
+from ..services.tradingview_service import TradingViewService
+from ..services.websocket_manager import WebSocketManager
+from .mock_tradingview import MockMarketFeed, MockTradingView
+from .test_websocket_service import MockWebSocket
+
+async def wait_until(predicate, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+async def collect(feed: MarketFeedClient, ticks: list):
+    async for tick in feed.ticks():
+        ticks.append(tick)
+
+@pytest.fixture
+async def mock_feed():
+    server = MockMarketFeed()
+    await server.start()
+    yield server
+    await server.stop()
+
+def test_sequence_tracker_reorders_and_drops_duplicates():
+    tracker = SequenceTracker()
+    assert tracker.push(1, "a") == ["a"]
+    assert tracker.push(3, "c") == []
+    assert tracker.missing() == (2, 2)
+    assert tracker.push(4, "d") == []
+    assert tracker.push(2, "b") == ["b", "c", "d"]
+    assert tracker.push(3, "c") == []
+    assert tracker.duplicates == 1
+    assert tracker.missing() is None
+
+def test_sequence_tracker_skips_lost_ticks():
+    tracker = SequenceTracker(last_seq=10)
+    assert tracker.push(14, "n") == []
+    assert tracker.missing() == (11, 13)
+    assert tracker.skip_gap() == ["n"]
+    assert tracker.lost == 3
+    assert tracker.last_seq == 14
+    assert tracker.gap_since is None
+
+@pytest.mark.asyncio
+class TestMarketFeedClient:
+    async def test_resumes_after_disconnect(self, mock_feed):
+        feed = MarketFeedClient(mock_feed.url, ["BTCUSD"], reconnect_delay=0.05)
+        ticks = []
+        task = asyncio.create_task(collect(feed, ticks))
+        try:
+            await wait_until(lambda: mock_feed.subscribes == 1)
+            for i in range(10):
+                mock_feed.publish("BTCUSD", 100.0 + i)
+            await wait_until(lambda: len(ticks) == 10)
+            
+            await mock_feed.disconnect_all()
+            # Published while the client is away; replayed when it resumes
+            for i in range(10, 20):
+                mock_feed.publish("BTCUSD", 100.0 + i)
+            await wait_until(lambda: len(ticks) == 20)
+            await asyncio.sleep(0.05)
+            
+            assert [tick["price"] for tick in ticks] == [100.0 + i for i in range(20)]
+            assert feed.stats()["connects"] == 2
+            assert feed.stats()["lost"] == 0
+        finally:
+            task.cancel()
+
+    async def test_replays_ticks_missing_from_live_stream(self, mock_feed):
+        feed = MarketFeedClient(mock_feed.url, ["BTCUSD", "ETHUSD"])
+        ticks = []
+        task = asyncio.create_task(collect(feed, ticks))
+        try:
+            await wait_until(lambda: mock_feed.subscribes == 1)
+            mock_feed.publish("BTCUSD", 100.0)
+            await wait_until(lambda: len(ticks) == 1)
+            
+            mock_feed.drop("BTCUSD", 3)
+            for i in range(1, 10):
+                mock_feed.publish("BTCUSD", 100.0 + i)
+                mock_feed.publish("ETHUSD", 10.0 + i)
+            await wait_until(lambda: len(ticks) == 19)
+            
+            btc = [tick["price"] for tick in ticks if tick["symbol"] == "BTCUSD"]
+            assert btc == [100.0 + i for i in range(10)]
+            assert mock_feed.replay_requests == 1
+            assert feed.stats()["lost"] == 0
+        finally:
+            task.cancel()
+
+    async def test_gives_up_on_ticks_the_feed_no_longer_keeps(self, mock_feed):
+        mock_feed.history = 3
+        api = MockTradingView()
+        await api.start()
+        snapshots = TradingViewService(Settings(TRADINGVIEW_BASE_URL=api.base_url))
+        feed = MarketFeedClient(mock_feed.url, ["BTCUSD"], snapshots=snapshots)
+        ticks = []
+        task = asyncio.create_task(collect(feed, ticks))
+        try:
+            await wait_until(lambda: mock_feed.subscribes == 1)
+            mock_feed.publish("BTCUSD", 100.0)
+            await wait_until(lambda: len(ticks) == 1)
+            
+            # Seqs 2-6 never reach the client and only 6-8 are still kept
+            mock_feed.drop("BTCUSD", 5)
+            for i in range(1, 8):
+                mock_feed.publish("BTCUSD", 100.0 + i)
+            await wait_until(lambda: len(ticks) == 4)
+            await asyncio.sleep(0.05)
+            
+            # The ticks after the gap are still being replayed, so no older-than-them snapshot goes first
+            assert [tick["price"] for tick in ticks] == [100.0, 105.0, 106.0, 107.0]
+            assert feed.stats()["lost"] == 4
+            assert feed.stats()["snapshots"] == 0
+        finally:
+            task.cancel()
+            await snapshots.close()
+            await api.stop()
+
+    async def test_snapshot_never_runs_time_backwards(self):
+        class Snapshots:
+            async def get_market_data(self, symbol):
+                return dict(self.snapshot, symbol=symbol)
+
+        snapshots = Snapshots()
+        feed = MarketFeedClient("ws://unused", ["BTCUSD"], snapshots=snapshots)
+        released = [{"symbol": "BTCUSD", "price": 105.0, "timestamp": 1_700_000_100.0}]
+
+        snapshots.snapshot = {"price": 110.0, "timestamp": 1_700_000_200.0}
+        assert [tick["price"] for tick in await feed._lost("BTCUSD", released)] == [105.0, 110.0]
+        # Older than what was released, or without a price: left out
+        snapshots.snapshot = {"price": 110.0, "timestamp": 1_700_000_000.0}
+        assert await feed._lost("BTCUSD", released) == released
+        snapshots.snapshot = {"price": None, "timestamp": 1_700_000_200.0}
+        assert await feed._lost("BTCUSD", released) == released
+        assert await feed._lost("BTCUSD", []) == []
+        assert feed.stats()["snapshots"] == 1
+        await feed.close()
+
+    async def test_drops_malformed_messages(self, mock_feed):
+        feed = MarketFeedClient(mock_feed.url, ["BTCUSD"])
+        ticks = []
+        task = asyncio.create_task(collect(feed, ticks))
+        try:
+            await wait_until(lambda: mock_feed.subscribes == 1)
+            mock_feed.send_raw("not json")
+            mock_feed.send_raw(json.dumps({"type": "tick", "symbol": "BTCUSD", "price": 1.0}))
+            mock_feed.send_raw(json.dumps({"type": "tick", "symbol": "BTCUSD", "seq": 1, "price": None}))
+            mock_feed.send_raw(json.dumps(["tick"]))
+            mock_feed.publish("BTCUSD", 100.0)
+            await wait_until(lambda: len(ticks) == 1)
+            
+            assert ticks[0]["price"] == 100.0
+            assert feed.stats()["malformed"] == 4
+            assert feed.stats()["connects"] == 1
+        finally:
+            task.cancel()
+
+    async def test_supervisor_restarts_failed_pipeline(self, mock_feed, session_factory):
+        class FailingOnce(MarketDataIngestor):
+            failed = False
+
+            async def ingest_market_data(self, data):
+                if not self.failed:
+                    self.failed = True
+                    raise RuntimeError("ingestor broke")
+                return await super().ingest_market_data(data)
+
+        ingestor = FailingOnce(session_factory)
+        manager = WebSocketManager(coalesce_interval=None)
+        feed = MarketFeedClient(mock_feed.url, ["BTCUSD"])
+        task = asyncio.create_task(supervise_feed(feed, ingestor, manager, restart_delay=0.01))
+        try:
+            await wait_until(lambda: mock_feed.subscribes == 1)
+            for i in range(5):
+                mock_feed.publish("BTCUSD", 100.0 + i)
+            await wait_until(lambda: ingestor.pending == 4)
+            
+            assert feed.stats()["restarts"] == 1
+            assert mock_feed.subscribes == 2
+        finally:
+            task.cancel()
+            await manager.close()
+
+    async def test_pipeline_ingests_and_broadcasts(self, mock_feed, session_factory):
+        ingestor = MarketDataIngestor(session_factory, flush_interval=0.05)
+        manager = WebSocketManager(coalesce_interval=None)
+        websocket = MockWebSocket()
+        await manager.connect(websocket)
+        await manager.subscribe_to_symbol(websocket, "BTCUSD")
+        feed = MarketFeedClient(mock_feed.url, ["BTCUSD"])
+        
+        await ingestor.start()
+        task = asyncio.create_task(run_feed(feed, ingestor, manager))
+        try:
+            await wait_until(lambda: mock_feed.subscribes == 1)
+            await mock_feed.replay({"symbol": "BTCUSD", "price": 100.0 + i, "volume": 1.0} for i in range(30))
+            await wait_until(lambda: manager.ticks_received == 30)
+            await manager.drain()
+        finally:
+            task.cancel()
+            await ingestor.stop()
+            await manager.close()
+        
+        async with session_factory() as session:
+            result = await session.execute(select(MarketData.price).order_by(MarketData.id))
+            assert result.scalars().all() == [100.0 + i for i in range(30)]
+        
+        # Updates may be conflated and sent as deltas; the merged view ends on the last tick
+        latest = {}
+        for message in websocket.sent_messages:
+            message = json.loads(message)
+            if message.get("type") == "market_data":
+                latest.update(message["data"])
+        assert latest["price"] == 129.0
+        assert latest["sma_20"] == pytest.approx(sum(110.0 + i for i in range(20)) / 20)
@@ -1,7 +1,8 @@
 import pytest
 import numpy as np
 from datetime import datetime, timedelta
-from ..services.market_processor import MarketProcessor
+from ..services.market_processor import MarketProcessor, MarketSeries, PriceMatrix, PriceWindow
+from ..services import indicators
 from ..models.market_data import MarketData
 
 def create_sample_market_data(base_price=50000.0, num_points=100):
@@ -97,3 +98,61 @@ class TestMarketProcessor:
         assert isinstance(zones['upper_zone'], float)
         assert isinstance(zones['lower_zone'], float)
         assert zones['upper_zone'] > zones['lower_zone']
+
+    async def test_invalidation_zones_need_twenty_prices(self, market_processor):
+        """A window shorter than the 20-period SMA has no zones, like identify_setups"""
+        short = MarketSeries(np.linspace(100.0, 110.0, 5), np.ones(5))
+        setup, zones = market_processor.analyze(short)
+        assert zones is None
+        assert setup['entry_price'] == 110.0
+
+    async def test_analysis_context_caches_indicators(self, market_processor, sample_data, monkeypatch):
+        """Shared indicators are computed once per analysis context"""
+        calls = []
+        original_sma = indicators.sma
+
+        def counting_sma(prices, period):
+            calls.append(period)
+            return original_sma(prices, period)
+
+        monkeypatch.setattr(indicators, "sma", counting_sma)
+        context = market_processor.build_context(sample_data)
+        market_processor.identify_setup(context)
+        market_processor.calculate_invalidation_zones(context)
+
+        assert sorted(calls) == [20, 50]
+        assert market_processor.build_context(context) is context
+
+    async def test_identify_setups_matches_single_symbol(self, market_processor):
+        """Batch analysis over a price matrix matches per-symbol analysis"""
+        series = {
+            "BTCUSD": create_sample_market_data(50000.0, 200),
+            "ETHUSD": create_sample_market_data(3000.0, 80),
+            "SOLUSD": create_sample_market_data(100.0, 30),
+        }
+        rows = [(symbol, d.price, d.volume) for symbol, data in series.items() for d in data]
+        matrix = PriceMatrix.from_columns(*zip(*rows))
+        
+        results = market_processor.identify_setups(matrix)
+        
+        assert set(results) == set(series)
+        for symbol, data in series.items():
+            assert results[symbol]["setup"] == pytest.approx(market_processor.identify_setup(data))
+            zones = market_processor.calculate_invalidation_zones(data)
+            assert results[symbol]["invalidation_zones"] == pytest.approx(zones)
+
+    async def test_price_window_matches_full_history_tail(self, market_processor):
+        """A bounded window analyses the same as the tail of the full series"""
+        data = create_sample_market_data(num_points=300)
+        window = PriceWindow(120)
+        for d in data:
+            window.append(d.price, d.volume, d.timestamp)
+            window.append(d.price, d.volume, d.timestamp)  # re-polled, ignored
+        
+        series = window.series()
+        assert len(window) == 120
+        assert series.prices.tolist() == [d.price for d in data[-120:]]
+        tail = MarketSeries(
+            np.array([d.price for d in data[-120:]]), np.array([d.volume for d in data[-120:]])
+        )
+        assert market_processor.identify_setup(series) == pytest.approx(market_processor.identify_setup(tail))
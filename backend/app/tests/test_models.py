@@ -1,30 +1,8 @@
 import pytest
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from ..models.base import Base
 from ..models.market_data import MarketData
 from ..models.trade_setup import TradeSetup
 from datetime import datetime
 
-# Use in-memory SQLite for testing
-TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
-
-@pytest.fixture
-async def async_session():
-    engine = create_async_engine(TEST_DATABASE_URL, echo=True)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session() as session:
-        yield session
-        await session.rollback()
-    
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-
 @pytest.mark.asyncio
 async def test_market_data_creation(async_session):
     """Test creating and retrieving market data"""
@@ -0,0 +1,56 @@
+import pytest
+from ..services.backtest import run_backtest
+from ..services.market_processor import MarketProcessor, SignalParams
+from ..services.param_sweep import evaluate, format_table, param_grid, prepare_history, rank, run_sweep
+from .synthetic import random_walk
+
+def test_params_drive_classification_and_exits():
+    processor = MarketProcessor(SignalParams(strong_score=0.6, momentum_stop=0.05, momentum_target=0.1))
+    assert processor._classify(0.65).value == "STRONG"
+    assert MarketProcessor()._classify(0.65).value == "MODERATE"
+    
+    levels = processor._build_setup(processor._classify(0.9), processor._classify(0.1), 100.0, 95.0)
+    assert levels["stop_loss"] == pytest.approx(95.0)
+    assert levels["target_price"] == pytest.approx(110.0)
+    assert levels["r_multiple"] == pytest.approx(2.0)
+
+def test_param_grid():
+    grid = param_grid(strong_score=(0.6, 0.8), momentum_target=(0.04, 0.06, 0.09))
+    assert len(grid) == 6
+    assert {p.strong_score for p in grid} == {0.6, 0.8}
+    assert all(p.momentum_stop == SignalParams().momentum_stop for p in grid)
+    with pytest.raises(ValueError):
+        param_grid(not_a_param=(1,))
+
+def test_shared_inputs_match_full_backtest():
+    series = {f"SYM{i}": random_walk(4000, seed=i) for i in range(2)}
+    params = SignalParams(strong_score=0.5)
+    result = evaluate(params, prepare_history(series))
+    summary = run_backtest(series, workers=1, params=params).summary()
+    
+    assert result["trades"] == summary["trades"]
+    assert result["expectancy"] == pytest.approx(summary["average_r"])
+
+def test_sweep_ranks_by_expectancy_and_runs_in_parallel():
+    series = {f"SYM{i}": random_walk(4000, seed=i) for i in range(2)}
+    grid = param_grid(strong_score=(0.5, 0.7), momentum_target=(0.03, 0.06), mean_reversion_stop=(0.01, 0.02))
+    sequential = run_sweep(series, grid, min_trades=5, workers=1)
+    parallel = run_sweep(series, grid, min_trades=5, workers=2)
+    
+    assert len(sequential) == 8
+    assert [(r["params"], r["trades"], r["expectancy"]) for r in sequential] == [
+        (r["params"], r["trades"], r["expectancy"]) for r in parallel
+    ]
+    ranked = [r for r in sequential if r["trades"] >= 5]
+    assert [r["expectancy"] for r in ranked] == sorted((r["expectancy"] for r in ranked), reverse=True)
+    
+    table = format_table(sequential, ["strong_score", "momentum_target"], top=3)
+    assert len(table.splitlines()) == 4
+
+def test_rank_puts_thin_samples_last():
+    results = [
+        {"params": None, "trades": 3, "expectancy": 5.0},
+        {"params": None, "trades": 40, "expectancy": 0.2},
+        {"params": None, "trades": 80, "expectancy": 0.4},
+    ]
+    assert [r["trades"] for r in rank(results, min_trades=30)] == [80, 40, 3]
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+import pytest
+from datetime import datetime
+from ..models.market_data import MarketData
+from ..services.pubsub import LocalBus, MessageBus, UnixSocketBus, create_bus
+from ..services.websocket_manager import WebSocketManager
+from .test_websocket_service import MockWebSocket
+
+class Recorder:
+    def __init__(self, bus):
+        self.messages = []
+        bus.subscribe(lambda channel, payload: self.messages.append((channel, payload)))
+
+async def wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+def test_create_bus(tmp_path):
+    assert isinstance(create_bus("local"), LocalBus)
+    assert isinstance(create_bus("unix", str(tmp_path / "bus.sock")), UnixSocketBus)
+    with pytest.raises(ValueError):
+        create_bus("redis")
+
+@pytest.mark.asyncio
+async def test_failing_handler_is_logged_and_others_still_run(caplog):
+    with pytest.raises(TypeError):
+        MessageBus()
+    bus = LocalBus()
+    bus.subscribe(lambda channel, payload: 1 / 0)
+    recorder = Recorder(bus)
+    with caplog.at_level(logging.ERROR):
+        await bus.publish("alerts", {"n": 1})
+
+    assert recorder.messages == [("alerts", {"n": 1})]
+    assert "ZeroDivisionError" in caplog.text
+
+@pytest.mark.asyncio
+class TestUnixSocketBus:
+    @pytest.fixture
+    async def buses(self, tmp_path):
+        path = str(tmp_path / "bus.sock")
+        buses = [UnixSocketBus(path, reconnect_delay=0.05) for _ in range(3)]
+        for bus in buses:
+            await bus.start()
+        yield buses
+        for bus in buses:
+            await bus.stop()
+
+    async def test_one_hub_is_elected(self, buses):
+        assert [bus.is_hub for bus in buses] == [True, False, False]
+
+    async def test_publish_reaches_every_worker(self, buses):
+        """A message from any worker is delivered once to every worker, itself included"""
+        recorders = [Recorder(bus) for bus in buses]
+        await buses[1].publish("market_data", {"symbol": "BTCUSD", "price": 1.0})
+        await buses[0].publish("setup_alert", {"symbol": "ETHUSD"})
+
+        await wait_for(lambda: all(len(r.messages) == 2 for r in recorders))
+        for recorder in recorders:
+            assert sorted(channel for channel, _ in recorder.messages) == ["market_data", "setup_alert"]
+
+    async def test_survivors_elect_a_new_hub(self, buses):
+        await buses[0].stop()
+        await wait_for(lambda: buses[1].is_hub or buses[2].is_hub)
+        await wait_for(lambda: buses[1]._connected.is_set() and buses[2]._connected.is_set())
+
+        recorders = [Recorder(bus) for bus in buses[1:]]
+        follower = buses[2] if buses[1].is_hub else buses[1]
+        await follower.publish("market_data", {"symbol": "BTCUSD"})
+        await wait_for(lambda: all(len(r.messages) == 1 for r in recorders))
+
+@pytest.mark.asyncio
+class TestManagerScaleOut:
+    async def test_broadcast_reaches_clients_in_other_workers(self, tmp_path):
+        """A tick broadcast in one worker is delivered to a client connected to another"""
+        path = str(tmp_path / "bus.sock")
+        publisher = WebSocketManager(bus=UnixSocketBus(path))
+        subscriber = WebSocketManager(bus=UnixSocketBus(path))
+        await publisher.bus.start()
+        await subscriber.bus.start()
+
+        websocket = MockWebSocket()
+        await subscriber.connect(websocket)
+        await subscriber.subscribe_to_symbol(websocket, "BTCUSD")
+
+        await publisher.broadcast_market_data(MarketData(
+            symbol="BTCUSD",
+            price=50000.0,
+            volume=100.0,
+            timestamp=datetime(2024, 1, 1)
+        ))
+        await wait_for(lambda: websocket.sent_messages)
+
+        message = json.loads(websocket.sent_messages[0])
+        assert message["data"]["price"] == 50000.0
+        assert message["data"]["timestamp"] == "2024-01-01T00:00:00"
+
+        await subscriber.close()
+        await publisher.bus.stop()
+        await subscriber.bus.stop()
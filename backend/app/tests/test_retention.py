@@ -0,0 +1,54 @@
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from ..models.base import Base
+from ..models.market_data import MarketData
+from ..models.trade_setup import TradeSetup
+from ..services.retention import MarketDataRetention, partition_day, partition_name
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+def test_composite_indexes():
+    """The 24h window queries are served by (symbol, timestamp) indexes"""
+    for model in (MarketData, TradeSetup):
+        columns = {tuple(c.name for c in index.columns) for index in model.__table__.indexes}
+        assert ("symbol", "timestamp") in columns
+
+def test_partition_names():
+    assert partition_name(date(2024, 3, 9)) == "market_data_p20240309"
+    assert partition_day("market_data_p20240309") == date(2024, 3, 9)
+    assert partition_day("market_data_default") is None
+
+@pytest.mark.asyncio
+async def test_retention_deletes_expired_rows(engine):
+    now = datetime(2024, 6, 1)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add_all([
+            MarketData(symbol="BTCUSD", price=1.0, volume=1.0, timestamp=now - timedelta(days=d))
+            for d in range(10)
+        ])
+        await session.commit()
+
+    retention = MarketDataRetention(engine, retention_days=3, delete_chunk=2, partitioned=False)
+    assert await retention.ensure_partitions() == []
+    assert await retention.apply_retention(now=now) == 6
+
+    async with factory() as session:
+        remaining = await session.scalar(select(func.count()).select_from(MarketData))
+    assert remaining == 4
+
+@pytest.mark.asyncio
+async def test_retention_disabled_keeps_rows(engine):
+    retention = MarketDataRetention(engine, retention_days=None, partitioned=False)
+    assert await retention.apply_retention() == 0
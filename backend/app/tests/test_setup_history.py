@@ -0,0 +1,79 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from ..models.base import Base
+from ..models.trade_setup import TradeSetup
+from ..services.setup_history import decode_cursor, encode_cursor, fetch_history_page, stream_history
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+START = datetime(2024, 1, 1)
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        # Pairs of setups share a timestamp so paging has to break ties on id
+        await session.execute(insert(TradeSetup), [
+            {
+                "symbol": symbol,
+                "setup_type": "MOMENTUM",
+                "signal_strength": "STRONG",
+                "r_multiple": 3.0,
+                "entry_price": 50000.0 + i,
+                "stop_loss": 49000.0,
+                "target_price": 53000.0,
+                "timestamp": START + timedelta(minutes=i // 2)
+            }
+            for i in range(25)
+            for symbol in ("BTCUSD", "ETHUSD")
+        ])
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(START, 42)
+    assert decode_cursor(cursor) == (START, 42)
+    for bad in ("", "not-a-cursor", encode_cursor(START, 1)[:-3]):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+@pytest.mark.asyncio
+class TestSetupHistory:
+    async def test_pages_cover_history_once(self, db):
+        prices, cursor = [], None
+        while True:
+            setups, cursor = await fetch_history_page(db, "BTCUSD", 4, cursor)
+            assert len(setups) <= 4
+            prices.extend(setup["entry_price"] for setup in setups)
+            if cursor is None:
+                break
+        
+        assert len(prices) == 25
+        assert len(set(prices)) == 25
+        assert prices[0] == 50024.0
+
+    async def test_last_full_page_has_no_cursor(self, db):
+        setups, cursor = await fetch_history_page(db, "BTCUSD", 25)
+        assert len(setups) == 25
+        assert cursor is None
+
+    async def test_stream_matches_pages_and_filters(self, db):
+        streamed = [setup async for setup in stream_history(db, "ETHUSD", chunk_size=7)]
+        assert len(streamed) == 25
+        
+        _, cursor = await fetch_history_page(db, "ETHUSD", 10)
+        rest = [setup async for setup in stream_history(db, "ETHUSD", cursor)]
+        assert rest == streamed[10:]
+        
+        window = [
+            setup async for setup in stream_history(
+                db, "ETHUSD", since=START + timedelta(minutes=2), until=START + timedelta(minutes=4)
+            )
+        ]
+        assert [setup["entry_price"] for setup in window] == [50007.0, 50006.0, 50005.0, 50004.0]
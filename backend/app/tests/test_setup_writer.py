@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from sqlalchemy import select, func
+from ..models.trade_setup import TradeSetup
+from ..services.setup_writer import TradeSetupWriter
+
+def make_setup(entry_price=50000.0, setup_type="MOMENTUM"):
+    return {
+        "setup_type": setup_type,
+        "signal_strength": "STRONG",
+        "r_multiple": 3.0,
+        "entry_price": entry_price,
+        "stop_loss": entry_price * 0.98,
+        "target_price": entry_price * 1.06
+    }
+
+async def count_rows(session_factory):
+    async with session_factory() as session:
+        return (await session.execute(select(func.count()).select_from(TradeSetup))).scalar()
+
+@pytest.mark.asyncio
+class TestTradeSetupWriter:
+    async def test_batches_in_background(self, session_factory):
+        writer = TradeSetupWriter(session_factory, flush_interval=0.05)
+        await writer.start()
+        for i in range(20):
+            writer.submit(f"SYM{i}", make_setup())
+        assert await count_rows(session_factory) == 0
+        
+        await asyncio.sleep(0.15)
+        assert await count_rows(session_factory) == 20
+        await writer.stop()
+
+    async def test_deduplicates_consecutive_identical_setups(self, session_factory):
+        writer = TradeSetupWriter(session_factory)
+        assert writer.submit("BTCUSD", make_setup())
+        assert not writer.submit("BTCUSD", make_setup())
+        assert writer.submit("ETHUSD", make_setup())
+        assert writer.submit("BTCUSD", make_setup(entry_price=50100.0))
+        assert writer.submit("BTCUSD", make_setup())
+        
+        await writer.flush()
+        assert await count_rows(session_factory) == 4
+        assert writer.stats()["deduplicated"] == 1
+
+    async def test_bounded_queue_drops_and_stop_flushes(self, session_factory):
+        writer = TradeSetupWriter(session_factory, max_pending=3, flush_interval=60)
+        await writer.start()
+        for i in range(5):
+            writer.submit("BTCUSD", make_setup(entry_price=50000.0 + i))
+        assert writer.dropped == 2
+        
+        await writer.stop()
+        assert await count_rows(session_factory) == 3
+
+    async def test_failed_flush_keeps_rows(self, session_factory):
+        writer = TradeSetupWriter(session_factory)
+        writer.submit("BTCUSD", make_setup())
+        async with session_factory() as session:
+            await session.run_sync(lambda s: TradeSetup.__table__.drop(s.connection()))
+            await session.commit()
+        
+        with pytest.raises(Exception):
+            await writer.flush()
+        assert writer.pending == 1
+
+    async def test_failing_flushes_back_off_then_reject_the_bad_row(self, session_factory):
+        writer = TradeSetupWriter(session_factory, flush_interval=0.02, max_attempts=2)
+        for i in range(6):
+            writer.submit(f"SYM{i}", make_setup(entry_price=50000.0 + i))
+        writer._buffer[3]["entry_price"] = {"not": "a price"}
+
+        for _ in range(2):
+            with pytest.raises(Exception):
+                await writer.flush()
+        assert writer.pending == 6 and writer._retry_at > 0
+        # The background flusher waits out the backoff instead of retrying at once
+        await writer.start()
+        await asyncio.sleep(0.01)
+        assert writer.pending == 6
+
+        # Past max_attempts the batch is split and only the offending row is dropped
+        await asyncio.sleep(0.2)
+        await writer.stop()
+        assert writer.pending == 0
+        assert writer.rejected == 1 and writer.written == 5
+        assert await count_rows(session_factory) == 5
@@ -0,0 +1,140 @@
+import asyncio
+import time
+import pytest
+from ..core.config import Settings
+from ..services.rate_limit import TokenBucket
+from ..services.tradingview_service import TradingViewError, TradingViewService
+from .mock_tradingview import MockTradingView
+
+@pytest.fixture
+async def mock_api():
+    server = MockTradingView(latency=0.02)
+    await server.start()
+    yield server
+    await server.stop()
+
+def make_service(mock_api, **overrides):
+    options = {"TRADINGVIEW_RATE_LIMIT": None, "TRADINGVIEW_BACKOFF_BASE": 0.01, **overrides}
+    return TradingViewService(Settings(TRADINGVIEW_BASE_URL=mock_api.base_url, **options))
+
+@pytest.mark.asyncio
+class TestTokenBucket:
+    async def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=50, capacity=5)
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(15)))
+        elapsed = time.monotonic() - started
+        
+        # 5 immediately, the other 10 at 50/s
+        assert 0.18 <= elapsed < 0.4
+        assert bucket.stats()["waited"] == 10
+
+    async def test_disabled(self):
+        bucket = TokenBucket(rate=None)
+        assert await bucket.acquire() == 0.0
+
+@pytest.mark.asyncio
+class TestTradingViewClient:
+    async def test_batch_fetch_is_concurrent_and_pooled(self, mock_api):
+        service = make_service(mock_api, TRADINGVIEW_MAX_CONNECTIONS=8)
+        symbols = [f"SYM{i}" for i in range(40)]
+        try:
+            started = time.monotonic()
+            results = await service.get_market_data_batch(symbols)
+            elapsed = time.monotonic() - started
+            
+            assert list(results) == symbols
+            assert results["SYM3"]["symbol"] == "SYM3"
+            assert results["SYM3"]["price"] is not None
+            # 40 requests x 20ms sequentially would take 0.8s
+            assert elapsed < 0.5
+            assert 1 < mock_api.peak_active <= 8
+            assert len(mock_api.connections) <= 8
+        finally:
+            await service.close()
+
+    async def test_concurrent_requests_for_a_symbol_are_merged(self, mock_api):
+        service = make_service(mock_api)
+        try:
+            results = await asyncio.gather(*(service.get_market_data("BTCUSD") for _ in range(5)))
+            assert all(result == results[0] for result in results)
+            assert mock_api.requests["BTCUSD"] == 1
+            assert service.stats()["merged"] == 4
+            
+            # Finished fetches are not cached
+            await service.get_market_data("BTCUSD")
+            assert mock_api.requests["BTCUSD"] == 2
+        finally:
+            await service.close()
+
+    async def test_retries_transient_failures(self, mock_api):
+        mock_api.failures["BTCUSD"] = 2
+        service = make_service(mock_api)
+        try:
+            data = await service.get_market_data("BTCUSD")
+            assert data["symbol"] == "BTCUSD"
+            assert mock_api.requests["BTCUSD"] == 3
+            assert service.stats()["retries"] == 2
+        finally:
+            await service.close()
+
+    async def test_gives_up_after_max_retries(self, mock_api):
+        mock_api.failures["BTCUSD"] = 10
+        service = make_service(mock_api, TRADINGVIEW_MAX_RETRIES=2)
+        try:
+            with pytest.raises(TradingViewError) as exc_info:
+                await service.get_market_data("BTCUSD")
+            assert exc_info.value.status == 503
+            assert mock_api.requests["BTCUSD"] == 3
+        finally:
+            await service.close()
+
+    async def test_client_errors_are_not_retried(self, mock_api):
+        mock_api.unknown.add("NOPE")
+        service = make_service(mock_api)
+        try:
+            results = await service.get_market_data_batch(["BTCUSD", "NOPE"], return_exceptions=True)
+            assert results["BTCUSD"]["symbol"] == "BTCUSD"
+            assert isinstance(results["NOPE"], TradingViewError)
+            assert results["NOPE"].status == 404
+            assert mock_api.requests["NOPE"] == 1
+        finally:
+            await service.close()
+
+    async def test_rate_limit_spaces_requests(self, mock_api):
+        service = make_service(mock_api, TRADINGVIEW_RATE_LIMIT=40.0, TRADINGVIEW_RATE_BURST=2.0)
+        try:
+            started = time.monotonic()
+            await service.get_market_data_batch([f"SYM{i}" for i in range(10)])
+            # 2 in the burst, 8 more at 40/s
+            assert time.monotonic() - started >= 0.18
+        finally:
+            await service.close()
+
+    async def test_process_market_data_uses_bounded_window(self, mock_api):
+        service = make_service(mock_api, TRADINGVIEW_WINDOW_SIZE=5)
+        try:
+            for _ in range(8):
+                processed = await service.process_market_data("BTCUSD")
+            
+            assert processed["symbol"] == "BTCUSD"
+            assert processed["momentum_signal"] in ("STRONG", "MODERATE", "WEAK", "NEUTRAL")
+            assert processed["mean_reversion_signal"] in ("STRONG", "MODERATE", "WEAK", "NEUTRAL")
+            assert isinstance(processed["r_multiple"], float)
+            assert processed["window"] == 5
+            assert len(service.windows["BTCUSD"].series().prices) == 5
+        finally:
+            await service.close()
+
+    async def test_process_market_data_without_a_price(self, mock_api):
+        service = make_service(mock_api)
+        async def unpriced(symbol):
+            return {"symbol": symbol, "price": None, "volume": None, "timestamp": None}
+
+        service.get_market_data = unpriced
+        try:
+            with pytest.raises(TradingViewError):
+                await service.process_market_data("BTCUSD")
+            assert len(service.windows["BTCUSD"]) == 0
+        finally:
+            await service.close()
@@ -1,8 +1,13 @@
 import pytest
 import json
+import asyncio
+import numpy as np
 from fastapi.testclient import TestClient
-from fastapi.websockets import WebSocket
+from fastapi.websockets import WebSocket, WebSocketDisconnect
 from ..services.websocket_manager import WebSocketManager
+from ..services.client_queue import ClientSendQueue, OverflowPolicy
+from ..services import wire_format
+from ..services.wire_format import SymbolTable, SymbolTableFull, WireFormat, decode_tick, encode_message, epoch_ns
 from ..models.market_data import MarketData
 from datetime import datetime
 
@@ -12,15 +17,29 @@ class MockWebSocket:
         self.closed = False
         self.client = {"id": "test_client"}
 
+    async def accept(self):
+        pass
+
     async def send_text(self, message: str):
         self.sent_messages.append(message)
 
+    async def send_bytes(self, message: bytes):
+        self.sent_messages.append(message)
+
     async def send_json(self, message: dict):
         self.sent_messages.append(json.dumps(message))
 
     async def close(self):
         self.closed = True
 
+class SlowWebSocket(MockWebSocket):
+    async def send_text(self, message: str):
+        await asyncio.sleep(10)
+
+class FailingWebSocket(MockWebSocket):
+    async def send_text(self, message: str):
+        raise RuntimeError("connection reset")
+
 @pytest.mark.asyncio
 class TestWebSocketManager:
     @pytest.fixture
@@ -93,3 +112,330 @@ class TestWebSocketManager:
         # Unsubscribe from symbol
         await websocket_manager.unsubscribe_from_symbol(mock_websocket, "BTCUSD")
         assert "BTCUSD" not in websocket_manager.symbol_subscriptions
+
+    async def test_fan_out_isolates_slow_and_failed_clients(self, mock_websocket, monkeypatch):
+        """One payload is built per broadcast; bad clients are dropped after the send"""
+        from ..services import websocket_manager as manager_module
+        websocket_manager = WebSocketManager(send_timeout=0.05)
+        slow, failing = SlowWebSocket(), FailingWebSocket()
+        for websocket in (mock_websocket, slow, failing):
+            await websocket_manager.connect(websocket)
+            await websocket_manager.subscribe_to_symbol(websocket, "BTCUSD")
+        
+        encoded = []
+        original_encode = manager_module.encode_message
+        monkeypatch.setattr(
+            manager_module, "encode_message",
+            lambda message, *args: encoded.append(message) or original_encode(message, *args)
+        )
+        
+        market_data = MarketData(
+            symbol="BTCUSD",
+            price=50000.0,
+            volume=100.0,
+            timestamp=datetime.utcnow()
+        )
+        await asyncio.wait_for(websocket_manager.broadcast_market_data(market_data), 1.0)
+        await websocket_manager.send_queues[mock_websocket].drain()
+        await asyncio.sleep(0.1)  # let the slow client's send time out
+        
+        assert len(encoded) == 1
+        assert json.loads(mock_websocket.sent_messages[0])["data"]["price"] == 50000.0
+        assert websocket_manager.symbol_subscriptions["BTCUSD"] == {mock_websocket}
+        assert websocket_manager.active_connections == [mock_websocket]
+
+class BlockedWebSocket(MockWebSocket):
+    """Accepts sends only once released, so tests can fill its queue"""
+    def __init__(self):
+        super().__init__()
+        self.released = asyncio.Event()
+
+    async def send_text(self, message: str):
+        await self.released.wait()
+        self.sent_messages.append(message)
+
+@pytest.mark.asyncio
+class TestClientSendQueue:
+    async def test_conflate_keeps_latest_per_symbol(self):
+        """Market data for a symbol collapses to the newest pending tick"""
+        websocket = BlockedWebSocket()
+        queue = ClientSendQueue(websocket, max_size=10, policy=OverflowPolicy.CONFLATE)
+        queue.start()
+        
+        for price in range(5):
+            queue.put(json.dumps({"symbol": "BTCUSD", "price": price}), "market_data", "BTCUSD")
+            await asyncio.sleep(0)
+        queue.put(json.dumps({"symbol": "ETHUSD", "price": 1}), "market_data", "ETHUSD")
+        
+        websocket.released.set()
+        await queue.drain()
+        await queue.close()
+        
+        # The first tick was already in flight when the rest arrived
+        prices = [json.loads(m)["price"] for m in websocket.sent_messages]
+        assert prices == [0, 4, 1]
+        assert queue.conflated == 3
+        assert queue.dropped == 0
+
+    async def test_drop_oldest_never_drops_alerts(self):
+        """A full queue evicts old market data but always keeps setup alerts"""
+        websocket = BlockedWebSocket()
+        queue = ClientSendQueue(websocket, max_size=3, policy=OverflowPolicy.DROP_OLDEST)
+        
+        queue.put("alert-1", "setup_alert")
+        for i in range(5):
+            queue.put(f"tick-{i}", "market_data", "BTCUSD")
+        queue.put("alert-2", "setup_alert")
+        
+        assert queue.dropped == 3
+        queue.start()
+        websocket.released.set()
+        await queue.drain()
+        await queue.close()
+        
+        assert websocket.sent_messages == ["alert-1", "tick-3", "tick-4", "alert-2"]
+
+    async def test_slow_client_does_not_block_broadcast(self):
+        """Broadcasts return immediately while a stalled client's queue stays bounded"""
+        websocket_manager = WebSocketManager(queue_size=4, overflow_policy="drop_oldest")
+        fast, stalled = MockWebSocket(), BlockedWebSocket()
+        for websocket in (fast, stalled):
+            await websocket_manager.connect(websocket)
+            await websocket_manager.subscribe_to_symbol(websocket, "BTCUSD")
+        
+        for i in range(20):
+            market_data = MarketData(
+                symbol="BTCUSD",
+                price=50000.0 + i,
+                volume=100.0,
+                timestamp=datetime.utcnow()
+            )
+            await asyncio.wait_for(websocket_manager.broadcast_market_data(market_data), 0.1)
+            await asyncio.sleep(0)
+        await websocket_manager.send_queues[fast].drain()
+        
+        assert len(fast.sent_messages) == 20
+        stats = websocket_manager.send_queues[stalled].stats()
+        assert stats["depth"] <= 4
+        assert stats["dropped"] > 0
+        
+        stalled.released.set()
+        await websocket_manager.drain()
+        assert json.loads(stalled.sent_messages[-1])["data"]["price"] == 50019.0
+
+def make_tick(price, volume=100.0, rsi=None, symbol="BTCUSD"):
+    return MarketData(
+        symbol=symbol,
+        price=price,
+        volume=volume,
+        rsi=rsi,
+        timestamp=datetime(2024, 1, 1)
+    )
+
+@pytest.mark.asyncio
+class TestTickCoalescing:
+    async def test_deltas_carry_only_changed_fields(self):
+        """The first update is a full snapshot, later ones only what changed"""
+        websocket_manager = WebSocketManager()
+        websocket = MockWebSocket()
+        await websocket_manager.connect(websocket)
+        await websocket_manager.subscribe_to_symbol(websocket, "BTCUSD")
+        
+        for price in (50000.0, 50010.0, 50010.0):
+            await websocket_manager.broadcast_market_data(make_tick(price, rsi=55.0))
+            await websocket_manager.drain()
+        
+        first, second = [json.loads(m) for m in websocket.sent_messages]
+        assert first["delta"] is False
+        assert len(first["data"]) == 9
+        assert second["delta"] is True
+        assert second["data"] == {"symbol": "BTCUSD", "price": 50010.0}
+        await websocket_manager.close()
+
+    async def test_coalesces_ticks_within_interval(self):
+        """A burst of ticks inside one interval becomes a single update"""
+        websocket_manager = WebSocketManager(coalesce_interval=0.05)
+        websocket = MockWebSocket()
+        await websocket_manager.connect(websocket)
+        await websocket_manager.subscribe_to_symbol(websocket, "BTCUSD")
+        
+        for i in range(100):
+            await websocket_manager.broadcast_market_data(make_tick(50000.0 + i))
+        assert websocket.sent_messages == []
+        
+        await asyncio.sleep(0.1)
+        await websocket_manager.drain()
+        
+        assert len(websocket.sent_messages) == 1
+        assert json.loads(websocket.sent_messages[0])["data"]["price"] == 50099.0
+        assert websocket_manager.feed_stats()["ticks_received"] == 100
+        await websocket_manager.close()
+
+    async def test_per_client_max_rate(self):
+        """A rate-limited client gets the latest values once its window reopens"""
+        websocket_manager = WebSocketManager()
+        fast, slow = MockWebSocket(), MockWebSocket()
+        for websocket, max_rate in ((fast, None), (slow, 10)):
+            await websocket_manager.connect(websocket)
+            await websocket_manager.subscribe_to_symbol(websocket, "BTCUSD", max_rate=max_rate)
+        
+        for i in range(5):
+            await websocket_manager.broadcast_market_data(make_tick(50000.0 + i))
+            await websocket_manager.drain()
+        assert len(fast.sent_messages) == 5
+        assert len(slow.sent_messages) == 1
+        
+        await asyncio.sleep(0.2)
+        await websocket_manager.drain()
+        assert len(slow.sent_messages) == 2
+        assert json.loads(slow.sent_messages[1])["data"] == {"symbol": "BTCUSD", "price": 50004.0}
+        await websocket_manager.close()
+
+    async def test_conflated_delta_keeps_earlier_changes(self):
+        """Replacing a queued delta still delivers fields only the replaced one carried"""
+        websocket_manager = WebSocketManager()
+        websocket = BlockedWebSocket()
+        await websocket_manager.connect(websocket)
+        await websocket_manager.subscribe_to_symbol(websocket, "BTCUSD")
+        
+        await websocket_manager.broadcast_market_data(make_tick(50000.0, volume=100.0))
+        await asyncio.sleep(0)  # first snapshot is now in flight
+        await websocket_manager.broadcast_market_data(make_tick(50000.0, volume=200.0))
+        await websocket_manager.broadcast_market_data(make_tick(50001.0, volume=200.0))
+        
+        websocket.released.set()
+        await websocket_manager.drain()
+        
+        update = json.loads(websocket.sent_messages[-1])["data"]
+        assert len(websocket.sent_messages) == 2
+        assert update == {"symbol": "BTCUSD", "price": 50001.0, "volume": 200.0}
+        await websocket_manager.close()
+
+class BinaryWebSocket(MockWebSocket):
+    """Client offering the struct subprotocol ahead of JSON"""
+    def __init__(self, subprotocols=("traffic-light.struct.v1", "traffic-light.json.v1")):
+        super().__init__()
+        self.scope = {"subprotocols": list(subprotocols)}
+        self.accepted_subprotocol = None
+
+    async def accept(self, subprotocol=None):
+        self.accepted_subprotocol = subprotocol
+
+class TestWireFormat:
+    def test_struct_tick_round_trip(self):
+        """Full and delta ticks survive the struct layout, timestamps as epoch ns"""
+        symbols = SymbolTable()
+        timestamp = datetime(2024, 1, 1, 12, 30, 0, 123456)
+        full = {
+            "type": "market_data",
+            "delta": False,
+            "data": {
+                "symbol": "BTCUSD", "price": 50000.5, "volume": 12.0, "timestamp": timestamp,
+                "sma_20": 49900.0, "sma_50": None, "rsi": 61.5,
+                "momentum_score": 0.8, "mean_reversion_score": 0.0
+            }
+        }
+        frame = encode_message(full, WireFormat.STRUCT, symbols)
+        assert isinstance(frame, bytes)
+        assert len(frame) < len(encode_message(full))
+        
+        decoded = decode_tick(frame, symbols)
+        assert decoded["delta"] is False
+        assert decoded["data"] == {**full["data"], "timestamp": epoch_ns(timestamp)}
+        assert decoded["data"]["timestamp"] == 1704112200123456000
+        
+        delta = {"type": "market_data", "delta": True, "data": {"symbol": "BTCUSD", "price": 50001.0}}
+        frame = encode_message(delta, WireFormat.STRUCT, symbols)
+        assert len(frame) == 14
+        assert decode_tick(frame, symbols) == delta
+
+    def test_json_fallback_writes_null_for_nan(self, monkeypatch):
+        monkeypatch.setattr(wire_format, "orjson", None)
+        message = {"type": "market_data", "data": {"price": float("nan"), "rsi": np.float32("inf"), "sma_20": [1.5]}}
+        assert json.loads(encode_message(message)) == {
+            "type": "market_data", "data": {"price": None, "rsi": None, "sma_20": [1.5]}
+        }
+
+    def test_symbol_ids_stop_at_u16(self, monkeypatch):
+        monkeypatch.setattr(wire_format, "MAX_SYMBOL_ID", 2)
+        symbols = SymbolTable()
+        assert [symbols.id_for("A"), symbols.id_for("B"), symbols.id_for("A")] == [1, 2, 1]
+        with pytest.raises(SymbolTableFull):
+            symbols.id_for("C")
+
+        # A symbol without an id still reaches struct clients, as JSON text
+        message = {"type": "market_data", "delta": True, "data": {"symbol": "C", "price": 1.0}}
+        assert json.loads(encode_message(message, WireFormat.STRUCT, symbols)) == message
+
+    def test_msgpack_round_trip(self):
+        msgpack = pytest.importorskip("msgpack")
+        message = {"type": "setup_alert", "data": {"symbol": "BTCUSD"}, "timestamp": datetime(1970, 1, 1, 0, 0, 1)}
+        decoded = msgpack.unpackb(encode_message(message, WireFormat.MSGPACK))
+        assert decoded == {**message, "timestamp": 1_000_000_000}
+
+@pytest.mark.asyncio
+class TestWireNegotiation:
+    async def test_mixed_formats_on_one_broadcast(self):
+        """Struct clients get binary ticks, JSON clients text, from the same broadcast"""
+        websocket_manager = WebSocketManager()
+        binary, text = BinaryWebSocket(), MockWebSocket()
+        for websocket in (binary, text):
+            await websocket_manager.connect(websocket)
+            await websocket_manager.subscribe_to_symbol(websocket, "BTCUSD")
+        assert binary.accepted_subprotocol == "traffic-light.struct.v1"
+        assert websocket_manager.client_formats[text] == WireFormat.JSON
+        
+        market_data = MarketData(
+            symbol="BTCUSD",
+            price=50000.0,
+            volume=100.0,
+            timestamp=datetime(2024, 1, 1)
+        )
+        await websocket_manager.broadcast_market_data(market_data)
+        await websocket_manager.drain()
+        
+        tick = decode_tick(binary.sent_messages[0], websocket_manager.symbol_ids)
+        assert tick["data"]["price"] == 50000.0
+        assert tick["data"]["timestamp"] == epoch_ns(datetime(2024, 1, 1))
+        assert json.loads(text.sent_messages[0])["data"]["timestamp"] == "2024-01-01T00:00:00"
+        
+        # Non-tick messages stay JSON text for struct clients
+        await websocket_manager.broadcast_setup_alert({"symbol": "BTCUSD", "type": "MOMENTUM"})
+        await websocket_manager.drain()
+        assert json.loads(binary.sent_messages[-1])["type"] == "setup_alert"
+        await websocket_manager.close()
+
+    async def test_unknown_subprotocol_falls_back_to_json(self):
+        websocket_manager = WebSocketManager()
+        websocket = BinaryWebSocket(subprotocols=("graphql-ws",))
+        await websocket_manager.connect(websocket)
+        assert websocket.accepted_subprotocol is None
+        assert websocket_manager.client_formats[websocket] == WireFormat.JSON
+        await websocket_manager.close()
+
+class ScriptedWebSocket(MockWebSocket):
+    """Receives the given client messages, then disconnects"""
+    def __init__(self, messages):
+        super().__init__()
+        self.incoming = [json.dumps(message) for message in messages]
+
+    async def receive_text(self) -> str:
+        await asyncio.sleep(0)
+        if not self.incoming:
+            raise WebSocketDisconnect()
+        return self.incoming.pop(0)
+
+@pytest.mark.asyncio
+async def test_invalid_max_rate_gets_an_error_not_a_disconnect(monkeypatch):
+    from ..api.endpoints import websocket as endpoint
+    manager = WebSocketManager()
+    monkeypatch.setattr(endpoint, "websocket_manager", manager)
+    websocket = ScriptedWebSocket(
+        [{"type": "subscribe", "symbol": "BTCUSD", "max_rate": max_rate} for max_rate in ("fast", -5, 0, True)]
+        + [{"type": "subscribe", "symbol": "BTCUSD", "max_rate": 2.5}]
+    )
+    await endpoint.websocket_endpoint(websocket, "alice", db=None)
+    
+    replies = [json.loads(message)["type"] for message in websocket.sent_messages]
+    assert replies == ["error"] * 4 + ["subscription_success"]
+    await manager.close()
@@ -0,0 +1,59 @@
+"""Backtest throughput: one identify_setup call per bar (the only option before)
+vs the vectorized engine, sequential and with one process per symbol.
+
+The naive loop is timed on a short prefix only; its per-bar cost grows with
+history length, so the extrapolation is a lower bound.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_backtest [total_bars] [symbols] [workers ...]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.services.backtest import run_backtest  # noqa: E402
+from app.services.market_processor import MarketProcessor, MarketSeries  # noqa: E402
+from app.tests.synthetic import random_walk  # noqa: E402
+
+NAIVE_BARS = 2000
+
+
+def synthetic(symbols, bars_per_symbol):
+    return {f"SYM{i:03d}": random_walk(bars_per_symbol, seed=i, volatility=0.002) for i in range(symbols)}
+
+
+def naive_bars_per_second(series):
+    processor = MarketProcessor()
+    started = time.perf_counter()
+    for bar in range(NAIVE_BARS):
+        processor.identify_setup(MarketSeries(series.prices[:bar + 1], series.volumes[:bar + 1]))
+    return NAIVE_BARS / (time.perf_counter() - started)
+
+
+def main():
+    args = [int(a) for a in sys.argv[1:]]
+    total = args[0] if len(args) > 0 else 10_000_000
+    symbols = args[1] if len(args) > 1 else 10
+    worker_counts = args[2:] or sorted({1, os.cpu_count() or 1})
+    series = synthetic(symbols, total // symbols)
+    bars = sum(len(s.prices) for s in series.values())
+    print(f"{os.cpu_count()} CPUs, {bars:,} bars over {symbols} symbols")
+    print(f"{'engine':<24} {'elapsed':>10} {'bars/s':>14} {'trades':>8} {'win rate':>9} {'avg R':>7}")
+
+    rate = naive_bars_per_second(next(iter(series.values())))
+    print(f"{'identify_setup per bar':<24} {bars / rate:>8.0f} s {rate:>14,.0f}   (extrapolated from {NAIVE_BARS} bars)")
+
+    for workers in worker_counts:
+        started = time.perf_counter()
+        summary = run_backtest(series, workers=workers).summary()
+        elapsed = time.perf_counter() - started
+        print(f"{f'vectorized, {workers} proc':<24} {elapsed:>8.2f} s {bars / elapsed:>14,.0f} "
+              f"{summary['trades']:>8} {summary['win_rate']:>9.2%} {summary['average_r']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
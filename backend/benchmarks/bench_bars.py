@@ -0,0 +1,62 @@
+"""Analysis over a day of raw ticks vs the last few hundred OHLCV bars, plus
+bar aggregation throughput (incremental per tick and bulk backfill).
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_bars [ticks]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+import numpy as np  # noqa: E402
+from app.services.bars import BarAggregator, aggregate  # noqa: E402
+from app.services.market_processor import MarketProcessor, MarketSeries  # noqa: E402
+from app.tests.synthetic import random_walk  # noqa: E402
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 86_400
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 1, 1)
+    nanoseconds = np.sort(rng.integers(0, 86_400 * 10**9, count)) + np.int64(1_704_067_200 * 10**9)
+    prices, volumes = random_walk(count, seed=0, volatility=0.0005)
+    processor = MarketProcessor()
+
+    tick_ms = timed(lambda: processor.analyze(MarketSeries(prices, volumes)))
+    bars = aggregate(nanoseconds, prices, volumes, 300)
+    recent = MarketSeries(np.ascontiguousarray(bars.close[-300:]), np.ascontiguousarray(bars.volume[-300:]))
+    bar_ms = timed(lambda: processor.analyze(recent))
+    print(f"analyze {count:,} ticks          {tick_ms:>8.2f} ms")
+    print(f"analyze {len(recent.prices)} 5m bars            {bar_ms:>8.2f} ms  ({tick_ms / bar_ms:.0f}x)")
+
+    bulk_ms = timed(lambda: [aggregate(nanoseconds, prices, volumes, s) for s in (1, 60, 300, 3600)])
+    print(f"bulk aggregate, 4 timeframes   {bulk_ms:>8.2f} ms  ({count / bulk_ms * 1000:,.0f} ticks/s)")
+
+    timestamps = [start + timedelta(microseconds=int(ns // 1000)) for ns in nanoseconds - nanoseconds[0]]
+    price_list, volume_list = prices.tolist(), volumes.tolist()
+
+    def incremental():
+        aggregator = BarAggregator()
+        for timestamp, price, volume in zip(timestamps, price_list, volume_list):
+            aggregator.update("BTCUSD", price, volume, timestamp)
+
+    incremental_ms = timed(incremental, repeat=3)
+    print(f"incremental, 4 timeframes      {incremental_ms:>8.2f} ms  ({count / incremental_ms * 1000:,.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Latency and peak memory of loading one symbol's 24h window for analysis:
+full ORM entities vs the column-projected NumPy path.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_fetch [rows ...]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.market_data import MarketData  # noqa: E402
+from app.services.market_data_repository import fetch_series  # noqa: E402
+from app.services.market_processor import MarketProcessor  # noqa: E402
+
+
+async def orm_path(session, since):
+    stmt = select(MarketData).where(
+        MarketData.symbol == "BTCUSD", MarketData.timestamp >= since
+    ).order_by(MarketData.timestamp)
+    rows = (await session.execute(stmt)).scalars().all()
+    return MarketProcessor().identify_setup(rows)
+
+
+async def projected_path(session, since):
+    series = await fetch_series(session, "BTCUSD", since)
+    return MarketProcessor().identify_setup(series)
+
+
+async def measure(factory, path, since):
+    async with factory() as session:
+        tracemalloc.start()
+        started = time.perf_counter()
+        await path(session, since)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed * 1000, peak / 2**20
+
+
+async def run(rows: int):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'fetch.db')}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        now = datetime.utcnow()
+        step = timedelta(hours=23) / rows
+        await conn.execute(insert(MarketData), [
+            {"symbol": "BTCUSD", "price": 100.0 + (i % 500) * 0.1, "volume": 1.0,
+             "timestamp": now - step * i}
+            for i in range(rows)
+        ])
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    since = datetime.utcnow() - timedelta(hours=24)
+
+    for label, path in (("orm entities", orm_path), ("projected arrays", projected_path)):
+        ms, mib = await measure(factory, path, since)
+        print(f"{rows:>10} {label:>18} {ms:>10.1f} ms {mib:>10.1f} MiB peak")
+    await engine.dispose()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for rows in sizes:
+        asyncio.run(run(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Cold-start load of a day of ticks for many symbols: market_data through
+SQLAlchemy vs the memory-mapped history store.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_history_store [symbols] [ticks_per_symbol]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+import numpy as np  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.market_data import MarketData  # noqa: E402
+from app.services.history_store import HistoryColumns, HistoryStore  # noqa: E402
+from app.services.market_data_repository import fetch_series  # noqa: E402
+from app.services.market_processor import MarketProcessor  # noqa: E402
+from app.services.wire_format import epoch_ns  # noqa: E402
+from app.tests.synthetic import random_walk  # noqa: E402
+
+
+def synthetic(count: int, start: datetime, seed: int) -> HistoryColumns:
+    step_ns = int(timedelta(days=1) / timedelta(microseconds=1) * 1000) // count
+    timestamps = epoch_ns(start) + np.arange(count, dtype=np.int64) * step_ns
+    series = random_walk(count, seed, volatility=0.001)
+    return HistoryColumns(timestamps, series.prices, series.volumes)
+
+
+async def load_database(engine, symbols, data):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for symbol, columns in zip(symbols, data):
+            stamps = columns.timestamps.astype("datetime64[ns]").astype("datetime64[us]").tolist()
+            await conn.execute(insert(MarketData), [
+                {"symbol": symbol, "price": price, "volume": volume, "timestamp": stamp}
+                for stamp, price, volume in zip(stamps, columns.prices.tolist(), columns.volumes.tolist())
+            ])
+
+
+async def orm_load(engine, symbols, since):
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        return {symbol: await fetch_series(session, symbol, since) for symbol in symbols}
+
+
+def store_load(root, symbols, since):
+    store = HistoryStore(root)
+    return {symbol: store.read_series(symbol, since) for symbol in symbols}
+
+
+async def run(symbol_count: int, count: int, db_symbols: int):
+    start = datetime.utcnow() - timedelta(days=1)
+    symbols = [f"SYM{i:04d}" for i in range(symbol_count)]
+    data = [synthetic(count, start, i) for i in range(symbol_count)]
+    workdir = tempfile.mkdtemp()
+
+    # Normally filled by ingestion and compaction; a backfill-style merge writes the same segments
+    root = os.path.join(workdir, "history")
+    store = HistoryStore(root)
+    for symbol, columns in zip(symbols, data):
+        store.merge(symbol, columns, start)
+    store.close()
+
+    started = time.perf_counter()
+    loaded = store_load(root, symbols, start)
+    store_seconds = time.perf_counter() - started
+    assert sum(len(series.prices) for series in loaded.values()) == symbol_count * count
+
+    started = time.perf_counter()
+    processor = MarketProcessor()
+    for series in loaded.values():
+        processor.identify_setup(series)
+    analysis_seconds = time.perf_counter() - started
+
+    # The ORM path is timed on a subset and scaled; inserting every row into SQLite takes minutes
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'ticks.db')}")
+    await load_database(engine, symbols[:db_symbols], data[:db_symbols])
+    started = time.perf_counter()
+    await orm_load(engine, symbols[:db_symbols], start)
+    orm_seconds = (time.perf_counter() - started) * symbol_count / db_symbols
+    await engine.dispose()
+
+    print(f"{symbol_count} symbols x {count:,} ticks ({symbol_count * count:,} rows)")
+    print(f"{'ORM fetch_series (scaled from ' + str(db_symbols) + ')':>36} {orm_seconds * 1000:>10.1f} ms")
+    print(f"{'history store cold open + read':>36} {store_seconds * 1000:>10.1f} ms")
+    print(f"{'identify_setup over store series':>36} {analysis_seconds * 1000:>10.1f} ms")
+
+
+def main():
+    symbol_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 8_640
+    asyncio.run(run(symbol_count, count, db_symbols=min(symbol_count, 10)))
+
+
+if __name__ == "__main__":
+    main()
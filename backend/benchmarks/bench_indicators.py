@@ -0,0 +1,69 @@
+"""Per-symbol indicator latency for the vectorized engine vs the legacy loops.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_indicators
+"""
+import time
+import numpy as np
+from app.services import indicators
+from app.tests.synthetic import random_walk
+
+SIZES = [1_000, 100_000, 1_000_000]
+LEGACY_MAX_BARS = 100_000  # the per-window loops take minutes beyond this
+
+
+def legacy_sma(prices, period):
+    return [np.mean(prices[i:i+period]) for i in range(len(prices) - period + 1)]
+
+
+def legacy_rsi(prices, period=14):
+    deltas = np.diff(prices)
+    gains = np.where(deltas > 0, deltas, 0)
+    losses = np.where(deltas < 0, -deltas, 0)
+    avg_gain = np.mean(gains[:period])
+    avg_loss = np.mean(losses[:period])
+    rsi = [100 - (100 / (1 + avg_gain / avg_loss))]
+    for i in range(period, len(deltas)):
+        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+        rsi.append(100 - (100 / (1 + avg_gain / avg_loss)))
+    return rsi
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def vectorized_pass(prices):
+    indicators.sma(prices, 20)
+    indicators.sma(prices, 50)
+    indicators.rsi(prices)
+    indicators.rolling_std(prices, 20)
+
+
+def legacy_pass(prices):
+    legacy_sma(prices, 20)
+    legacy_sma(prices, 50)
+    legacy_rsi(prices)
+
+
+def main():
+    print(f"{'bars':>10} {'vectorized ms':>15} {'legacy ms':>12}")
+    for size in SIZES:
+        prices = random_walk(size, seed=size, start=50000.0, volatility=0.001).prices
+        fast = timed(lambda: vectorized_pass(prices))
+        if size <= LEGACY_MAX_BARS:
+            slow = f"{timed(lambda: legacy_pass(prices), repeat=1):12.1f}"
+        else:
+            slow = f"{'skipped':>12}"
+        print(f"{size:>10} {fast:15.2f} {slow}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Sustained tick ingestion throughput into SQLite (or any DATABASE_URL).
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_ingestion [ticks] [database_url]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.services.ingestion import MarketDataIngestor  # noqa: E402
+from app.tests.synthetic import random_walk  # noqa: E402
+
+SYMBOLS = 100
+
+
+async def run(ticks: int, database_url: str):
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    symbols = [f"SYM{i:03d}" for i in range(SYMBOLS)]
+    series = random_walk(ticks, seed=0, volatility=0.001)
+    prices, volumes = series.prices.tolist(), series.volumes.tolist()
+    base = time.time() - ticks / 1000
+
+    ingestor = MarketDataIngestor(factory, batch_size=10000, max_pending=100000)
+    await ingestor.start()
+    started = time.perf_counter()
+    for i in range(ticks):
+        await ingestor.ingest(symbols[i % SYMBOLS], prices[i], volumes[i], base + i / 1000)
+    await ingestor.stop()
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    stats = ingestor.stats.to_dict()
+    print(f"ticks:              {ticks}")
+    print(f"end-to-end:         {ticks / elapsed:,.0f} ticks/sec")
+    print(f"database writes:    {stats['write_rows_per_second']:,.0f} rows/sec")
+    print(f"flushes:            {stats['flushes']}")
+    print(f"backpressure waits: {stats['backpressure_waits']}")
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    if len(sys.argv) > 2:
+        url = sys.argv[2]
+    else:
+        url = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'ingest.db')}"
+    asyncio.run(run(ticks, url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Event loop lag while large analysis windows are processed inline on the
+loop vs. on the thread and process pools.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_loop_lag [points] [concurrent_calls]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.core.executor import AnalysisExecutor, LoopLagMonitor  # noqa: E402
+from app.services.market_processor import MarketProcessor, MarketSeries  # noqa: E402
+from app.tests.synthetic import random_walk  # noqa: E402
+
+
+async def run(kind: str, series: MarketSeries, calls: int):
+    processor = MarketProcessor()
+    executor = AnalysisExecutor(kind=kind, max_pending=calls, timeout=None)
+    # Warm the pool so worker start-up is not counted
+    await executor.run(processor.analyze, MarketSeries(series.prices[:100], series.volumes[:100]))
+
+    monitor = LoopLagMonitor(interval=0.005, window=100_000)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    await asyncio.gather(*(executor.run(processor.analyze, series) for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+    executor.shutdown()
+
+    lag = monitor.stats()
+    print(f"{kind:>8} {elapsed:>10.2f} s {lag['p99_ms']:>10.1f} {lag['max_ms']:>10.1f}")
+
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    series = random_walk(points, seed=7, volatility=0.001)
+
+    print(f"{points} points x {calls} concurrent analyses, {os.cpu_count()} CPUs")
+    print(f"{'executor':>8} {'wall':>12} {'p99 lag ms':>10} {'max lag ms':>10}")
+    for kind in ("inline", "thread", "process"):
+        asyncio.run(run(kind, series, calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Parameter sweep throughput: a full backtest per combination (indicators
+recomputed every time) vs the sweep runner, which computes indicators once and
+spreads combinations over a process pool.
+
+The per-combination baseline is timed on a sample of the grid and extrapolated.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_param_sweep [bars_per_symbol] [symbols] [workers ...]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.services.backtest import run_backtest  # noqa: E402
+from app.services.param_sweep import DEFAULT_GRID, format_table, param_grid, run_sweep  # noqa: E402
+from benchmarks.bench_backtest import synthetic  # noqa: E402
+
+BASELINE_SAMPLE = 20
+
+
+def main():
+    args = [int(a) for a in sys.argv[1:]]
+    bars = args[0] if len(args) > 0 else 100_000
+    symbols = args[1] if len(args) > 1 else 4
+    worker_counts = args[2:] or sorted({1, os.cpu_count() or 1})
+    series = synthetic(symbols, bars)
+    grid = param_grid(**DEFAULT_GRID)
+    print(f"{os.cpu_count()} CPUs, {len(grid)} combinations, {symbols} symbols x {bars:,} bars")
+    print(f"{'runner':<28} {'elapsed':>10} {'combos/s':>10}")
+
+    started = time.perf_counter()
+    for params in grid[:BASELINE_SAMPLE]:
+        run_backtest(series, workers=1, params=params)
+    rate = BASELINE_SAMPLE / (time.perf_counter() - started)
+    print(f"{'backtest per combination':<28} {len(grid) / rate:>8.0f} s {rate:>10.1f}   (extrapolated)")
+
+    for workers in worker_counts:
+        started = time.perf_counter()
+        results = run_sweep(series, grid, workers=workers)
+        elapsed = time.perf_counter() - started
+        print(f"{f'sweep, {workers} proc':<28} {elapsed:>8.1f} s {len(grid) / elapsed:>10.1f}")
+
+    print()
+    print(format_table(results, list(DEFAULT_GRID), top=5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""WebSocket fan-out throughput across uvicorn-style worker processes sharing
+the Unix-socket pub/sub bus.
+
+A fixed population of simulated clients is split evenly over N worker
+processes; one publisher process pushes ticks onto the bus and every worker
+fans them out to its own clients. Reported throughput is client deliveries per
+second across all workers, so it should grow with workers until cores run out.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_pubsub_scaleout [clients] [ticks] [workers ...]
+"""
+import asyncio
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.services.pubsub import UnixSocketBus  # noqa: E402
+from app.services.websocket_manager import WebSocketManager  # noqa: E402
+
+SYMBOLS = [f"SYM{i:02d}" for i in range(10)]
+
+
+class CountingWebSocket:
+    def __init__(self):
+        self.messages = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.messages += 1
+
+
+async def worker_main(path, clients, ready, results):
+    bus = UnixSocketBus(path, max_peer_buffer=256 * 2**20)
+    manager = WebSocketManager(queue_size=1_000_000, overflow_policy="drop_oldest", bus=bus)
+    done = asyncio.Event()
+    bus.subscribe(lambda channel, payload: channel == "control" and done.set())
+    await bus.start()
+
+    sockets = [CountingWebSocket() for _ in range(clients)]
+    for i, websocket in enumerate(sockets):
+        await manager.connect(websocket)
+        await manager.subscribe_to_symbol(websocket, SYMBOLS[i % len(SYMBOLS)])
+    ready.put(os.getpid())
+
+    await done.wait()
+    await manager.drain()
+    results.put((time.perf_counter(), sum(s.messages for s in sockets)))
+    await manager.close()
+    await bus.stop()
+
+
+async def publisher_main(path, ticks, start):
+    bus = UnixSocketBus(path, max_peer_buffer=256 * 2**20)
+    await bus.start()
+    # Keep the loop running while waiting so the hub accepts every worker first
+    await asyncio.get_running_loop().run_in_executor(None, start.wait)
+    for i in range(ticks):
+        await bus.publish("market_data", {
+            "symbol": SYMBOLS[i % len(SYMBOLS)],
+            "price": 100.0 + i % 100,
+            "volume": float(i),
+            "timestamp": "2024-01-01T00:00:00",
+        })
+        if i % 500 == 0:
+            await asyncio.sleep(0)  # let the bus socket drain
+    await bus.publish("control", {"done": True})
+    await asyncio.sleep(1.0)
+    await bus.stop()
+
+
+def run(workers: int, clients: int, ticks: int):
+    path = os.path.join(tempfile.mkdtemp(), "bus.sock")
+    ready, results, start = mp.Queue(), mp.Queue(), mp.Event()
+
+    # The publisher joins first so it is the hub and workers are all peers
+    publisher = mp.Process(target=lambda: asyncio.run(publisher_main(path, ticks, start)))
+    publisher.start()
+    time.sleep(0.3)
+    procs = [
+        mp.Process(target=lambda: asyncio.run(worker_main(path, clients // workers, ready, results)))
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    for _ in procs:
+        ready.get()
+
+    started = time.perf_counter()
+    start.set()
+    finished = [results.get() for _ in procs]
+    elapsed = max(t for t, _ in finished) - started
+    deliveries = sum(n for _, n in finished)
+    for proc in procs + [publisher]:
+        proc.join()
+    print(f"{workers:>8} {clients:>8} {ticks:>8} {deliveries:>12} {elapsed:>8.2f} s "
+          f"{deliveries / elapsed:>14,.0f}")
+
+
+def main():
+    args = [int(a) for a in sys.argv[1:]]
+    clients = args[0] if len(args) > 0 else 1000
+    ticks = args[1] if len(args) > 1 else 5000
+    worker_counts = args[2:] or [1, 2, 4]
+    mp.set_start_method("fork")
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'clients':>8} {'ticks':>8} {'deliveries':>12} {'elapsed':>10} "
+          f"{'deliveries/s':>14}")
+    for workers in worker_counts:
+        run(workers, clients, ticks)
+
+
+if __name__ == "__main__":
+    main()
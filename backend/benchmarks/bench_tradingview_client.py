@@ -0,0 +1,67 @@
+"""Throughput of fetching many symbols from a local mock TradingView API:
+one request at a time on a default session (the old client) vs the pooled
+client's concurrent batch fetch at several connection limits.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_tradingview_client [symbols] [latency_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+import aiohttp  # noqa: E402
+from app.core.config import Settings  # noqa: E402
+from app.services.tradingview_service import TradingViewService  # noqa: E402
+from app.tests.mock_tradingview import MockTradingView  # noqa: E402
+
+
+async def sequential(base_url, symbols):
+    async with aiohttp.ClientSession() as session:
+        for symbol in symbols:
+            async with session.get(f"{base_url}/markets/{symbol}") as response:
+                await response.json()
+
+
+async def pooled(base_url, symbols, connections):
+    service = TradingViewService(Settings(
+        TRADINGVIEW_BASE_URL=base_url,
+        TRADINGVIEW_MAX_CONNECTIONS=connections,
+        TRADINGVIEW_RATE_LIMIT=None
+    ))
+    try:
+        await service.get_market_data_batch(symbols)
+    finally:
+        await service.close()
+
+
+async def main():
+    args = [int(a) for a in sys.argv[1:]]
+    count = args[0] if len(args) > 0 else 500
+    latency = (args[1] if len(args) > 1 else 20) / 1000
+    symbols = [f"SYM{i:04d}" for i in range(count)]
+
+    server = MockTradingView(latency=latency)
+    base_url = await server.start()
+    print(f"{count} symbols, {latency * 1000:.0f} ms server latency")
+    print(f"{'client':<16} {'connections':>12} {'elapsed':>10} {'req/s':>10}")
+
+    runs = [("sequential", None)] + [("pooled batch", n) for n in (10, 20, 50, 100)]
+    for name, connections in runs:
+        server.connections.clear()
+        started = time.perf_counter()
+        if connections is None:
+            await sequential(base_url, symbols)
+        else:
+            await pooled(base_url, symbols, connections)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<16} {len(server.connections):>12} {elapsed:>8.2f} s {count / elapsed:>10,.0f}")
+    await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""24h window query latency on market_data with the legacy single-column symbol
+index vs the composite (symbol, timestamp) index.
+
+Run from the backend directory (SQLite, stdlib driver for fast bulk loading):
+
+    python -m benchmarks.bench_window_query [rows ...]
+
+e.g. `python -m benchmarks.bench_window_query 10000000 100000000`; the 100M
+case needs ~10 GB of free disk and a long load. Defaults to 1M and 10M rows.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SYMBOLS = 500
+DAYS = 30
+QUERY = (
+    "SELECT price, volume FROM market_data "
+    "WHERE symbol = ? AND timestamp >= ? ORDER BY timestamp"
+)
+INDEXES = {
+    "symbol only": "CREATE INDEX ix_market_data_symbol ON market_data (symbol)",
+    "symbol, timestamp": (
+        "CREATE INDEX ix_market_data_symbol_timestamp ON market_data (symbol, timestamp)"
+    ),
+}
+
+
+def load(path: str, rows: int, end: datetime):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(
+        "CREATE TABLE market_data (id INTEGER PRIMARY KEY, symbol VARCHAR, price FLOAT, "
+        "volume FLOAT, timestamp DATETIME)"
+    )
+    step = timedelta(days=DAYS) / rows
+    start = end - timedelta(days=DAYS)
+
+    def generate():
+        for i in range(rows):
+            ts = start + step * i
+            yield (f"SYM{i % SYMBOLS:03d}", 100.0 + (i % 1000) * 0.01, 1.0,
+                   ts.strftime("%Y-%m-%d %H:%M:%S.%f"))
+
+    conn.executemany(
+        "INSERT INTO market_data (symbol, price, volume, timestamp) VALUES (?, ?, ?, ?)",
+        generate(),
+    )
+    conn.commit()
+    return conn
+
+
+def timed_queries(conn, since: str, repeat: int = 20) -> float:
+    started = time.perf_counter()
+    for i in range(repeat):
+        conn.execute(QUERY, (f"SYM{i % SYMBOLS:03d}", since)).fetchall()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 10_000_000]
+    end = datetime(2024, 1, 31)
+    since = (end - timedelta(hours=24)).strftime("%Y-%m-%d %H:%M:%S.%f")
+    print(f"{'rows':>12} {'index':>20} {'ms/query':>10}  plan")
+    for rows in sizes:
+        path = os.path.join(tempfile.mkdtemp(), "window.db")
+        conn = load(path, rows, end)
+        for label, ddl in INDEXES.items():
+            conn.execute(ddl)
+            conn.execute("ANALYZE")
+            plan = " | ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + QUERY, ("SYM000", since)))
+            print(f"{rows:>12} {label:>20} {timed_queries(conn, since):>10.2f}  {plan}")
+            conn.execute(f"DROP INDEX {ddl.split()[2]}")
+        conn.close()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Bytes per tick and encode time for each WebSocket wire format, for full
+snapshots and single-field deltas.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_wire_format [ticks]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.services import wire_format  # noqa: E402
+from app.services.wire_format import SymbolTable, WireFormat, encode_message  # noqa: E402
+
+
+def ticks(count: int):
+    start = datetime(2024, 1, 1)
+    full, delta = [], []
+    for i in range(count):
+        full.append({
+            "type": "market_data",
+            "delta": False,
+            "data": {
+                "symbol": "BTCUSD",
+                "price": 50000.0 + i * 0.5,
+                "volume": 100.0 + i,
+                "timestamp": start + timedelta(microseconds=i * 250),
+                "sma_20": 49950.0 + i * 0.01,
+                "sma_50": 49900.0 + i * 0.005,
+                "rsi": 55.0 + (i % 20) * 0.7,
+                "momentum_score": 0.6,
+                "mean_reversion_score": 0.2,
+            },
+        })
+        delta.append({
+            "type": "market_data",
+            "delta": True,
+            "data": {"symbol": "BTCUSD", "price": 50000.0 + i * 0.5},
+        })
+    return full, delta
+
+
+def measure(messages, wire: WireFormat, symbols: SymbolTable):
+    started = time.perf_counter()
+    frames = [encode_message(message, wire, symbols) for message in messages]
+    elapsed = time.perf_counter() - started
+    size = sum(len(frame) for frame in frames) / len(frames)
+    return size, elapsed / len(frames) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    full, delta = ticks(count)
+    symbols = SymbolTable()
+
+    formats = [("json", WireFormat.JSON), ("struct", WireFormat.STRUCT)]
+    if wire_format.msgpack is not None:
+        formats.insert(1, ("msgpack", WireFormat.MSGPACK))
+    encoder = "orjson" if wire_format.orjson is not None else "stdlib json"
+
+    print(f"{count} ticks, JSON via {encoder}")
+    print(f"{'format':>10} {'message':>8} {'bytes/tick':>12} {'us/encode':>10}")
+    for label, wire in formats:
+        for kind, messages in (("full", full), ("delta", delta)):
+            size, micros = measure(messages, wire, symbols)
+            print(f"{label:>10} {kind:>8} {size:>12.1f} {micros:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Outbound bytes and event-loop time for a busy symbol fanned out over
+WebSocket: every tick as a full message vs. 100ms coalescing with per-client
+field deltas.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_ws_feed [clients] [ticks_per_second] [seconds]
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+os.environ.setdefault("TRADINGVIEW_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.market_data import MarketData  # noqa: E402
+from app.services.websocket_manager import WebSocketManager  # noqa: E402
+
+
+class CountingWebSocket:
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.messages += 1
+        self.bytes += len(message)
+
+
+async def legacy_broadcast(manager: WebSocketManager, market_data: MarketData):
+    """Pre-coalescing behaviour: every tick pushed with all nine fields"""
+    manager._fan_out(manager.symbol_subscriptions.get(market_data.symbol, ()), {
+        "type": "market_data",
+        "data": {column: getattr(market_data, column) for column in (
+            "symbol", "price", "volume", "sma_20", "sma_50", "rsi",
+            "momentum_score", "mean_reversion_score",
+        )} | {"timestamp": market_data.timestamp.isoformat()},
+    })
+
+
+async def run(label: str, coalesce_interval, clients: int, rate: int, seconds: float, legacy=False):
+    manager = WebSocketManager(coalesce_interval=coalesce_interval, queue_size=100_000)
+    sockets = [CountingWebSocket() for _ in range(clients)]
+    for websocket in sockets:
+        await manager.connect(websocket)
+        await manager.subscribe_to_symbol(websocket, "BTCUSD")
+
+    ticks = int(rate * seconds)
+    interval = 1.0 / rate
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for i in range(ticks):
+        # Price moves every tick; indicators move far less often
+        tick = MarketData(
+            symbol="BTCUSD",
+            price=50000.0 + (i % 50),
+            volume=100.0 + i // 20,
+            sma_20=50000.0 + i // 100,
+            sma_50=50000.0 + i // 250,
+            rsi=50.0 + (i // 200) % 10,
+            timestamp=datetime.utcnow(),
+        )
+        if legacy:
+            await legacy_broadcast(manager, tick)
+        else:
+            await manager.broadcast_market_data(tick)
+        # Pace the producer like a live feed
+        delay = started + (i + 1) * interval - time.perf_counter()
+        await asyncio.sleep(max(delay, 0))
+    await asyncio.sleep((coalesce_interval or 0) * 2)
+    await manager.drain()
+    cpu = time.process_time() - cpu_started
+    await manager.close()
+
+    messages = sum(s.messages for s in sockets)
+    sent = sum(s.bytes for s in sockets)
+    print(f"{label:>22} {ticks:>8} {messages:>10} {sent / 2**20:>10.2f} MiB {cpu:>8.2f} s cpu")
+
+
+def main():
+    clients, rate, seconds = ([int(a) for a in sys.argv[1:4]] + [0, 0, 0])[:3]
+    clients, rate, seconds = clients or 200, rate or 1000, seconds or 5
+    print(f"{'mode':>22} {'ticks':>8} {'messages':>10} {'outbound':>14} {'loop time':>12}")
+    asyncio.run(run("every tick, full", None, clients, rate, seconds, legacy=True))
+    asyncio.run(run("every tick, delta", None, clients, rate, seconds))
+    asyncio.run(run("100ms coalesce, delta", 0.1, clients, rate, seconds))
+
+
+if __name__ == "__main__":
+    main()
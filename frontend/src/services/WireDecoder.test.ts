@@ -0,0 +1,55 @@
+import { WireDecoder } from './WireDecoder';
+
+// Frames produced by backend/app/services/wire_format.py::encode_tick
+function tickFrame(flags: number, symbolId: number, fields: { [bit: number]: number }): ArrayBuffer {
+    const bits = Object.keys(fields).map(Number).sort((a, b) => a - b);
+    const buffer = new ArrayBuffer(6 + 8 * bits.length);
+    const view = new DataView(buffer);
+    view.setUint8(0, 1);
+    view.setUint8(1, flags);
+    view.setUint16(2, symbolId, true);
+    view.setUint16(4, bits.reduce((mask, bit) => mask | (1 << bit), 0), true);
+    bits.forEach((bit, i) => {
+        const offset = 6 + 8 * i;
+        if (bit === 0) {
+            const ns = fields[bit];
+            view.setUint32(offset, ns % 4294967296, true);
+            view.setInt32(offset + 4, Math.floor(ns / 4294967296), true);
+        } else {
+            view.setFloat64(offset, fields[bit], true);
+        }
+    });
+    return buffer;
+}
+
+describe('WireDecoder', () => {
+    it('decodes struct ticks and merges deltas into full snapshots', () => {
+        const decoder = new WireDecoder();
+        decoder.decode(JSON.stringify({ type: 'subscription_success', symbol: 'BTCUSD', symbol_id: 1 }));
+
+        const full = decoder.decode(tickFrame(0, 1, {
+            0: 1704067200000 * 1e6, 1: 50000, 2: 12, 3: 49900, 4: NaN, 5: 61.5, 6: 0.8, 7: 0
+        }));
+        expect(full.data).toEqual({
+            symbol: 'BTCUSD',
+            timestamp: '2024-01-01T00:00:00.000Z',
+            price: 50000,
+            volume: 12,
+            sma_20: 49900,
+            sma_50: null,
+            rsi: 61.5,
+            momentum_score: 0.8,
+            mean_reversion_score: 0
+        });
+
+        const update = decoder.decode(tickFrame(1, 1, { 1: 50010 }));
+        expect(update.data.price).toBe(50010);
+        expect(update.data.rsi).toBe(61.5);
+    });
+
+    it('passes JSON text frames through', () => {
+        const decoder = new WireDecoder();
+        const message = decoder.decode(JSON.stringify({ type: 'setup_alert', data: { symbol: 'ETHUSD' } }));
+        expect(message).toEqual({ type: 'setup_alert', data: { symbol: 'ETHUSD' } });
+    });
+});
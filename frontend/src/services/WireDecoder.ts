@@ -0,0 +1,99 @@
+// Decoder for the backend WebSocket wire formats. Pass WIRE_SUBPROTOCOLS to
+// `new WebSocket(url, WIRE_SUBPROTOCOLS)` and `binaryType = 'arraybuffer'`; the
+// server answers with the first one it supports.
+export const WIRE_SUBPROTOCOLS = ['traffic-light.struct.v1', 'traffic-light.json.v1'];
+
+// Struct tick frame, little-endian (see backend/app/services/wire_format.py):
+//   u8 kind, u8 flags, u16 symbol id, u16 field mask,
+//   then one value per set mask bit in TICK_FIELDS order
+//   (timestamp as i64 epoch nanoseconds, the rest as f64 with NaN for null)
+const TICK_KIND_MARKET_DATA = 1;
+const TICK_FLAG_DELTA = 1;
+const TICK_HEADER_BYTES = 6;
+const TICK_FIELDS = [
+    'timestamp',
+    'price',
+    'volume',
+    'sma_20',
+    'sma_50',
+    'rsi',
+    'momentum_score',
+    'mean_reversion_score'
+];
+
+export interface ServerTick {
+    symbol: string;
+    timestamp: string;
+    price: number | null;
+    volume: number | null;
+    sma_20: number | null;
+    sma_50: number | null;
+    rsi: number | null;
+    momentum_score: number | null;
+    mean_reversion_score: number | null;
+}
+
+export interface ServerMessage {
+    type: string;
+    data?: any;
+    delta?: boolean;
+    [key: string]: any;
+}
+
+export class WireDecoder {
+    private symbols: { [id: number]: string } = {};
+    private snapshots: { [symbol: string]: ServerTick } = {};
+
+    // Decode one frame. market_data deltas are merged into the last full
+    // snapshot for the symbol, so callers always see complete ticks.
+    decode(frame: string | ArrayBuffer): ServerMessage {
+        const message: ServerMessage = typeof frame === 'string'
+            ? JSON.parse(frame)
+            : this.decodeTick(frame);
+
+        if (message.type === 'subscription_success' && message.symbol_id !== undefined) {
+            this.symbols[message.symbol_id] = message.symbol;
+        }
+        if (message.type === 'market_data') {
+            const previous = message.delta ? this.snapshots[message.data.symbol] : undefined;
+            const tick = { ...(previous || {}), ...message.data } as ServerTick;
+            this.snapshots[tick.symbol] = tick;
+            return { type: 'market_data', data: tick, delta: false };
+        }
+        return message;
+    }
+
+    private decodeTick(frame: ArrayBuffer): ServerMessage {
+        const view = new DataView(frame);
+        const kind = view.getUint8(0);
+        if (kind !== TICK_KIND_MARKET_DATA) {
+            throw new Error(`Unknown binary frame kind ${kind}`);
+        }
+        const flags = view.getUint8(1);
+        const symbolId = view.getUint16(2, true);
+        const mask = view.getUint16(4, true);
+        const symbol = this.symbols[symbolId];
+        if (symbol === undefined) {
+            throw new Error(`Tick for unknown symbol id ${symbolId}`);
+        }
+
+        const data: { [field: string]: any } = { symbol };
+        let offset = TICK_HEADER_BYTES;
+        TICK_FIELDS.forEach((field, bit) => {
+            if (!(mask & (1 << bit))) {
+                return;
+            }
+            if (field === 'timestamp') {
+                // Millisecond precision is all Date can hold; avoids BigInt on ES5 targets
+                const low = view.getUint32(offset, true);
+                const high = view.getInt32(offset + 4, true);
+                data.timestamp = new Date((high * 4294967296 + low) / 1e6).toISOString();
+            } else {
+                const value = view.getFloat64(offset, true);
+                data[field] = isNaN(value) ? null : value;
+            }
+            offset += 8;
+        });
+        return { type: 'market_data', data, delta: (flags & TICK_FLAG_DELTA) !== 0 };
+    }
+}
@@ -58,4 +58,5 @@ export interface WebSocketMessage {
 export interface WebSocketSubscription {
     type: 'subscribe' | 'unsubscribe';
     symbol: TradingPair;
+    max_rate?: number; // updates per second; market_data after the first message carries only changed fields
 }